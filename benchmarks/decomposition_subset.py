@@ -0,0 +1,68 @@
+"""
+Regression run of the decomposition solver on small subsets of students.
+
+Clusters of a small subset own few timeslots, which may allow no valid move or swap of students at all. The solver
+should then skip or idle on such clusters, not fail. Fails when a run raises an error or returns an invalid schedule.
+
+Execute: `python3 benchmarks/decomposition_subset.py` from the root of the repository.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import traceback
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from program_code import InputData, SimulatedAnnealing  # noqa: E402
+from program_code.algorithms.decomposition import Decomposition  # noqa: E402
+
+
+def run(input_data: InputData, n_subset: int, seed: int, i_max: int, ruin_rate: float):
+    """Solve random subset of `n_subset` students with decomposition, like `main.py -sub`. Returns solved result."""
+    rng = random.Random(seed)
+    data_arguments = dict(input_data.__dict__)
+    data_arguments["students_input"] = rng.sample(input_data.students_input, n_subset)
+    solver = Decomposition(**data_arguments, mutation_supplier=SimulatedAnnealing(ruin_rate=ruin_rate))
+    return solver.solve(i_max=i_max, show_progress=False, seed=seed)
+
+
+def main(n_subset: int, seeds: int, i_max: int):
+    """Solve `seeds` subsets without and with ruin and recreate, and verify every result is a valid schedule."""
+    input_data = InputData("data/studenten_en_vakken.csv", "data/vakken.csv", "data/zalen.csv")
+
+    failed = False
+    for ruin_rate in (0, 0.5):
+        for seed in range(seeds):
+            start_time = time.time()
+            try:
+                result = run(input_data, n_subset, seed, i_max, ruin_rate)
+            except Exception:
+                print(f"FAILED: seed {seed}, ruin rate {ruin_rate}")
+                traceback.print_exc()
+                failed = True
+                continue
+
+            solved = result.check_solved()
+            print(
+                f"seed {seed}, ruin rate {ruin_rate}: score {result.score}, valid {solved}, "
+                f"{time.time() - start_time:.1f}s"
+            )
+            if not solved:
+                print(f"FAILED: invalid schedule for seed {seed}, ruin rate {ruin_rate}")
+                failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog="decomposition_subset.py", description="Regression run of decomposition on small subsets."
+    )
+    parser.add_argument("-sub", type=int, dest="n_subset", default=100, help="amount of students in subset.")
+    parser.add_argument("-n", type=int, dest="seeds", default=4, help="amount of seeds to run.")
+    parser.add_argument("-i", type=int, dest="i_max", default=200, help="max iterations per run.")
+    args = parser.parse_args()
+
+    sys.exit(main(**vars(args)))
@@ -0,0 +1,72 @@
+"""
+Benchmark for the import time of `program_code`.
+
+Headless runs (`python3 main.py --no_plot`) and every pool worker import the package, so importing it should stay cheap.
+Fails when one of the heavy visualisation libraries is imported eagerly, or when the import exceeds `--budget`.
+
+Execute: `python3 benchmarks/import_time.py` from the root of the repository.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+# Libraries that may only be loaded when visualising
+HEAVY_MODULES = ["matplotlib", "networkx"]
+
+# Statement executed in a fresh interpreter, prints eagerly loaded heavy modules
+IMPORT_STATEMENT = f"import sys, program_code; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+
+
+def measure_import(module_statement: str = IMPORT_STATEMENT):
+    """Import `program_code` in a fresh interpreter. Returns cumulative import time in seconds and loaded heavy modules."""
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", module_statement],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+
+    # Last report line of the top level package holds the cumulative time in microseconds
+    total_us = 0
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = [part.strip() for part in line.split(":", 1)[1].split("|")]
+        if name == "program_code":
+            total_us = int(cumulative)
+
+    loaded_heavy = [module for module in process.stdout.strip().split(",") if module]
+    return total_us / 1e6, loaded_heavy
+
+
+def main(repeat: int, budget: float | None):
+    """Measure import time `repeat` times and verify no heavy modules are imported."""
+    timings = []
+    loaded_heavy: list[str] = []
+    for _ in range(repeat):
+        seconds, loaded_heavy = measure_import()
+        timings.append(seconds)
+
+    print(f"Import time of program_code: median {statistics.median(timings):.3f}s, min {min(timings):.3f}s")
+
+    failed = False
+    if loaded_heavy:
+        print(f"FAILED: heavy modules imported eagerly: {loaded_heavy}")
+        failed = True
+    if budget is not None and statistics.median(timings) > budget:
+        print(f"FAILED: median import time exceeds budget of {budget:.3f}s")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="import_time.py", description="Benchmark import time of program_code.")
+    parser.add_argument("-n", type=int, dest="repeat", default=5, help="amount of measurements.")
+    parser.add_argument("--budget", type=float, dest="budget", help="maximum allowed median import time in seconds.")
+    args = parser.parse_args()
+
+    sys.exit(main(**vars(args)))
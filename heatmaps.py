@@ -0,0 +1,57 @@
+"""
+Conflict heatmaps of a population of results dumped by main.py.
+
+Execute: `python3 heatmaps.py output/results_*.pyc` to compute mean and quantile conflict scores per room, day and period.
+Scores are saved to a npz file without plotting, add `--plot` to also render them.
+"""
+
+import argparse
+import numpy as np
+from program_code import InputData, load_pickle, make_prototype
+from program_code.classes.result import Result
+from program_code.visualisation.conflicts import ConflictScorer, aggregate
+
+
+def load_results(paths: list[str]) -> list[Result]:
+    """Load results dumped at `paths`, a dump may hold a single result or a list of results."""
+    results = []
+    for path in paths:
+        data = load_pickle(path)
+        results.extend(data if isinstance(data, list) else [data])
+    return results
+
+
+def population_heatmaps(paths: list[str], data_arguments: dict, quantiles=(0.5, 0.9)):
+    """Return prototype schedule, rooms and summary (mean and quantiles) of conflict scores of dumped results."""
+    prototype = make_prototype(**data_arguments)
+    scorer = ConflictScorer(prototype)
+    heats = scorer.score_population(load_results(paths))
+    return prototype, scorer.rooms, len(heats), aggregate(heats, quantiles)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="heatmaps.py", description="Conflict heatmaps of a population of results.")
+
+    parser.add_argument("paths", nargs="+", help="Paths to results dumped by main.py.")
+    parser.add_argument("--prefs", default="data/studenten_en_vakken.csv", help="Path to student enrolments csv.")
+    parser.add_argument("--courses", default="data/vakken.csv", help="Path to courses csv.")
+    parser.add_argument("--rooms", default="data/zalen.csv", help="Path to rooms csv.")
+    parser.add_argument("--quantiles", type=float, nargs="*", default=[0.5, 0.9], help="Quantiles to compute.")
+    parser.add_argument("--output", default="output/heatmaps.npz", help="Path to save scores to.")
+    parser.add_argument("--plot", action="store_true", help="Render a heatmap of each statistic.")
+
+    args = parser.parse_args()
+    data_arguments = InputData(args.prefs, args.courses, args.rooms).__dict__
+    prototype, rooms, n, summary = population_heatmaps(args.paths, data_arguments, args.quantiles)
+
+    np.savez(args.output, rooms=np.array(rooms), **summary)
+    print(f"Saved conflict scores of {n} results to {args.output}")
+
+    if args.plot:
+        # Matplotlib is only needed for rendering
+        from program_code import Heatmap
+
+        for name, heat in summary.items():
+            output_path = f"output/heatmap_{name}.png"
+            Heatmap(prototype, heat=heat).plot_heatmap(output_path=output_path)
+            print(f"Heatmap saved to {output_path}")
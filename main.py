@@ -9,23 +9,20 @@ Course: Algoritmen en Heuristieken 2023
 
 
 import argparse
-import random
 import warnings
 from program_code import (
     InputData,
     generate_solutions,
-    Randomizer,
-    Greedy,
-    EvolutionSolver,
-    HillClimber,
-    SimulatedAnnealing,
-    DirectedSA,
+    make_solver,
+    METHODS,
+    load_previous,
+    resolve,
     dump_result,
     schedule_to_csv,
-    visualize_graph,
-    plot_histogram,
-    Heatmap,
-    plot_timetable,
+    export_timetables,
+    get_writer,
+    render_headless,
+    make_rng,
 )
 
 
@@ -39,9 +36,20 @@ def main(
     show_progress=True,
     do_plot: bool = True,
     do_save: bool = True,
+    section: bool = False,
+    ruin_rate: float = 0,
+    optimality_gap: float = 0,
+    previous: str | None = None,
+    previous_data: list[str] | None = None,
+    timetable_png: bool = False,
+    graph_detail: str = "students",
+    seed: int | None = None,
     **kwargs,
 ):
     """Interface for executing scheduling program."""
+    # All randomness of a run derives from the master seed
+    seed, rng = make_rng(seed)
+
     # Load dataset
     input_data = InputData(stud_prefs_path, courses_path, rooms_path)
     data_arguments = input_data.__dict__
@@ -51,88 +59,78 @@ def main(
         if n_subset > len(input_data.students_input):
             warnings.warn("WARNING: Chosen subset size is larger than set size, continuing anyway.")
         else:
-            data_arguments["students_input"] = random.sample(input_data.students_input, n_subset)
-
-    do_multithreading = False
-    do_compression = False
-
-    # Initialize solver with correct strategy
-    match method:
-        case "baseline":
-            # Baseline algorithm, most random
-            do_compression = True
-            solver = Randomizer(**data_arguments, method="uniform")
-        case "greedy":
-            # Greedy algorithm
-            do_multithreading = True
-            solver = Greedy(**data_arguments)
-        case "min_overlap":
-            # Improvement on baseline with bias towards least course conflicts
-            do_compression = True
-            solver = Randomizer(**data_arguments, method="min_overlap")
-        case "min_gaps":
-            # Improvement on baseline with bias towards least gap hours
-            do_compression = True
-            solver = Randomizer(**data_arguments, method="min_gaps")
-        case "min_gaps_overlap":
-            # Improvement on baseline with bias towards least gap hours, then least course conflicts
-            do_compression = True
-            solver = Randomizer(**data_arguments, method="min_gaps_overlap")
-        case "hillclimber":
-            # Population based solver, only helpful mutations
-            do_multithreading = True
-            solver = EvolutionSolver(**data_arguments, mutation_supplier=HillClimber())
-        case "simulated_annealing":
-            # Population based solver, score based mutation acceptance
-            do_multithreading = True
-            solver = EvolutionSolver(**data_arguments, mutation_supplier=SimulatedAnnealing())
-        case "directed_sa":
-            # Population based solver, bias towards mutating highest conflict areas
-            do_multithreading = True
-            warnings.warn("Directed Simulated Annealing not yet fully implemented!")
-            solver = EvolutionSolver(**data_arguments, mutation_supplier=DirectedSA())
-        case _:
-            raise ValueError("Invalid method chosen.")
-
-    # Retrieve results
-    results = generate_solutions(
-        solver,
-        show_progress=show_progress,
-        compress=do_compression,
-        multithreading=do_multithreading,
-        **kwargs,
-    )
+            data_arguments["students_input"] = rng.sample(input_data.students_input, n_subset)
+
+    if previous:
+        # Re-solve from previous result after input changed, only repairing and improving what the change affects
+        previous_input = InputData(*(previous_data or [stud_prefs_path, courses_path, rooms_path])).__dict__
+        previous_result = load_previous(previous, **previous_input)
+        i_max = kwargs.get("i_max") or 2000
+        results = [resolve(previous_result, **data_arguments, i_max=i_max, show_progress=show_progress, seed=seed)]
+    else:
+        # Initialize solver with correct strategy
+        solver, do_multithreading, do_compression = make_solver(
+            method, data_arguments, section=section, ruin_rate=ruin_rate, optimality_gap=optimality_gap
+        )
+
+        # Retrieve results
+        results = generate_solutions(
+            solver,
+            show_progress=show_progress,
+            compress=do_compression,
+            multithreading=do_multithreading,
+            unique=True,
+            seed=seed,
+            **kwargs,
+        )
 
     # Take random sample and rebuild schedule from edges
-    sampled_result = random.choice(results)
+    sampled_result = rng.choice(results)
     sampled_result.decompress(**data_arguments)
 
+    # Output is written in background while the program goes on, pending output is flushed on exit
+    writer = get_writer()
+
     # Dump results to disk
     if do_save:
-        dumped_loc = dump_result(results, f"output/results_{method}_{kwargs}_")
-        print("Dumped results to", dumped_loc)
-        schedule_to_csv(sampled_result.schedule)
-        print("Dumped a sampled schedule to", "output/schedule.csv")
+        dumped = writer.submit(dump_result, results, f"output/results_{method}_{kwargs}_")
+        dumped.add_done_callback(lambda future: print("Dumped results to", future.result()))
+        writer.submit(schedule_to_csv, sampled_result.schedule)
+        writer.submit(print, "Dumped a sampled schedule to", "output/schedule.csv")
+        exported = writer.submit(export_timetables, sampled_result.schedule, png=timetable_png)
+        exported.add_done_callback(
+            lambda future: print(f"Exported {future.result()} timetables of students, courses and rooms to output/timetables")
+        )
 
     if verbose:
         # Initialize `score_vector`
         sampled_result.score_vector
         print("Sampled result: ", sampled_result)
+        print(f"Master seed: {seed}, sampled result seed: {sampled_result.seed}")
+        print(f"Lower bound: {sampled_result.lower_bound}, optimality gap: {sampled_result.describe_gap()}")
 
     if not do_plot:
         return
 
+    # Figures are rendered to files by the writer thread, which can't use an interactive backend
+    render_headless()
+
+    # Visualisation libraries are heavy, only import them when plotting
+    from program_code import visualize_graph, plot_histogram, Heatmap, plot_timetable
+
     # Visualize graph
-    visualize_graph(sampled_result.schedule)
+    writer.submit(visualize_graph, sampled_result.schedule, detail=graph_detail)
 
     # Visualize score dimensions
-    plot_histogram(results)
+    writer.submit(plot_histogram, results, show=False)
 
     # Plot heatmap of conflict timeslots
-    Heatmap(sampled_result.schedule)
+    heatmap = Heatmap(sampled_result.schedule)
+    writer.submit(heatmap.timetable)
+    writer.submit(heatmap.plot_heatmap)
 
     # Visualizer random student's schedule
-    plot_timetable(sampled_result.schedule, "student")
+    writer.submit(plot_timetable, sampled_result.schedule, "student")
 
 
 if __name__ == "__main__":
@@ -142,16 +140,7 @@ if __name__ == "__main__":
     parser.add_argument(
         "-m",
         dest="method",
-        choices=[
-            "baseline",
-            "greedy",
-            "min_overlap",
-            "min_gaps",
-            "min_gaps_overlap",
-            "hillclimber",
-            "simulated_annealing",
-            "directed_sa",
-        ],
+        choices=METHODS,
         default="simulated_annealing",
         help="Choose method.",
     )
@@ -160,6 +149,7 @@ if __name__ == "__main__":
     parser.add_argument(
         "-sub", type=int, dest="n_subset", help="Subset: amount of students to take into account out of dataset."
     )
+    parser.add_argument("--seed", type=int, help="Master seed: runs with the same seed give the same results.")
     parser.add_argument("-v", dest="verbose", action="store_true", help="Verbose: log error messages.")
     parser.add_argument(
         "--prefs",
@@ -171,6 +161,33 @@ if __name__ == "__main__":
     parser.add_argument("--rooms", dest="rooms_path", default="data/zalen.csv", help="Path to rooms csv.")
     parser.add_argument("--no_plot", dest="do_plot", action="store_false", help="Don't show matplotlib plot")
     parser.add_argument("--discard", dest="do_save", action="store_false", help="Don't save results to disk.")
+    parser.add_argument(
+        "--section", dest="section", action="store_true", help="Optimally assign students to tutorial/practical groups."
+    )
+    parser.add_argument(
+        "--ruin", type=float, dest="ruin_rate", default=0, help="Chance per mutation step to rebuild a day/room/course."
+    )
+    parser.add_argument(
+        "--previous", help="Path to dumped result to re-solve from after the input changed, instead of solving anew."
+    )
+    parser.add_argument(
+        "--previous_data",
+        nargs=3,
+        metavar=("PREFS", "COURSES", "ROOMS"),
+        help="Paths to input csvs the previous result was solved with, defaults to current input.",
+    )
+    parser.add_argument(
+        "--timetable_png", action="store_true", help="Also plot exported timetables of all students, courses and rooms."
+    )
+    parser.add_argument(
+        "--graph_detail",
+        choices=("students", "activities"),
+        default="students",
+        help="Show students in graph, or only count them per timeslot.",
+    )
+    parser.add_argument(
+        "--gap", type=float, dest="optimality_gap", default=0, help="Stop once within this fraction of the lower bound."
+    )
 
     # Read arguments from command line
     args = parser.parse_args()
@@ -3,4 +3,11 @@ from .classes import *
 from .helpers import *
 from .algorithms import *
 from .classes.result import Result
-from .visualisation import *
+from . import visualisation
+
+
+def __getattr__(name: str):
+    """Forward visualisation functions, which are imported lazily to keep headless runs light."""
+    if name in visualisation.__all__:
+        return getattr(visualisation, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,8 +1,14 @@
 """All constructive and iterative solver algorithms."""
 from .randomizer import Randomizer
 from .greedy import Greedy
+from .coloring import GraphColoring
 from .solver import Solver, SolverSC
 from .statistics import Statistics
 from .generate import *
+from .transposition import TranspositionTable
 from .evolutionsolver import EvolutionSolver
 from .mutationsuppliers import HillClimber, SimulatedAnnealing, DirectedSA
+from .cooling import TemperatureSchedule, AdaptiveCooling
+from .decomposition import Decomposition
+from .methods import METHODS, make_solver
+from .resolve import resolve, load_previous
@@ -0,0 +1,136 @@
+"""
+Lower bounds on the score of any valid schedule of an instance, computed from the instance alone.
+
+Each component of `Result.score_vector` gets a bound that no solution can beat:
+- Evening timeslots: every activity needs timeslots in a room large enough for its groups. If more timeslots need a room
+  of at least some capacity than there are daytime timeslots in such rooms, the surplus has to be held in the evening.
+- Double bookings: a student with more activities than available moments books some moment twice. Lectures are held
+  in a single timeslot that all students of the course attend. When more lectures pairwise share at least `t` students
+  than there are available moments, each lecture beyond the amount of moments shares a moment with another lecture,
+  booking at least `t` students twice. Evening moments only become available by using evening timeslots, so both
+  components are bounded together.
+- Gaps: bookings can always be placed consecutively as far as the instance tells, so their bound is 0.
+"""
+
+import math
+import numpy as np
+from ..classes import Schedule
+from ..classes.occupancy import Occupancy
+
+# Evening timeslots are in the 4th period
+EVENING_PERIOD = 4
+
+# Sets of lectures found by `lecture_cliques`, by enrolments of the lectures: every result of an instance needs them
+_cliques: dict[tuple, list[tuple[int, int]]] = {}
+
+
+def required_room_sizes(schedule: Schedule) -> list[int]:
+    """Return for each timeslot that activities need at least, the room capacity it requires."""
+    largest_room = max(room.capacity for room in schedule.rooms.values())
+    sizes: list[int] = []
+    for activity in schedule.activities.values():
+        if activity.enrolled_students == 0:
+            continue
+
+        if activity.max_timeslots:
+            # Lecture: all students fit in its timeslots, so its largest timeslot holds at least an equal share
+            sizes.append(math.ceil(activity.enrolled_students / activity.max_timeslots))
+        else:
+            # Groups are limited by activity capacity and the largest room, but can be held in any room
+            group_capacity = min(activity.capacity or largest_room, largest_room)
+            sizes.extend([1] * math.ceil(activity.enrolled_students / group_capacity))
+    return sizes
+
+
+def evening_bound(schedule: Schedule) -> int:
+    """Least amount of evening timeslots any valid schedule uses."""
+    sizes = required_room_sizes(schedule)
+    daytime_capacities = [t.room.capacity for t in schedule.timeslots.values() if t.period != EVENING_PERIOD]
+
+    # For each threshold, timeslots requiring a room of at least that size compete for daytime timeslots in such rooms
+    bound = 0
+    for threshold in set(sizes):
+        demand = sum(size >= threshold for size in sizes)
+        supply = sum(capacity >= threshold for capacity in daytime_capacities)
+        bound = max(bound, demand - supply)
+    return bound
+
+
+def lecture_cliques(schedule: Schedule) -> list[tuple[int, int]]:
+    """Return sets of lectures that pairwise share students, as (amount of lectures, least shared students of a pair).
+
+    A largest set is hard to find, sets are grown greedily from each lecture for each least amount of shared students.
+    """
+    lectures = [a for a in schedule.activities.values() if a.max_timeslots == 1 and a.enrolled_students > 0]
+    if len(lectures) < 2:
+        return []
+    key = tuple(tuple(lecture.students) for lecture in lectures)
+    if key in _cliques:
+        return _cliques[key]
+
+    # Co-enrolment of lectures: students shared by each pair
+    student_index = {uid: i for i, uid in enumerate(schedule.students)}
+    enrolment = np.zeros((len(student_index), len(lectures)), dtype=np.int32)
+    for column, lecture in enumerate(lectures):
+        enrolment[[student_index[uid] for uid in lecture.students], column] = 1
+    shared = enrolment.T @ enrolment
+    np.fill_diagonal(shared, 0)
+
+    cliques: list[tuple[int, int]] = []
+    for threshold in np.unique(shared[shared > 0]):
+        adjacency = shared >= threshold
+        order = np.argsort(-adjacency.sum(axis=1), kind="stable")
+        largest = 0
+        for start in order:
+            # Add lectures by degree while they share enough students with all lectures in the set
+            candidates = adjacency[start].copy()
+            size = 1
+            for lecture in order:
+                if candidates[lecture]:
+                    candidates &= adjacency[lecture]
+                    size += 1
+            largest = max(largest, size)
+        cliques.append((largest, int(threshold)))
+    _cliques[key] = cliques
+    return cliques
+
+
+def bound_vector(schedule: Schedule, score_matrix) -> np.ndarray:
+    """Lower bound on each component of the score vector, such that the bound on the score is their weighted sum."""
+    daytime_moments = Occupancy.days * (Occupancy.periods_per_day - 1)
+    bookings = [len(student.activities) for student in schedule.students.values()]
+    cliques = lecture_cliques(schedule)
+    evening_min = evening_bound(schedule)
+
+    # Trade-off: each extra evening timeslot frees at most one evening moment for all students, up to one per day
+    best = None
+    for evenings in range(evening_min, max(evening_min, Occupancy.days) + 1):
+        moments = daytime_moments + min(evenings, Occupancy.days)
+        overbookings = max(
+            sum(max(count - moments, 0) for count in bookings),
+            max((max(size - moments, 0) * shared for size, shared in cliques), default=0),
+        )
+        vector = np.array([evenings, overbookings, 0, 0, 0])
+        if best is None or score_matrix.dot(vector) < score_matrix.dot(best):
+            best = vector
+    return best  # type: ignore
+
+
+def optimality_gap(score: float | int, lower_bound: float | int) -> float:
+    """Relative distance of `score` to `lower_bound`: 0 means the score is provably optimal."""
+    if score <= lower_bound:
+        return 0.0
+    return (score - lower_bound) / score
+
+
+def reported_gap(score: float | int, lower_bound: float | int) -> float | None:
+    """Optimality gap to report, `None` when the lower bound is 0 since any positive score then has a gap of 100%."""
+    if lower_bound <= 0 < score:
+        return None
+    return optimality_gap(score, lower_bound)
+
+
+def describe_gap(score: float | int, lower_bound: float | int) -> str:
+    """Optimality gap as percentage, or "n/a" when it is not informative."""
+    gap = reported_gap(score, lower_bound)
+    return "n/a" if gap is None else f"{gap:.1%}"
@@ -0,0 +1,136 @@
+import math
+import warnings
+import numpy as np
+from .solver import Solver
+from .generate import make_prototype, make_rng
+from .construction import ConstructionEngine, policy_tiers
+from .crossover import course_moment_free
+from .sectioning import section_students
+from ..classes import Schedule, Activity, Timeslot
+from ..classes.occupancy import Occupancy
+from ..classes.result import Result, SCORE_MATRIX
+
+
+class GraphColoring(Solver):
+    """Constructive solver that colours activities with moments, driven by the course co-enrolment graph.
+
+    Lectures and groups of tutorials/practicals are vertices. Two vertices conflict by the amount of students their courses share.
+    Vertices are coloured in order of saturation degree (DSatur): the one with conflicting neighbours at most moments first.
+    Each vertex gets the moment with least expected double bookings and the smallest free room that fits."""
+
+    def co_enrolment(self, schedule: Schedule):
+        """Return course index and co-enrolment matrix W, where W[c1, c2] is the amount of students in both courses."""
+        course_index = {uid: column for column, uid in enumerate(schedule.courses)}
+
+        # Enrolment matrix: B[s, c] = 1 if student s follows course c
+        enrolment = np.zeros((len(schedule.students), len(course_index)))
+        for row, student in enumerate(schedule.students.values()):
+            enrolment[row, [course_index[uid] for uid in student.courses]] = 1
+        return course_index, enrolment.T @ enrolment
+
+    def group_count(self, activity: Activity, rooms_capacity: int):
+        """Amount of groups (timeslots) required for all students of unbound `activity`."""
+        capacity = min(activity.capacity or rooms_capacity, rooms_capacity)
+        return max(math.ceil(activity.enrolled_students / capacity), 1)
+
+    def vertices(self, schedule: Schedule):
+        """Return vertices to colour: tuples of (activity, share of activity's students in vertex)."""
+        rooms_capacity = max(room.capacity for room in schedule.rooms.values())
+        vertices: list[tuple[Activity, float]] = []
+        for activity in schedule.activities.values():
+            if activity.enrolled_students == 0:
+                continue
+            if activity.max_timeslots:
+                vertices.extend((activity, 1.0) for i in range(activity.max_timeslots))
+            else:
+                groups = self.group_count(activity, rooms_capacity)
+                vertices.extend((activity, 1 / groups) for i in range(groups))
+        return vertices
+
+    def free_timeslots(self, schedule: Schedule, activity: Activity, moment_index: int, size: int):
+        """Return free timeslots at moment where `activity` can be placed, smallest fitting room first."""
+        timeslots = [
+            timeslot
+            for timeslot in self.timeslots_by_moment[moment_index]
+            if self.can_assign_timeslot_activity(timeslot, activity)
+            and (not activity.max_timeslots or course_moment_free(activity, timeslot))
+        ]
+        return sorted(timeslots, key=lambda t: (t.room.capacity < size, t.room.capacity))
+
+    def place(self, schedule: Schedule, activity: Activity, share: float):
+        """Give vertex of `activity` the moment with least expected conflicts. Returns whether a timeslot was free."""
+        course = self.course_index[activity.course.id]
+
+        # Expected double bookings per moment, plus penalty for evening timeslots
+        costs = share * (self.load @ self.weights[course]) + self.evening_penalty
+        size = math.ceil(activity.enrolled_students * share)
+
+        for moment_index in sorted(range(len(costs)), key=lambda m: (costs[m], self.rng.random())):
+            timeslots = self.free_timeslots(schedule, activity, moment_index, size)
+            if len(timeslots) > 0:
+                schedule.connect_nodes(activity, timeslots[0])
+                self.load[moment_index, course] += share
+                return True
+        return False
+
+    def color(self, schedule: Schedule):
+        """Assign timeslots to all activities in order of saturation degree."""
+        uncolored = self.vertices(schedule)
+
+        while len(uncolored) > 0:
+            # Saturation: amount of moments with conflicting neighbours. Degree: total conflict weight.
+            courses = [self.course_index[activity.course.id] for activity, share in uncolored]
+            conflicts = self.load @ self.weights[courses].T
+            saturation = np.count_nonzero(conflicts, axis=0)
+            degree = self.weights[courses].sum(axis=1) * [share for activity, share in uncolored]
+
+            # Lectures first, they need the largest rooms
+            index = max(
+                range(len(uncolored)),
+                key=lambda i: (bool(uncolored[i][0].max_timeslots), saturation[i], degree[i], self.rng.random()),
+            )
+            activity, share = uncolored.pop(index)
+            if not self.place(schedule, activity, share) and self.verbose:
+                warnings.warn(f"FAILED: no free timeslot for {activity}.")
+
+        # Smaller rooms may hold less students than expected, add groups until all students fit
+        for activity in schedule.activities.values():
+            if activity.max_timeslots:
+                continue
+            while sum(timeslot.capacity for timeslot in activity.timeslots.values()) < activity.enrolled_students:
+                if not self.place(schedule, activity, 1 / (len(activity.timeslots) + 1)):
+                    break
+
+    def solve(
+        self, schedule: Schedule | None = None, i_max: int | None = None, method=None, strict=True, seed=None
+    ):
+        """Colour activities with moments, then assign students to timeslots."""
+        seed, self.rng = make_rng(seed)
+        if schedule is None:
+            schedule = make_prototype(self.students_input, self.courses_input, self.rooms_input)
+
+        self.course_index, self.weights = self.co_enrolment(schedule)
+
+        # Placed share of each course per moment
+        self.load = np.zeros((Occupancy.days * Occupancy.periods_per_day, len(self.course_index)))
+        self.timeslots_by_moment: list[list[Timeslot]] = [[] for i in range(len(self.load))]
+        for timeslot in schedule.timeslots.values():
+            self.timeslots_by_moment[timeslot.moment_index].append(timeslot)
+
+        # Evening timeslots are penalized per use
+        evening_weight = SCORE_MATRIX[0]
+        periods = np.arange(len(self.load)) % Occupancy.periods_per_day
+        self.evening_penalty = evening_weight * (periods == 4)
+
+        self.color(schedule)
+
+        # Assign students to timeslots, preferring timeslots without overlap and gaps
+        engine = ConstructionEngine(
+            schedule, list(schedule.activities.values()), policy_tiers(self, "min_gaps_overlap"), rng=self.rng
+        )
+        iterations = engine.run(i_max)
+
+        result = Result(schedule=schedule, iterations=iterations, solved=engine.finished, seed=seed)
+        if self.section:
+            section_students(result)
+        return result
@@ -0,0 +1,121 @@
+"""
+Constructive engine for assigning students to timeslots of their activities.
+
+Unfinished work is kept as a heap of (activity, student) items, every item is handled once.
+Per activity, only timeslots with capacity left are considered. A policy is a list of rules in order of preference:
+a timeslot is drawn from the first tier of rules that any open timeslot of the activity satisfies.
+"""
+
+import heapq
+import random
+from typing import Callable
+from .statistics import Statistics
+from ..classes import Schedule, Student, Activity, Timeslot
+
+
+Rule = Callable[[Student, Timeslot], bool]
+
+
+def policy_tiers(statistics: Statistics, method: str) -> list[Rule]:
+    """Return rules of `method` in order of preference. Any open timeslot is allowed when no rule can be met."""
+
+    def no_overlap(student: Student, timeslot: Timeslot):
+        return not statistics.node_has_period(student, timeslot)
+
+    def no_gaps(limit: int) -> Rule:
+        return lambda student, timeslot: not statistics.timeslot_gives_gaps(student, timeslot, limit=limit)
+
+    def no_overlap_gaps(limit: int) -> Rule:
+        return lambda student, timeslot: no_overlap(student, timeslot) and no_gaps(limit)(student, timeslot)
+
+    match method:
+        case "min_overlap":
+            return [no_overlap]
+        case "min_gaps":
+            return [no_gaps(limit) for limit in range(1, 4)]
+        case "min_gaps_overlap":
+            # Give priority to absence of gaps and overlap, then to absence of gaps, then to absence of overlap
+            return (
+                [no_overlap_gaps(limit) for limit in range(1, 4)]
+                + [no_gaps(limit) for limit in range(1, 4)]
+                + [no_overlap]
+            )
+        case _:
+            return []
+
+
+class ConstructionEngine:
+    """Assigns students to timeslots of `activities` according to policy `rules`."""
+
+    def __init__(self, schedule: Schedule, activities: list[Activity], rules: list[Rule], rng=random):
+        self.schedule = schedule
+        self.rules = rules
+        self.rng = rng
+
+        # Per activity the timeslots that have capacity left, with remaining capacity per timeslot id
+        self.open_timeslots: dict[int, list[Timeslot]] = {}
+        self.remaining: dict[int, int] = {}
+
+        # Heap of work items: (priority, activity, student)
+        self.work: list[tuple[tuple, Activity, Student]] = []
+        # Items for which no timeslot with capacity left was available
+        self.unplaced: list[tuple[Activity, Student]] = []
+
+        for activity in activities:
+            self.open_timeslots[activity.id] = []
+            for timeslot in activity.timeslots.values():
+                self.remaining[timeslot.id] = timeslot.capacity - timeslot.enrolled_students
+                if self.remaining[timeslot.id] > 0:
+                    self.open_timeslots[activity.id].append(timeslot)
+
+            # Only students that don't yet have a timeslot for this activity
+            for student in activity.students.values():
+                if activity.id not in student.activity_slots:
+                    self.work.append((self.priority(activity, student), activity, student))
+        heapq.heapify(self.work)
+
+    def priority(self, activity: Activity, student: Student):
+        """Priority of work item, lowest first: students with most activities first, since they are hardest to fit.
+        Ties are broken randomly."""
+        return (-len(student.activities), self.rng.random(), activity.id, student.id)
+
+    def choose(self, activity: Activity, student: Student) -> Timeslot | None:
+        """Draw an open timeslot of `activity` for `student` from the first satisfiable tier of rules."""
+        timeslots = self.open_timeslots[activity.id]
+        if len(timeslots) == 0:
+            return None
+
+        for rule in self.rules:
+            candidates = [timeslot for timeslot in timeslots if rule(student, timeslot)]
+            if len(candidates) > 0:
+                return self.rng.choice(candidates)
+        return self.rng.choice(timeslots)
+
+    def assign(self, activity: Activity, student: Student):
+        """Book timeslot of `activity` for `student`. Returns whether an open timeslot was available."""
+        timeslot = self.choose(activity, student)
+        if timeslot is None:
+            self.unplaced.append((activity, student))
+            return False
+
+        self.schedule.connect_nodes(student, timeslot)
+
+        # Close timeslot when it's full
+        self.remaining[timeslot.id] -= 1
+        if self.remaining[timeslot.id] == 0:
+            self.open_timeslots[activity.id].remove(timeslot)
+        return True
+
+    def run(self, i_max: int | None = None):
+        """Handle work items, at most `i_max`. Returns amount of handled items."""
+        iterations = 0
+        while len(self.work) > 0 and (i_max is None or iterations < i_max):
+            _, activity, student = heapq.heappop(self.work)
+            self.assign(activity, student)
+            iterations += 1
+        return iterations
+
+    @property
+    def finished(self):
+        """Whether every student has a timeslot for each of the activities."""
+        return len(self.work) == 0 and len(self.unplaced) == 0
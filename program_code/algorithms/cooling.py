@@ -0,0 +1,114 @@
+"""
+Temperature schedules for `SimulatedAnnealing`.
+
+A schedule gives the temperature at which a mutation is accepted and is told whether each proposed mutation was
+accepted, so it can adapt to the run. `AdaptiveCooling` doesn't need tuning to the score range of an instance:
+it calibrates its initial temperature from the score differences of the first proposed mutations, then cools or
+heats to keep the acceptance rate of worsening mutations on a target that decreases over the run. When no better
+schedule is found for a while, it reheats to escape the local minimum.
+"""
+
+import math
+
+
+class TemperatureSchedule:
+    """Temperature schedule parent class."""
+
+    def temperature(self, diff: int | float, iterations: int, i_max: int) -> float:
+        """Temperature to decide on accepting a mutation changing the score by `diff` at iteration `iterations`."""
+        raise NotImplementedError
+
+    def update(self, diff: int | float, accepted: bool):
+        """Process decision on a mutation changing the score by `diff`."""
+
+    def reset(self):
+        """Forget state of previous run."""
+
+
+class AdaptiveCooling(TemperatureSchedule):
+    """Temperature controlled by the acceptance rate of worsening mutations.
+
+    The initial temperature accepts an average worsening mutation of the first `calibration_moves` with probability
+    `initial_rate`. The target acceptance rate decreases geometrically from `initial_rate` to `final_rate` over the run.
+    After each decision on a worsening mutation the temperature is multiplied or divided by `cooling`, depending on
+    whether the acceptance rate, a moving average over about `window` decisions, is above or below target.
+    After `stagnation` decisions without a new best score, the temperature is raised to `reheat` times the temperature
+    at which the best score was found."""
+
+    def __init__(
+        self,
+        initial_rate: float = 0.05,
+        final_rate: float = 0.0001,
+        calibration_moves: int = 50,
+        window: int = 20,
+        cooling: float = 0.97,
+        stagnation: int = 5000,
+        reheat: float = 2,
+    ) -> None:
+        self.initial_rate = initial_rate
+        self.final_rate = final_rate
+        self.calibration_moves = calibration_moves
+        self.window = window
+        self.cooling = cooling
+        self.stagnation = stagnation
+        self.reheat = reheat
+        self.reset()
+
+    def reset(self):
+        self.T: float | None = None
+        # Score differences of worsening mutations, for calibration
+        self.samples: list[float] = []
+        # Moving acceptance rate of worsening mutations over about `window` decisions
+        self.rate = self.initial_rate
+        self.target = self.initial_rate
+
+        # Score relative to start of run, as sum of accepted differences, and best so far
+        self.energy: float = 0
+        self.best_energy: float = 0
+        self.best_T: float | None = None
+        self.since_best = 0
+
+    def target_rate(self, iterations: int, i_max: int) -> float:
+        """Acceptance rate to aim for at iteration `iterations` of `i_max`."""
+        progress = min(iterations / max(i_max, 1), 1)
+        return self.initial_rate * (self.final_rate / self.initial_rate) ** progress
+
+    def temperature(self, diff, iterations, i_max) -> float:
+        self.target = self.target_rate(iterations, i_max)
+
+        # Calibrate on worsening mutations: T such that their average is accepted with probability `initial_rate`
+        if len(self.samples) < self.calibration_moves and diff > 0:
+            self.samples.append(diff)
+            self.T = sum(self.samples) / len(self.samples) / -math.log(self.initial_rate)
+
+        # Until a worsening mutation is seen, only improvements are decided on, which are accepted at any temperature
+        if self.T is None:
+            return 1.0
+        return self.T
+
+    def update(self, diff, accepted):
+        if self.T is None:
+            return
+
+        if accepted:
+            self.energy += diff
+        if self.energy < self.best_energy or self.best_T is None:
+            self.best_energy = self.energy
+            self.best_T = self.T
+            self.since_best = 0
+        else:
+            self.since_best += 1
+
+        # Reheat when stuck
+        if self.since_best >= self.stagnation:
+            self.T = max(self.T, self.reheat * self.best_T)
+            self.since_best = 0
+            self.best_energy = self.energy
+
+        if diff <= 0:
+            return
+
+        # Cool towards target acceptance rate, once calibrated
+        self.rate += (accepted - self.rate) / self.window
+        if len(self.samples) >= self.calibration_moves:
+            self.T *= self.cooling if self.rate > self.target else 1 / self.cooling
@@ -0,0 +1,225 @@
+"""
+Crossover and repair operations for the genetic mode of `EvolutionSolver`.
+
+Offspring inherit the activity-timeslot and student-timeslot assignments course by course from two parents.
+Inheriting assignments from two schedules can break hard constraints, which are restored by `repair`.
+"""
+
+import random
+from .statistics import Statistics
+from .generate import make_prototype
+from ..classes import Schedule, Student, Activity, Timeslot
+from ..classes.result import Result
+
+
+def strip_activity(schedule: Schedule, activity: Activity):
+    """Disconnect `activity` and its students from all timeslots of `activity`."""
+    for timeslot in list(activity.timeslots.values()):
+        for student in list(timeslot.students.values()):
+            if student.id in activity.students:
+                schedule.disconnect_nodes(student, timeslot)
+        schedule.disconnect_nodes(activity, timeslot)
+
+
+def inherit_courses(schedule: Schedule, donor: Schedule, course_ids: list[int]):
+    """Replace assignments of courses `course_ids` in `schedule` with their assignments in `donor`.
+
+    Returns list of (activity, donor timeslot) that could not be placed because the timeslot is taken in `schedule`."""
+    # Remove assignments of inherited courses first, so they don't block each other
+    for course_id in course_ids:
+        for activity in schedule.courses[course_id].activities.values():
+            strip_activity(schedule, activity)
+
+    unplaced: list[tuple[Activity, Timeslot]] = []
+    for course_id in course_ids:
+        for activity in schedule.courses[course_id].activities.values():
+            donor_activity = donor.activities[activity.id]
+            for donor_timeslot in donor_activity.timeslots.values():
+                timeslot = schedule.timeslots[donor_timeslot.id]
+
+                # Timeslot is taken by an activity that was kept, place it later
+                if len(timeslot.activities) > 0:
+                    unplaced.append((activity, donor_timeslot))
+                    continue
+
+                schedule.connect_nodes(activity, timeslot)
+                for donor_student in donor_timeslot.students.values():
+                    schedule.connect_nodes(schedule.students[donor_student.id], timeslot)
+    return unplaced
+
+
+def course_moment_free(activity: Activity, timeslot: Timeslot):
+    """Verify no activity of the course of bound `activity` takes place at the moment of `timeslot`."""
+    for course_activity in activity.course.activities.values():
+        if course_activity is not activity and Statistics.node_has_period(course_activity, timeslot):
+            return False
+    return True
+
+
+def find_free_timeslot(
+    schedule: Schedule, activity: Activity, moment: tuple[int, int] | None, enrolments: int, statistics: Statistics
+):
+    """Find free timeslot for `activity` with room for `enrolments` students, preferably at `moment`."""
+    candidates = [
+        timeslot
+        for timeslot in schedule.timeslots.values()
+        if statistics.can_assign_timeslot_activity(timeslot, activity)
+        and (not activity.max_timeslots or course_moment_free(activity, timeslot))
+    ]
+    if len(candidates) == 0:
+        return None
+
+    # Prefer rooms that fit all students, then same moment so inherited student timetables stay intact, then smallest room
+    return min(
+        candidates,
+        key=lambda t: (t.room.capacity < enrolments, t.moment != moment, t.room.capacity),
+    )
+
+
+def place_unplaced(schedule: Schedule, donor: Schedule, unplaced: list[tuple[Activity, Timeslot]]):
+    """Place activities of which the inherited timeslot was taken in another free timeslot, together with their students.
+
+    Tutorials and practicals that can't be placed are dropped, their students are reassigned by `repair`."""
+    statistics = Statistics()
+    release_empty_timeslots(schedule)
+    # Lectures first, they can only be placed in the largest rooms
+    unplaced.sort(key=lambda item: not item[0].max_timeslots)
+    for activity, donor_timeslot in unplaced:
+        timeslot = find_free_timeslot(
+            schedule, activity, donor_timeslot.moment, donor_timeslot.enrolled_students, statistics
+        )
+        if timeslot is None:
+            # Lectures must take place
+            if activity.max_timeslots:
+                return False
+            continue
+
+        schedule.connect_nodes(activity, timeslot)
+        for donor_student in donor_timeslot.students.values():
+            schedule.connect_nodes(schedule.students[donor_student.id], timeslot)
+    return True
+
+
+def assign_student(result: Result, student: Student, activity: Activity):
+    """Assign `student` to a timeslot of `activity` with room left, preferably without overlap.
+    Opens a new timeslot for the activity if all are full. Returns whether student could be assigned."""
+    available = [t for t in activity.timeslots.values() if result.can_assign_student_timeslot(student, t)]
+
+    # Open new timeslot, only tutorials and practicals can have multiple timeslots
+    if len(available) == 0 and not activity.max_timeslots:
+        timeslot = find_free_timeslot(result.schedule, activity, None, 1, result)  # type: ignore
+        if timeslot is None:
+            return False
+        result.schedule.connect_nodes(activity, timeslot)
+        available = [timeslot]
+
+    if len(available) == 0:
+        return False
+
+    # Prefer timeslots that don't overlap with other bookings of student
+    timeslot = min(available, key=lambda t: result.node_has_period(student, t))
+    result.schedule.connect_nodes(student, timeslot)
+    return True
+
+
+def release_empty_timeslots(schedule: Schedule):
+    """Disconnect tutorials and practicals from timeslots without students, so the timeslots can be reused."""
+    for activity in schedule.activities.values():
+        if activity.max_timeslots:
+            continue
+        for timeslot in list(activity.timeslots.values()):
+            if timeslot.enrolled_students == 0:
+                schedule.disconnect_nodes(activity, timeslot)
+
+
+def repair(result: Result):
+    """Restore hard constraints of `result.schedule` after crossover. Returns validity of repaired schedule."""
+    schedule = result.schedule
+    release_empty_timeslots(schedule)
+
+    for activity in schedule.activities.values():
+        # Move surplus students of overbooked timeslots to timeslots of the same activity with room left
+        for timeslot in list(activity.timeslots.values()):
+            surplus = result.timeslot_student_overbooked(timeslot)
+            for student in list(timeslot.students.values())[:surplus]:
+                schedule.disconnect_nodes(student, timeslot)
+                if not assign_student(result, student, activity):
+                    return False
+
+        # Assign students that lost their timeslot
+        for student in activity.students.values():
+            if not result.student_has_activity_assigned(student, activity) and not assign_student(
+                result, student, activity
+            ):
+                return False
+
+    result.update_score()
+    return result.check_solved()
+
+
+def crossover(parent1: Result, parent2: Result, rate: float = 0.5, rng=random):
+    """Make child of `parent1` that inherits the assignments of each course from `parent2` with probability `rate`.
+
+    Returns repaired child, or `None` if hard constraints could not be restored."""
+    child = parent1.fork()
+    donor = parent2.schedule
+
+    course_ids = [course_id for course_id in child.schedule.courses if rng.random() < rate]
+    unplaced = inherit_courses(child.schedule, donor, course_ids)
+
+    if not place_unplaced(child.schedule, donor, unplaced) or not repair(child):
+        return None
+    return child
+
+
+# State of breeding worker processes, initialized once per process by `init_breeder`
+_breeder: dict = {}
+
+
+def init_breeder(students_input, courses_input, rooms_input, mutation_supplier, memetic_steps: int, rate: float):
+    """Initialize worker process: build prototype once, so parents can be forked from it."""
+    _breeder["prototype"] = make_prototype(students_input, courses_input, rooms_input)
+    _breeder["mutation_supplier"] = mutation_supplier
+    _breeder["memetic_steps"] = memetic_steps
+    _breeder["rate"] = rate
+
+
+def result_from_edges(edges):
+    """Build result from edges of a schedule, by forking the prototype of the worker."""
+    schedule: Schedule = _breeder["prototype"].fork()
+    schedule.restore(edges)
+    return Result(schedule)
+
+
+def refine(result: Result, mutation_supplier, steps: int, rng=random):
+    """Memetic refinement: apply `steps` mutations suggested by `mutation_supplier`, drawn with `rng`."""
+    mutation_supplier.reset(rng)
+    for step in range(steps):
+        try:
+            mutation = mutation_supplier.suggest_mutation(result, iterations=step, i_max=steps)
+        except RecursionError:
+            # No acceptable mutation could be found, child is in a local optimum
+            break
+        mutation.apply()
+        mutation_supplier.reset_mutations()
+    result.update_score()
+
+
+def breed(arguments):
+    """Make and evaluate one child of two parents given by their edges.
+
+    Returns tuple of child edges, score vector and hash, or `None` if crossover produced an invalid child."""
+    edges1, edges2, seed = arguments
+    rng = random.Random(seed)
+
+    child = crossover(result_from_edges(edges1), result_from_edges(edges2), _breeder["rate"], rng)
+    if child is None:
+        return None
+
+    if _breeder["memetic_steps"] > 0:
+        refine(child, _breeder["mutation_supplier"], _breeder["memetic_steps"], rng)
+        # Mutations may not keep all hard constraints
+        if not child.check_solved():
+            return None
+
+    return child.schedule.snapshot(), child.score_vector, child.state_hash
@@ -0,0 +1,247 @@
+"""
+Decomposition of a schedule into loosely coupled clusters of courses, which are annealed in parallel.
+
+Lectures are shared by all students of a course, so they are placed first and stay fixed. Courses are then clustered
+along the co-enrolment graph: courses that share many students end up in the same cluster. Each cluster anneals the
+timeslots and groups of its tutorials and practicals in its own process, with a disjoint share of the free timeslots.
+Clusters never touch the same timeslot, so their results merge into one valid schedule, which a short global
+anneal polishes to resolve conflicts between clusters.
+"""
+
+import math
+import random
+import multiprocessing
+import numpy as np
+from .coloring import GraphColoring
+from .randomizer import Randomizer
+from .evolutionsolver import EvolutionSolver
+from .generate import make_prototype, make_rng
+from .mutationsuppliers import MutationSupplier, SimulatedAnnealing
+from ..classes import Schedule, Course
+from ..classes.result import Result
+
+
+class ClusterSolver(EvolutionSolver):
+    """Evolution solver that only mutates a fixed set of timeslots: those of one cluster.
+    Mutations drawn from the focus timeslots stay within them, ruin and recreate included."""
+
+    def __init__(self, *args, cluster_timeslots: list[int], **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cluster_timeslots = cluster_timeslots
+
+    def focus_timeslots(self, result: Result):
+        return [result.schedule.timeslots[uid] for uid in self.cluster_timeslots]
+
+
+def cluster_courses(course_index: dict[int, int], weights: np.ndarray, n_clusters: int):
+    """Partition courses in at most `n_clusters` clusters of similar size, keeping courses that share students together.
+    Takes course index and co-enrolment matrix as made by `GraphColoring.co_enrolment`. Returns lists of course ids."""
+    courses = list(course_index)
+    sizes = np.diag(weights).copy()
+    cap = math.ceil(sizes.sum() / n_clusters)
+
+    # Union-find over courses, merging most co-enrolled pairs first while clusters stay below `cap` enrolments
+    parent = list(range(len(courses)))
+
+    def find(i: int):
+        while parent[i] != i:
+            i = parent[i]
+        return i
+
+    pairs = sorted(
+        ((weights[i, j], i, j) for i in range(len(courses)) for j in range(i + 1, len(courses)) if weights[i, j] > 0),
+        reverse=True,
+    )
+    for weight, i, j in pairs:
+        root_i, root_j = find(i), find(j)
+        if root_i != root_j and sizes[root_i] + sizes[root_j] <= cap:
+            parent[root_j] = root_i
+            sizes[root_i] += sizes[root_j]
+
+    clusters: dict[int, list[int]] = {}
+    for i, uid in enumerate(courses):
+        clusters.setdefault(find(i), []).append(uid)
+
+    # Pack remaining clusters into `n_clusters` bins, largest first into the emptiest bin
+    bins: list[list[int]] = [[] for i in range(n_clusters)]
+    bin_sizes = [0] * n_clusters
+    for root, members in sorted(clusters.items(), key=lambda item: -sizes[item[0]]):
+        index = min(range(n_clusters), key=lambda i: bin_sizes[i])
+        bins[index].extend(members)
+        bin_sizes[index] += sizes[root]
+    return [members for members in bins if len(members) > 0]
+
+
+def cluster_timeslots(schedule: Schedule, clusters: list[list[int]], rng=random):
+    """Return ids of timeslots each cluster may change: those of its tutorials and practicals,
+    plus a share of the free timeslots in proportion to its amount of timeslots."""
+    owned: list[list[int]] = []
+    for cluster in clusters:
+        courses: list[Course] = [schedule.courses[uid] for uid in cluster]
+        owned.append(
+            [
+                timeslot.id
+                for course in courses
+                for activity in course.activities.values()
+                if not activity.max_timeslots
+                for timeslot in activity.timeslots.values()
+            ]
+        )
+
+    # Deal free timeslots to the cluster with least free timeslots relative to its size
+    free = [timeslot for timeslot in schedule.timeslots.values() if len(timeslot.activities) == 0]
+    rng.shuffle(free)
+    shares = [0] * len(clusters)
+    for timeslot in free:
+        index = min(range(len(clusters)), key=lambda i: (shares[i] / (len(owned[i]) + 1), rng.random()))
+        owned[index].append(timeslot.id)
+        shares[index] += 1
+    return owned
+
+
+def has_movable_students(schedule: Schedule, timeslots: list[int]):
+    """Whether a student in `timeslots` can move to another group of its activity."""
+    for uid in timeslots:
+        timeslot = schedule.timeslots[uid]
+        for activity in timeslot.activities.values():
+            if timeslot.enrolled_students > 0 and len(activity.timeslots) > 1:
+                return True
+    return False
+
+
+# State of cluster worker processes, initialized once per process by `init_cluster_worker`
+_worker: dict = {}
+
+
+def init_cluster_worker(students_input, courses_input, rooms_input, mutation_supplier: MutationSupplier):
+    """Initialize worker process: build prototype once, so the seed schedule can be forked from it."""
+    _worker["data"] = students_input, courses_input, rooms_input
+    _worker["prototype"] = make_prototype(students_input, courses_input, rooms_input)
+    _worker["mutation_supplier"] = mutation_supplier
+
+
+def anneal_cluster(arguments):
+    """Anneal timeslots of one cluster, starting from the seed schedule. Returns the assignment edges of its timeslots."""
+    edges, timeslots, i_max, seed = arguments
+
+    schedule: Schedule = _worker["prototype"].fork()
+    schedule.restore(edges)
+    solver = ClusterSolver(
+        *_worker["data"],
+        population_size=1,
+        mutation_supplier=_worker["mutation_supplier"],
+        cluster_timeslots=timeslots,
+    )
+    result = solver.solve(schedule, i_max=i_max, self_repair=True, show_progress=False, save_result=False, seed=seed)
+
+    owned = set(timeslots)
+    return {edge for edge in result.schedule.snapshot() if edge[0] in owned or edge[1] in owned}
+
+
+class Decomposition:
+    """Solves schedule by parts: clusters of courses are annealed in parallel, then merged and polished as a whole.
+
+    `i_max` mutations are divided over the clusters by their amount of timeslots, `polish_rate` of `i_max` is spent on
+    the global polish. With a process per cluster, wall time shrinks with the amount of clusters."""
+
+    def __init__(
+        self,
+        students_input,
+        courses_input,
+        rooms_input,
+        n_clusters: int | None = None,
+        processes: int | None = None,
+        polish_rate: float = 0.2,
+        mutation_supplier: MutationSupplier | None = None,
+        max_generations=30000,
+        verbose=False,
+    ) -> None:
+        self.students_input = students_input
+        self.courses_input = courses_input
+        self.rooms_input = rooms_input
+
+        # Amount of worker processes, and of clusters, default to amount of cores
+        self.processes = processes or multiprocessing.cpu_count()
+        self.n_clusters = n_clusters or max(self.processes, 2)
+        self.polish_rate = polish_rate
+        self.max_generations = max_generations
+
+        if mutation_supplier is None:
+            mutation_supplier = SimulatedAnnealing()
+        self.mutation_supplier = mutation_supplier
+        self.verbose = verbose
+
+    def seed(self, coloring: GraphColoring, rng=random):
+        """Construct a valid schedule: lectures placed along the co-enrolment graph, students assigned to groups."""
+        result = coloring.solve(seed=rng.getrandbits(64))
+        if not result.check_solved():
+            randomizer = Randomizer(self.students_input, self.courses_input, self.rooms_input, method="bias")
+            result = randomizer.solve(seed=rng.getrandbits(64))
+        return result
+
+    def solve(self, i_max: int | None = None, show_progress=True, seed: int | None = None):
+        if i_max is None:
+            i_max = self.max_generations
+        seed, rng = make_rng(seed)
+
+        coloring = GraphColoring(self.students_input, self.courses_input, self.rooms_input)
+        result = self.seed(coloring, rng)
+        seed_score = result.score
+        schedule = result.schedule
+        edges = schedule.snapshot()
+
+        # Partition courses and timeslots, budget of cluster is in proportion to its timeslots
+        clusters = cluster_courses(*coloring.co_enrolment(schedule), self.n_clusters)
+        owned = cluster_timeslots(schedule, clusters, rng)
+
+        # Clusters without students to move or swap between groups keep their seed assignments
+        owned = [timeslots for timeslots in owned if has_movable_students(schedule, timeslots)]
+        total = sum(len(timeslots) for timeslots in owned)
+        anneal_steps = i_max - int(i_max * self.polish_rate)
+        jobs = [
+            (edges, timeslots, max(math.ceil(anneal_steps * len(timeslots) / total), 1), rng.getrandbits(64))
+            for timeslots in owned
+        ]
+
+        # Daemonic processes (eg. solvers run by `generate_solutions`) can not have children, anneal in this process instead
+        worker_arguments = (self.students_input, self.courses_input, self.rooms_input, self.mutation_supplier)
+        if self.processes > 1 and len(jobs) > 1 and not multiprocessing.current_process().daemon:
+            with multiprocessing.Pool(
+                min(self.processes, len(jobs)), initializer=init_cluster_worker, initargs=worker_arguments
+            ) as pool:
+                cluster_edges = pool.map(anneal_cluster, jobs)
+        else:
+            init_cluster_worker(*worker_arguments)
+            cluster_edges = list(map(anneal_cluster, jobs))
+
+        # Merge: each cluster replaces the assignments of its own timeslots, the only timeslots its mutations change
+        merged = set(edges)
+        for timeslots, new_edges in zip(owned, cluster_edges):
+            timeslots = set(timeslots)
+            merged = {edge for edge in merged if edge[0] not in timeslots and edge[1] not in timeslots} | new_edges
+        schedule.restore(merged)
+        merged_result = Result(schedule, seed=seed)
+        if self.verbose:
+            print(f"Clusters: {len(clusters)}, seed score: {seed_score}, merged score: {merged_result.score}")
+
+        # Polish whole schedule, to resolve conflicts between clusters
+        polish_steps = i_max - anneal_steps
+        if polish_steps == 0:
+            return merged_result
+        solver = EvolutionSolver(
+            self.students_input,
+            self.courses_input,
+            self.rooms_input,
+            population_size=1,
+            mutation_supplier=self.mutation_supplier,
+        )
+        result = solver.solve(
+            schedule,
+            i_max=polish_steps,
+            self_repair=True,
+            show_progress=show_progress,
+            save_result=False,
+            seed=rng.getrandbits(64),
+        )
+        result.seed = seed
+        return result
@@ -10,21 +10,30 @@ Course: Algoritmen en Heuristieken 2023
 
 import copy
 import time
+import random
 import multiprocessing
+from typing import Callable
 from tqdm import tqdm
-import matplotlib.pyplot as plt
 from .mutationsuppliers import MutationSupplier, SimulatedAnnealing, Mutation
 from ..classes import Schedule
 from .statistics import Statistics
 from .randomizer import Randomizer
-from .generate import generate_solutions
+from .generate import generate_solutions, make_prototype, make_rng
+from .crossover import init_breeder, breed
+from .sectioning import section_students
+from .bounds import optimality_gap
+from .transposition import TranspositionTable
 from ..classes.result import Result
-from ..helpers import dump_result
+from ..helpers import dump_result, get_writer
 
 
 class EvolutionSolver:
     """Evolution based algorithm for improving schedule.
-    Takes a solved schedule as input and applies mutations upon it to improve score."""
+    Takes a solved schedule as input and applies mutations upon it to improve score.
+
+    In `genetic` mode the population is recombined each generation: children inherit assignments course by course
+    from two parents chosen by tournament selection. `mutation_supplier` then refines each child for `memetic_steps` mutations.
+    """
 
     def __init__(
         self,
@@ -36,6 +45,16 @@ class EvolutionSolver:
         method="bias",
         mutation_supplier: MutationSupplier = SimulatedAnnealing(),
         verbose=False,
+        genetic=False,
+        crossover_rate=0.5,
+        memetic_steps=0,
+        tournament_size=2,
+        processes: int | None = None,
+        section_interval: int | None = None,
+        optimality_gap: float = 0,
+        progress: Callable[[int, float], None] | None = None,
+        focus: set[int] | None = None,
+        transposition_size: int = 100000,
     ) -> None:
         # Build initial population with input
         self.students_input = students_input
@@ -54,6 +73,29 @@ class EvolutionSolver:
         # Show details of solution process
         self.verbose = verbose
 
+        # Genetic mode settings: probability of inheriting a course from the second parent and local search steps per child
+        self.genetic = genetic
+        self.crossover_rate = crossover_rate
+        self.memetic_steps = memetic_steps
+        self.tournament_size = tournament_size
+        # Amount of worker processes breeding children, defaults to amount of cores
+        self.processes = processes
+
+        # Every `section_interval` generations, optimally reassign all students to tutorial and practical groups
+        self.section_interval = section_interval
+
+        # Stop once score is within this relative distance of the lower bound on the score
+        self.optimality_gap = optimality_gap
+
+        # Called with generation and best score whenever the score is updated, eg. to report progress to a client
+        self.progress = progress
+
+        # Ids of activities to draw mutations from, eg. those affected by an input change. Defaults to all timeslots.
+        self.focus = focus
+
+        # Score vectors of schedules seen by this solver, so revisited schedules are not rescored
+        self.transpositions = TranspositionTable(transposition_size)
+
     def fitness(self, score: float | int):
         """Get fitness score of a result."""
         return 10000 / (1 + score)
@@ -66,15 +108,15 @@ class EvolutionSolver:
         show_progress=True,
         save_result=True,
         plot=False,
+        seed: int | None = None,
     ):
+        if self.genetic:
+            return self.solve_genetic(schedule_seed, i_max, show_progress, save_result, plot, seed)
+
         if i_max is None:
             i_max = self.max_generations
-
-        # If current solving process is a child of a multithreaded operation, take appropriate space in terminal
-        try:
-            process_id = multiprocessing.current_process()._identity[0]
-        except:
-            process_id = 0
+        process_id = self.process_id()
+        seed, rng = make_rng(seed)
 
         # Initialize population from (solved) prototype
         if schedule_seed is None:
@@ -83,13 +125,13 @@ class EvolutionSolver:
                 n=self.population_size,
                 show_progress=False,
                 multithreading=False,
+                seed=rng.getrandbits(64),
             )
         else:
-            assert Result(schedule_seed).is_solved, "Can only improve solved schedules."
-            self.population = [
-                Result(schedule_seed).deepcopy(self.students_input, self.courses_input, self.rooms_input)
-                for i in range(self.population_size)
-            ]
+            seed_result = Result(schedule_seed)
+            assert seed_result.is_solved, "Can only improve solved schedules."
+            # Forking is cheaper than rebuilding from input data
+            self.population = [seed_result.fork() for i in range(self.population_size)]
 
         # Sort population by score to pick best specimen
         population_sorted: list[Result] = Statistics.sort_objects(self.population, "score")  # type: ignore
@@ -97,8 +139,13 @@ class EvolutionSolver:
             self.students_input, self.courses_input, self.rooms_input
         )
 
-        # Save backup for repairment in case of errors
-        backup_edges = copy.deepcopy(current_best.schedule.edges)
+        # Record changes in a transaction, so invalid mutations can be reverted and the best valid solution restored.
+        # The best solution so far is the start of the journal, changes are committed whenever a better one is found.
+        if self_repair:
+            current_best.schedule.begin()
+
+        # Start mutation supplier afresh, it may have been used by an earlier run
+        self.mutation_supplier.reset(rng)
 
         # Initialize progress tracking variables
         best_score = None
@@ -111,43 +158,48 @@ class EvolutionSolver:
         # Each iteration a mutation is applied and score is checked
         pbar = tqdm(range(i_max), position=process_id, leave=False, disable=not show_progress)
         for i in pbar:
-            # Check if a perfect solution is found
-            if current_best.score == 0:
+            # Check if a provably (near) optimal solution is found
+            if current_best.optimality_gap <= self.optimality_gap:
                 break
 
-            # If required, save current best solution to memory
+            # If required, save current best solution: accept changes so far and start a new transaction
             if self_repair and self.fitness(current_best.score) > best_fitness and current_best.check_solved():
-                backup_edges = copy.deepcopy(current_best.schedule.edges)
+                current_best.schedule.commit()
+                current_best.schedule.begin()
                 best_score = current_best.score
                 best_fitness = self.fitness(best_score)
 
+            # Large move: section students of all tutorials and practicals, keeps solution valid
+            if self.section_interval and i > 0 and i % self.section_interval == 0:
+                section_students(current_best)
+                self.mutation_supplier.reset_mutations()
+                continue
+
             # Get suggestion for possible mutation
-            mutation: Mutation = self.mutation_supplier.suggest_mutation(current_best, iterations=i, i_max=i_max)
+            mutation: Mutation = self.mutation_supplier.suggest_mutation(
+                current_best, timeslots=self.focus_timeslots(current_best), iterations=i, i_max=i_max
+            )
 
             # Apply mutation
             mutation.apply()
 
-            # Check whether solution is still valid and an improvement, possibly replace it with last valid solution
+            # Check whether solution is still valid, else revert mutation
             if self_repair and not current_best.check_solved():
-                # If better, keep mutation, else revert
-                if mutation.inverse is not None:
-                    mutation.revert()
-                else:
-                    current_best = Result(
-                        Schedule(self.students_input, self.courses_input, self.rooms_input, backup_edges)
-                    )
+                mutation.revert()
                 continue
 
             # Clear memory of swaps because of new schedule conditions
             self.mutation_supplier.reset_mutations()
 
             # Save performance by only updating total score every 50 generations
-            if not self_repair and i % 50 == 0:
+            if i % 50 == 0:
                 # Describe progress
-                current_best.update_score()
+                self.update_score(current_best)
                 pbar.set_description(
                     f"{process_id}: {type(self).__name__} ({type(self.mutation_supplier).__name__}) (score: {current_best.score})"
                 )
+                if self.progress:
+                    self.progress(i, current_best.score)
 
             # Track progress
             generations = i
@@ -157,12 +209,164 @@ class EvolutionSolver:
             timestamps.append(time.time() - start_time)
         pbar.close()
 
+        if self_repair:
+            # Restore best valid solution if current solution is worse, by undoing all changes since it was found
+            self.update_score(current_best)
+            if best_score is not None and current_best.score > best_score:
+                current_best.schedule.rollback()
+                self.update_score(current_best)
+            current_best.schedule.commit()
+
+        current_best.seed = seed
+        self.finish(current_best, track_scores, timestamps, generations, save_result, plot)
+        return current_best
+
+    def update_score(self, result: Result):
+        """Update score of `result`, looked up in the transposition table if its schedule was scored before."""
+        result.update_score(self.transpositions.get(result.state_hash))
+        if result.state_hash not in self.transpositions:
+            self.transpositions.put(result.state_hash, result.score_vector)
+
+    def focus_timeslots(self, result: Result):
+        """Timeslots of activities in focus and free timeslots they can move to, or `None` to draw from all timeslots."""
+        if self.focus is None:
+            return None
+        activities = [result.schedule.activities[uid] for uid in self.focus]
+        timeslots = [timeslot for activity in activities for timeslot in activity.timeslots.values()]
+        return timeslots + [t for t in result.schedule.timeslots.values() if len(t.activities) == 0]
+
+    @staticmethod
+    def process_id():
+        """If current solving process is a child of a multithreaded operation, take appropriate space in terminal."""
+        try:
+            return multiprocessing.current_process()._identity[0]
+        except:
+            return 0
+
+    def select(self, population: list[tuple], rng=random):
+        """Tournament selection: return fittest of `tournament_size` randomly drawn individuals."""
+        contestants = rng.sample(population, min(self.tournament_size, len(population)))
+        return min(contestants, key=lambda individual: individual[0])
+
+    def solve_genetic(
+        self,
+        schedule_seed: Schedule | None = None,
+        i_max: int | None = None,
+        show_progress=True,
+        save_result=True,
+        plot=False,
+        seed: int | None = None,
+    ):
+        """Improve population by recombination. Children are bred and scored in parallel worker processes."""
+        if i_max is None:
+            i_max = self.max_generations
+        process_id = self.process_id()
+        seed, rng = make_rng(seed)
+
+        # Initial population, individuals are kept as tuples of (score, edges, score vector, hash) to cheaply send them to workers
+        self.population = generate_solutions(
+            Randomizer(self.students_input, self.courses_input, self.rooms_input, method=self.method),
+            n=self.population_size,
+            show_progress=False,
+            multithreading=False,
+            seed=rng.getrandbits(64),
+        )
+        if schedule_seed is not None:
+            seed_result = Result(schedule_seed)
+            assert seed_result.is_solved, "Can only improve solved schedules."
+            self.population[0] = seed_result.fork().compress()
+        score_matrix = self.population[0].score_matrix
+        lower_bound = self.population[0].lower_bound
+        population = [
+            (result.score, frozenset(result.schedule.edges), result.score_vector, result.state_hash)
+            for result in self.population
+        ]
+        population.sort(key=lambda individual: individual[0])
+
+        breeder_arguments = (
+            self.students_input,
+            self.courses_input,
+            self.rooms_input,
+            self.mutation_supplier,
+            self.memetic_steps,
+            self.crossover_rate,
+        )
+
+        # Daemonic processes (eg. solvers run by `generate_solutions`) can not have children, breed in this process instead
+        processes = self.processes or multiprocessing.cpu_count()
+        pool = None
+        if processes > 1 and not multiprocessing.current_process().daemon:
+            pool = multiprocessing.Pool(processes=processes, initializer=init_breeder, initargs=breeder_arguments)
+            map_function = pool.map
+        else:
+            init_breeder(*breeder_arguments)
+            map_function = map
+
+        # Initialize progress tracking variables
+        track_scores: list[float] = []
+        start_time = time.time()
+        timestamps = []
+        generations = 0
+
+        pbar = tqdm(range(i_max), position=process_id, leave=False, disable=not show_progress)
+        try:
+            for i in pbar:
+                # Check if a provably (near) optimal solution is found
+                if optimality_gap(population[0][0], lower_bound) <= self.optimality_gap:
+                    break
+
+                # Pick parents and seed each child, so breeding is independent of the process it runs in
+                parents = [
+                    (self.select(population, rng)[1], self.select(population, rng)[1], rng.getrandbits(32))
+                    for j in range(self.population_size)
+                ]
+                children = [child for child in map_function(breed, parents) if child is not None]
+
+                # Drop duplicates of individuals already in the population, they would crowd out diversity
+                hashes = {individual[3] for individual in population}
+                offspring = []
+                for edges, vector, state_hash in children:
+                    if state_hash not in hashes:
+                        hashes.add(state_hash)
+                        offspring.append((score_matrix.dot(vector), edges, vector, state_hash))
+
+                # Elitism: parents and children compete, fittest survive
+                population = sorted(population + offspring, key=lambda individual: individual[0])
+                population = population[: self.population_size]
+
+                pbar.set_description(
+                    f"{process_id}: {type(self).__name__} (genetic) (score: {population[0][0]}, offspring: {len(offspring)})"
+                )
+                if self.progress:
+                    self.progress(i, population[0][0])
+
+                # Track progress
+                generations = i
+                track_scores.append(population[0][0])
+                timestamps.append(time.time() - start_time)
+        finally:
+            pbar.close()
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        # Rebuild best individual from its edges
+        schedule = make_prototype(self.students_input, self.courses_input, self.rooms_input)
+        schedule.restore(population[0][1])
+        current_best = Result(schedule, seed=seed)
+
+        self.finish(current_best, track_scores, timestamps, generations, save_result, plot)
+        return current_best
+
+    def finish(self, current_best: Result, track_scores, timestamps, generations, save_result=True, plot=False):
+        """Report, save and plot results of solving process."""
         if self.verbose:
             # Output results to console
             print(
                 f"\nBest score: {current_best.score} \
                 \nIterations: {generations} \t solved: {current_best.check_solved()} \
-                \nScore vector: {current_best.score_vector}"
+                \nScore vector: {current_best.score_vector} \
+                \nLower bound: {current_best.lower_bound} \t optimality gap: {current_best.describe_gap()}"
             )
 
         if save_result:
@@ -171,26 +375,32 @@ class EvolutionSolver:
             current_best.update_score()
             score = current_best.score
 
-            arguments = copy.deepcopy(self.__dict__)
-            del arguments["population"]
-            del arguments["students_input"]
-            del arguments["rooms_input"]
-            del arguments["courses_input"]
+            # Input data, callbacks and lookup tables are no solve arguments, don't copy them
+            excluded = ("population", "students_input", "rooms_input", "courses_input", "progress", "transpositions")
+            arguments = copy.deepcopy({key: value for key, value in self.__dict__.items() if key not in excluded})
 
             setattr(current_best, "_solve_arguments", arguments)
-            dump_result(
+
+            # Dump in background, a copy of the result so the caller may change it meanwhile
+            snapshot = current_best.fork()
+            setattr(snapshot, "_solve_arguments", arguments)
+            writer = get_writer()
+            writer.submit(
+                dump_result,
                 [track_scores, timestamps],
                 f"output/genetic_{strategy_name}_score_{score}_scorestime_{generations}_",
             )
-            output_path = dump_result(current_best, f"output/genetic_{strategy_name}_{score}_{generations}_")
+            output = writer.submit(dump_result, snapshot, f"output/genetic_{strategy_name}_{score}_{generations}_")
             if self.verbose:
-                print(f"Saved at {output_path}")
+                output.add_done_callback(lambda future: print(f"Saved at {future.result()}"))
 
         if plot:
+            # Only import plotting library when required
+            import matplotlib.pyplot as plt
+
             # Show score over time/iterations
             plt.plot(timestamps, track_scores)
             plt.xlabel("Time (s)")
             plt.ylabel("Score")
             plt.show()
 
-        return current_best
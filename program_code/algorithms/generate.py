@@ -1,17 +1,48 @@
+import random
 import multiprocessing
 import warnings
+import numpy as np
 from tqdm import tqdm
 from ..classes import Schedule
 from ..helpers import pickle_cache
+from ..helpers.data import hashargs
 from ..classes.result import Result
 
+# Prototypes this process has built or loaded, by hash of input data. Oldest is forgotten when full.
+_prototypes: dict[str, Schedule] = {}
+PROTOTYPES_IN_MEMORY = 8
+
 
 @pickle_cache
-def make_prototype(students_input, courses_input, rooms_input):
+def build_prototype(students_input, courses_input, rooms_input):
     """Build prototype schedule from input data."""
     return Schedule(students_input, courses_input, rooms_input)
 
 
+def make_prototype(students_input, courses_input, rooms_input):
+    """Return unsolved schedule of input data. Prototypes are kept in memory, callers get a fork they may change."""
+    key = hashargs(students_input, courses_input, rooms_input)
+    if key not in _prototypes:
+        if len(_prototypes) >= PROTOTYPES_IN_MEMORY:
+            del _prototypes[next(iter(_prototypes))]
+        _prototypes[key] = build_prototype(students_input, courses_input, rooms_input)
+    return _prototypes[key].fork()
+
+
+def make_rng(seed: int | None = None):
+    """Return seed and random generator of a run. Without `seed` one is drawn, so the run can still be reproduced."""
+    if seed is None:
+        seed = random.getrandbits(64)
+    return seed, random.Random(seed)
+
+
+def derive_seeds(seed: int | None, n: int) -> list[int]:
+    """Seeds of `n` independent runs derived from master `seed`, the same for any process they run in."""
+    if seed is None:
+        seed = random.getrandbits(64)
+    return [int(child.generate_state(1, np.uint64)[0]) for child in np.random.SeedSequence(seed).spawn(n)]
+
+
 # Necessary to work around imap function <-> argument mapping
 def solver_wrapper(arguments):
     """Execute `solver.solve(schedule, **kwargs)` with `kwargs`."""
@@ -19,38 +50,51 @@ def solver_wrapper(arguments):
     return solver.solve(**kwargs)
 
 
-def generate_solutions(solver, n: int = 1, compress=True, show_progress=True, multithreading=True, **kwargs):
+def generate_solutions(
+    solver,
+    n: int = 1,
+    compress=True,
+    show_progress=True,
+    multithreading=True,
+    unique=False,
+    seed: int | None = None,
+    **kwargs,
+):
     """Generate `n` solutions for schedule.
 
     `compress`: compresses results during calculation. Saves memory, but not implemented for multithreading.
     `multithreading`: enables mapping processes to individual machine cores to utilise more performance.
+    `unique`: drop results with the same schedule as an earlier result, up to swapping equivalent rooms.
+    Fewer than `n` results may be returned.
+    `seed`: master seed, each run gets its own seed derived from it. Results are the same with or without multithreading.
     `kwargs`: possible arguments for `solver`.
     """
+    seeds = derive_seeds(seed, n)
 
     # If multithreading is not enabled, simply run a loop
     if not multithreading:
         results: list[Result] = []
-        for n in tqdm(range(n), "Solving schedules", disable=not show_progress or n == 1):
-            result: Result = solver.solve(**kwargs)
+        for run_seed in tqdm(seeds, "Solving schedules", disable=not show_progress or n == 1):
+            result: Result = solver.solve(seed=run_seed, **kwargs)
             if compress:
                 result.compress()
             results.append(result)
-        return results
+        return drop_duplicates(results) if unique else results
 
     if multithreading and compress:
         warnings.warn("Compression currently disabled for multithreading operations.")
 
     # Generate arguments for `solver` for all instances
-    solver_arguments = [(solver, kwargs) for i in range(n)]
+    solver_arguments = [(solver, {**kwargs, "seed": run_seed}) for run_seed in seeds]
 
     num_workers = multiprocessing.cpu_count()
     pool = multiprocessing.Pool(processes=num_workers, initargs=(multiprocessing.RLock(),), initializer=tqdm.set_lock)
 
     # Map jobs to cores and retrieve results
-    with pool as p:
+    try:
         results = list(
             tqdm(
-                p.imap(solver_wrapper, solver_arguments),
+                pool.imap(solver_wrapper, solver_arguments),
                 total=n,
                 desc="Solving schedules",
                 position=0,
@@ -58,4 +102,22 @@ def generate_solutions(solver, n: int = 1, compress=True, show_progress=True, mu
                 disable=not show_progress or n == 1,
             )
         )
+    finally:
+        # Let workers exit on their own instead of terminating them, so they flush their pending output
+        pool.close()
+        pool.join()
+
+    if unique:
+        results = drop_duplicates(results)
     return results
+
+
+def drop_duplicates(results: list[Result]):
+    """Keep first of results with the same schedule hash."""
+    hashes: set[int] = set()
+    unique_results = []
+    for result in results:
+        if result.state_hash not in hashes:
+            hashes.add(result.state_hash)
+            unique_results.append(result)
+    return unique_results
@@ -1,12 +1,13 @@
-import random
 import operator
 from tqdm import tqdm
 from typing import Callable
 from warnings import warn
 
 from program_code.algorithms.randomizer import Randomizer
-from .generate import make_prototype
+from .generate import make_prototype, make_rng
 from .solver import Solver
+from .rating import RatingMatrix
+from .sectioning import section_students
 
 from ..classes import *
 from ..classes.result import Result
@@ -45,19 +46,13 @@ class Greedy(Solver):
         """Assign students to the timeslots of the hoorcollege activities
         pre: schedule, list of activities (hoorcollege)
         """
-        # Get a list of all the students
-        aviable_student: list[Student] = list(schedule.students.values())
-
         # Go trough all HC activities
         for activity in activities_bound:
             # Get timeslot for the HC activity
             timeslots_linked = list(activity.timeslots.values())
-            # Go trough al students
-            for student in aviable_student:
-                # Check for every student if they have the Hc activity
-                if activity in student.activities.values():
-                    # Connect timeslot of activity to the student
-                    schedule.connect_nodes(student, timeslots_linked[0])
+            # Connect timeslot of activity to the students enrolled in the HC activity
+            for student in activity.students.values():
+                schedule.connect_nodes(student, timeslots_linked[0])
 
     def assign_students_wc_p(self, schedule: Schedule, activities_free: list[Activity]):
         """Assign students to the timeslots of the werkcollege and practicum activities without using
@@ -71,12 +66,8 @@ class Greedy(Solver):
 
         for activity in activities_free:
 
-            # Build index on students that don't yet have a timeslot assigned for this activity
-            if not hasattr(activity, "_unassigned_students"):
-                setattr(activity, "_unassigned_students", set(activity.students.values()))
-
             # Get the students and timeslots linked to the activity
-            available_students_linked = list(getattr(activity, "_unassigned_students"))
+            available_students_linked = list(activity.students.values())
             timeslots_linked = list(activity.timeslots.values())
 
             # Go trough al students
@@ -91,10 +82,10 @@ class Greedy(Solver):
                     # Current activity does not have a timeslot that allows for no course conflicts
                     if len(timeslot_list) == 0:
                         # Pick a random timeslot
-                        timeslot = random.choice(timeslots_linked)
+                        timeslot = self.rng.choice(timeslots_linked)
                     else:
                         # Pick a random timeslot which has no course conflicts for student
-                        timeslot = random.choice(timeslot_list)
+                        timeslot = self.rng.choice(timeslot_list)
 
                     # Skip if timeslot is already linked to student
                     edge = (student.id, timeslot.id)
@@ -121,6 +112,10 @@ class Greedy(Solver):
         # Uses tuples of (activity.id, student.id)
         activity_students_assigned: set[tuple[int, int]] = set()
 
+        # Index per activity of students that don't yet have a timeslot assigned for it, by id.
+        # Dicts keep their order, unlike sets of nodes which are ordered by memory address, so runs can be reproduced.
+        unassigned_students: dict[int, dict[int, Student]] = {}
+
         # Try making connections for i_max iterations
         edges = set()
         for i in tqdm(range(i_max), disable=not self.verbose, desc="Trying connections:"):
@@ -129,19 +124,22 @@ class Greedy(Solver):
                 return Result(schedule=schedule, iterations=i, solved=True)
 
             # Take random unfinished activity
-            activity = random.choice(available_activities)
+            activity = self.rng.choice(available_activities)
 
             # Build index on students that don't yet have a timeslot assigned for this activity
-            if not hasattr(activity, "_unassigned_students"):
-                setattr(activity, "_unassigned_students", set(activity.students.values()))
+            if activity.id not in unassigned_students:
+                unassigned_students[activity.id] = dict(activity.students)
 
             # Get the students linked to the current activity
-            available_students_linked = list(getattr(activity, "_unassigned_students"))
+            available_students_linked = list(unassigned_students[activity.id].values())
             timeslots_linked = list(activity.timeslots.values())
 
             # Pick student that does not have a timeslot for this activity
             draw_student = Randomizer.draw_uniform(
-                [activity], available_students_linked, lambda a, s: s in getattr(a, "_unassigned_students")  # type: ignore
+                [activity],
+                available_students_linked,
+                lambda a, s: s.id in unassigned_students[a.id],  # type: ignore
+                rng=self.rng,
             )
 
             # No available students means this activity has been assigned to all its students, it's finished.
@@ -151,7 +149,7 @@ class Greedy(Solver):
                     if activity == test_activity:
                         available_activities.pop(index)
                 # Remove index
-                delattr(activity, "_unassigned_students")
+                del unassigned_students[activity.id]
                 continue
             student: Student = draw_student[1]  # type: ignore
 
@@ -165,10 +163,10 @@ class Greedy(Solver):
             # Activity does not have timeslot that causes no course conflict for the student
             if len(timeslot_list) == 0:
                 # Pick a random timeslot
-                timeslot = random.choice(timeslots_linked)
+                timeslot = self.rng.choice(timeslots_linked)
             else:
                 # Pick a timeslot that causes no course conflict
-                timeslot = random.choice(timeslot_list)
+                timeslot = self.rng.choice(timeslot_list)
 
             # Skip if timeslot is already linked to student
             edge = (student.id, timeslot.id)
@@ -181,7 +179,7 @@ class Greedy(Solver):
             schedule.connect_nodes(student, timeslot)
             edges.add(edge)
             # Remove student from index of unassigned students for this activity
-            getattr(activity, "_unassigned_students").remove(student)
+            del unassigned_students[activity.id][student.id]
             activity_students_assigned.add((activity.id, student.id))
         activities_finished = len(available_activities) == 0
 
@@ -200,10 +198,11 @@ class Greedy(Solver):
         pre: schedule, list of activities (werkcollege and practicum)
         post: schedule
         """
-        # Get a list of timeslots and students
-        available_timeslots: list[Timeslot] = list(schedule.timeslots.values())
-        aviable_student: list[Student] = list(schedule.students.values())
-        rating = {}
+        # Students are only booked for hoorcolleges at this stage, so ratings don't change while assigning timeslots
+        rating = RatingMatrix(schedule, aviable_activity)
+
+        # Timeslots without activity
+        free_timeslots: list[Timeslot] = [t for t in schedule.timeslots.values() if not self.node_has_activity(t)]
 
         # Go trough all activities in the activity list (only Wc and P)
         for activity in aviable_activity:
@@ -211,44 +210,28 @@ class Greedy(Solver):
             activity_enrolments = activity.enrolled_students
             # Set total capacity on 0
             total_capacity = 0
-            # Go trough all timeslots
-            for timeslot in available_timeslots:
-                # Skip timeslot if it already has activity
-                if self.node_has_activity(timeslot):
-                    continue
-                # Set rate to 0
-                rate = 0
-                # Go trough all students
-                for student in aviable_student:
-                    # Check if the students has the activity
-                    if activity in student.activities.values():
-                        # Check if the student already has activity in the current period
-                        if self.node_has_period(student, timeslot) == False:
-                            # If studens has no activity in current period increase rating
-                            rate += 1
-                # Save the total rating for every timeslot
-                rating[timeslot] = rate
-
-            # Get the max rated timeslots
-            max_val = max(rating.values())
-            max_keys = [k for k in rating if rating[k] == max_val]
+
+            # Order free timeslots from highest to lowest rating, shuffle timeslots with equal rating
+            rates = rating.rate(activity, free_timeslots)
+            order = sorted(range(len(free_timeslots)), key=lambda i: (-rates[i], self.rng.random()))
+            candidates = [free_timeslots[i] for i in order]
 
             # Keep adding activities until the total_capacity is higher then the enrolment
-            while total_capacity < activity_enrolments:
-                # Randomly chose on of the highest rated timeslots
-                highest_timeslots: Timeslot = random.choice(max_keys)
-                # Remove the selected timeslot from the list and dictionary
-                max_keys.remove(highest_timeslots)
-                del rating[highest_timeslots]
+            chosen: set[int] = set()
+            for highest_timeslot in candidates:
+                if total_capacity >= activity_enrolments:
+                    break
                 # Connect the nodes of activity and timeslot
-                schedule.connect_nodes(activity, highest_timeslots)
-                # Change total capacity
-                if activity.capacity_input != None:
-                    total_capacity += min(activity.capacity_input, highest_timeslots.capacity)
-                # If the lenght of the list with the highest timeslot is 0 make new list
-                if len(max_keys) == 0:
-                    max_val = max(rating.values())
-                    max_keys = [k for k in rating if rating[k] == max_val]
+                schedule.connect_nodes(activity, highest_timeslot)
+                chosen.add(highest_timeslot.id)
+                # Change total capacity, capacity of timeslot is the minimum of room and activity capacity
+                total_capacity += highest_timeslot.capacity
+
+            if total_capacity < activity_enrolments and self.verbose:
+                warn(f"ERROR: ran out of timeslots for {activity}.")
+
+            # Remove the selected timeslots from the free timeslots
+            free_timeslots = [t for t in free_timeslots if t.id not in chosen]
 
         return Result(schedule=schedule, solved=True)
 
@@ -265,11 +248,14 @@ class Greedy(Solver):
 
         return self.assign_students_wc_p_uniform(schedule, activities_free)
 
-    def solve(self, schedule: Schedule | None = None, i_max: int | None = None, method=None, strict=True):
+    def solve(
+        self, schedule: Schedule | None = None, i_max: int | None = None, method=None, strict=True, seed=None
+    ):
         """Solve function for the algorithm
         pre: schedule
         post: schedule (solved)
         """
+        seed, self.rng = make_rng(seed)
         if schedule is None:
             schedule = make_prototype(self.students_input, self.courses_input, self.rooms_input)
         if i_max is None:
@@ -280,4 +266,8 @@ class Greedy(Solver):
                 guess_required_edges += activity.enrolled_students
             i_max = max(guess_required_edges, i_min)
 
-        return self.greedy_random(schedule, i_max)  # type: ignore
+        result = self.greedy_random(schedule, i_max)  # type: ignore
+        if self.section:
+            section_students(result)
+        result.seed = seed
+        return result
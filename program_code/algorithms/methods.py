@@ -0,0 +1,124 @@
+import warnings
+from .randomizer import Randomizer
+from .greedy import Greedy
+from .coloring import GraphColoring
+from .evolutionsolver import EvolutionSolver
+from .mutationsuppliers import HillClimber, SimulatedAnnealing, DirectedSA
+from .decomposition import Decomposition
+from .cooling import AdaptiveCooling
+
+# Methods that can be chosen to solve a schedule with
+METHODS = (
+    "baseline",
+    "greedy",
+    "coloring",
+    "min_overlap",
+    "min_gaps",
+    "min_gaps_overlap",
+    "hillclimber",
+    "simulated_annealing",
+    "adaptive_sa",
+    "directed_sa",
+    "genetic",
+    "decomposition",
+)
+
+
+def make_solver(
+    method: str,
+    data_arguments: dict,
+    section: bool = False,
+    ruin_rate: float = 0,
+    optimality_gap: float = 0,
+):
+    """Initialize solver for `method`. Returns solver, and whether its solutions are best generated
+    in parallel (multithreading) or compressed while generating."""
+    do_multithreading = False
+    do_compression = False
+
+    # Optimally reassign students to tutorial and practical groups: after construction, or as a large move during evolution
+    section_interval = 1000 if section else None
+
+    # Initialize solver with correct strategy
+    match method:
+        case "baseline":
+            # Baseline algorithm, most random
+            do_compression = True
+            solver = Randomizer(**data_arguments, method="uniform", section=section)
+        case "greedy":
+            # Greedy algorithm
+            do_multithreading = True
+            solver = Greedy(**data_arguments, section=section)
+        case "coloring":
+            # Colour activities with moments in order of conflicts in course co-enrolment graph (DSatur)
+            do_compression = True
+            solver = GraphColoring(**data_arguments, section=section)
+        case "min_overlap":
+            # Improvement on baseline with bias towards least course conflicts
+            do_compression = True
+            solver = Randomizer(**data_arguments, method="min_overlap", section=section)
+        case "min_gaps":
+            # Improvement on baseline with bias towards least gap hours
+            do_compression = True
+            solver = Randomizer(**data_arguments, method="min_gaps", section=section)
+        case "min_gaps_overlap":
+            # Improvement on baseline with bias towards least gap hours, then least course conflicts
+            do_compression = True
+            solver = Randomizer(**data_arguments, method="min_gaps_overlap", section=section)
+        case "hillclimber":
+            # Population based solver, only helpful mutations
+            do_multithreading = True
+            solver = EvolutionSolver(
+                **data_arguments,
+                mutation_supplier=HillClimber(ruin_rate=ruin_rate),
+                section_interval=section_interval,
+                optimality_gap=optimality_gap,
+            )
+        case "simulated_annealing":
+            # Population based solver, score based mutation acceptance
+            do_multithreading = True
+            solver = EvolutionSolver(
+                **data_arguments,
+                mutation_supplier=SimulatedAnnealing(ruin_rate=ruin_rate),
+                section_interval=section_interval,
+                optimality_gap=optimality_gap,
+            )
+        case "adaptive_sa":
+            # Simulated annealing with temperature controlled by acceptance rate, calibrated to the instance
+            do_multithreading = True
+            solver = EvolutionSolver(
+                **data_arguments,
+                mutation_supplier=SimulatedAnnealing(ruin_rate=ruin_rate, temperature_schedule=AdaptiveCooling()),
+                section_interval=section_interval,
+                optimality_gap=optimality_gap,
+            )
+        case "directed_sa":
+            # Population based solver, bias towards mutating highest conflict areas
+            do_multithreading = True
+            warnings.warn("Directed Simulated Annealing not yet fully implemented!")
+            solver = EvolutionSolver(
+                **data_arguments,
+                mutation_supplier=DirectedSA(ruin_rate=ruin_rate),
+                section_interval=section_interval,
+                optimality_gap=optimality_gap,
+            )
+        case "genetic":
+            # Population based solver, recombines population and refines children with hillclimber.
+            # Parallelises breeding itself, so solutions are generated one at a time.
+            solver = EvolutionSolver(
+                **data_arguments,
+                population_size=20,
+                max_generations=100,
+                mutation_supplier=HillClimber(),
+                genetic=True,
+                memetic_steps=20,
+                optimality_gap=optimality_gap,
+            )
+        case "decomposition":
+            # Anneals clusters of co-enrolled courses in parallel around fixed lectures, then polishes the merge.
+            # Parallelises over clusters itself, so solutions are generated one at a time.
+            solver = Decomposition(**data_arguments, mutation_supplier=SimulatedAnnealing(ruin_rate=ruin_rate))
+        case _:
+            raise ValueError("Invalid method chosen.")
+
+    return solver, do_multithreading, do_compression
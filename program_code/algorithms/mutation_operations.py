@@ -12,6 +12,8 @@ from program_code.algorithms.randomizer import Randomizer
 from program_code.classes.result import Result
 from ..classes import NodeSC, Node, Schedule, Timeslot, Student, Activity
 from .randomizer import Randomizer
+from .construction import ConstructionEngine, policy_tiers
+from .crossover import course_moment_free
 import copy
 
 
@@ -25,19 +27,30 @@ def fast_swap(node1: Timeslot, node2: Timeslot):
                 "day": node1.day,
                 "period": node1.period,
                 "moment": node1.moment,
+                "moment_index": node1.moment_index,
             }
             meta2 = {
                 "id": node2.id,
                 "day": node2.day,
                 "period": node2.period,
                 "moment": node2.moment,
+                "moment_index": node2.moment_index,
             }
         case _:
             raise NotImplementedError
 
+    # Booked moments of neighbors change along with the moments of the timeslots
+    Schedule.index_timeslot_moment(node1, -1)
+    Schedule.index_timeslot_moment(node2, -1)
+
     # Swap metadata
-    node1.__dict__.update(meta2)
-    node2.__dict__.update(meta1)
+    for field, value in meta2.items():
+        setattr(node1, field, value)
+    for field, value in meta1.items():
+        setattr(node2, field, value)
+
+    Schedule.index_timeslot_moment(node1, 1)
+    Schedule.index_timeslot_moment(node2, 1)
     return node1, node2
 
 
@@ -126,9 +139,8 @@ def allow_swap_timeslot(result, timeslot1: Timeslot, timeslot2: Timeslot, score_
                         return False
             else:
                 # Activity 1 is unbound, it may not coincide with lectures of same course
-                for bound_activity1 in activity1.course.bound_activities.values():
-                    if Statistics.node_has_period(bound_activity1, timeslot2):
-                        return False
+                if activity1.course.bound_occupancy.has(timeslot2.moment_index):
+                    return False
         for activity2 in timeslot2.activities.values():
             if activity2.max_timeslots:
                 # Activity 2 is bound, it may not coincide with any activity of same course
@@ -137,9 +149,8 @@ def allow_swap_timeslot(result, timeslot1: Timeslot, timeslot2: Timeslot, score_
                         return False
             else:
                 # Activity 2 is unbound, it may not coincide with lectures of same course
-                for bound_activity2 in activity2.course.bound_activities.values():
-                    if Statistics.node_has_period(bound_activity2, timeslot1):
-                        return False
+                if activity2.course.bound_occupancy.has(timeslot1.moment_index):
+                    return False
 
     if score_ceiling is None:
         if timeslot1.room.capacity == timeslot2.room.capacity:
@@ -159,6 +170,7 @@ def draw_valid_timeslot_swap(
     timeslots: list[Timeslot],
     tried_swaps: set | None = None,
     ceiling: int | float | None = None,
+    rng=random,
 ):
     """Draw a valid swap. Finds swap that meets requirements of `allow_swap_timeslot`."""
     draw = Randomizer.draw_uniform(
@@ -167,6 +179,7 @@ def draw_valid_timeslot_swap(
         lambda t1, t2: allow_swap_timeslot(result, t1, t2, score_ceiling=ceiling),
         return_value=True,
         _combination_set=tried_swaps,
+        rng=rng,
     )
     if not draw:
         return None
@@ -224,14 +237,15 @@ def move_score_student(result: Result, student: Student, timeslot1: Timeslot, ti
         # Virtually emptied evening timeslot, remove penalty
         current_sub_score += result.score_matrix.dot([1, 0, 0, 0, 0])
 
-    # Pretend to swap
-    move_node(result.schedule, student, timeslot1, timeslot2)
+    # Pretend to swap, temporary changes are not recorded in transaction
+    with result.schedule.untracked():
+        move_node(result.schedule, student, timeslot1, timeslot2)
 
-    # Get projected score
-    projected_sub_score = result.sub_score(timeslot1) + result.sub_score(timeslot2)
+        # Get projected score
+        projected_sub_score = result.sub_score(timeslot1) + result.sub_score(timeslot2)
 
-    # Revert move
-    move_node(result.schedule, student, timeslot2, timeslot1)
+        # Revert move
+        move_node(result.schedule, student, timeslot2, timeslot1)
 
     # Calculate difference
     diff_sub_score = projected_sub_score - current_sub_score
@@ -265,33 +279,39 @@ def draw_valid_student_move(
     timeslots: list[Timeslot],
     tried_swaps: set | None = None,
     ceiling: int | float | None = None,
+    rng=random,
+    _attempts: int = 100,
 ):
-    """Draw a valid move of node `student` from `timeslot1` to `timeslot2`."""
-    timeslot1 = random.choice(timeslots)
-    # If current timeslot has no students to move, retry
-    if timeslot1.enrolled_students == 0:
-        return draw_valid_student_move(result, timeslots, tried_swaps)
-
-    # Assuming hard constraint timeslot only has 1 activity
-    activity: Activity = list(timeslot1.activities.values())[0]
-
-    # Check timeslot2 has enough capacity
-    draw = Randomizer.draw_uniform(
-        list(timeslot1.students.values()),
-        list(activity.timeslots.values()),
-        lambda s, t2: allow_move_student(result, s, timeslot1, t2, ceiling),  # type: ignore
-        return_value=True,
-        symmetric_condition=False,
-        _combination_set=tried_swaps,
-    )
+    """Draw a valid move of node `student` from `timeslot1` to `timeslot2`.
+    Returns `None` if no valid move is found in `_attempts` draws, eg. when `timeslots` are few."""
+    for attempt in range(_attempts):
+        timeslot1 = rng.choice(timeslots)
+        # If current timeslot has no students to move, retry
+        if timeslot1.enrolled_students == 0:
+            continue
 
-    # Retry
-    if not draw:
-        return draw_valid_student_move(result, timeslots, tried_swaps, ceiling)
+        # Assuming hard constraint timeslot only has 1 activity
+        activity: Activity = list(timeslot1.activities.values())[0]
+
+        # Check timeslot2 has enough capacity
+        draw = Randomizer.draw_uniform(
+            list(timeslot1.students.values()),
+            list(activity.timeslots.values()),
+            lambda s, t2: allow_move_student(result, s, timeslot1, t2, ceiling),  # type: ignore
+            return_value=True,
+            symmetric_condition=False,
+            _combination_set=tried_swaps,
+            rng=rng,
+        )
+
+        # Retry
+        if not draw:
+            continue
 
-    # Succesful
-    student, timeslot2, score = draw  # type: ignore
-    return (student, timeslot1, timeslot2), score
+        # Succesful
+        student, timeslot2, score = draw  # type: ignore
+        return (student, timeslot1, timeslot2), score
+    return None
 
 
 def swap_students_timeslots(
@@ -319,14 +339,15 @@ def swap_score_student(
     # Get current score
     current_sub_score = result.sub_score(timeslot1) + result.sub_score(timeslot2)
 
-    # Try swap
-    swap_students_timeslots(result.schedule, student1, student2, timeslot1, timeslot2)
+    # Try swap, temporary changes are not recorded in transaction
+    with result.schedule.untracked():
+        swap_students_timeslots(result.schedule, student1, student2, timeslot1, timeslot2)
 
-    # Calculate projected score
-    projected_sub_score = result.sub_score(timeslot1) + result.sub_score(timeslot2)
+        # Calculate projected score
+        projected_sub_score = result.sub_score(timeslot1) + result.sub_score(timeslot2)
 
-    # Revert swap
-    swap_students_timeslots(result.schedule, student1, student2, timeslot2, timeslot1)
+        # Revert swap
+        swap_students_timeslots(result.schedule, student1, student2, timeslot2, timeslot1)
 
     # Calculate difference
     diff_sub_score = projected_sub_score - current_sub_score
@@ -365,35 +386,153 @@ def draw_valid_student_swap(
     timeslots: list[Timeslot],
     tried_swaps: set | None = None,
     ceiling: int | float | None = None,
+    rng=random,
+    _attempts: int = 100,
 ):
-    """Draw a valid swap of two students."""
-    timeslot1 = random.choice(timeslots)
+    """Draw a valid swap of two students.
+    Returns `None` if no valid swap is found in `_attempts` draws, eg. when `timeslots` are few."""
+    for attempt in range(_attempts):
+        timeslot1 = rng.choice(timeslots)
+        # If current timeslot has no students to swap (eg. it has no activity), retry
+        if timeslot1.enrolled_students == 0:
+            continue
+
+        # Assuming hard constraint timeslot only has 1 activity
+        activity: Activity = list(timeslot1.activities.values())[0]
 
-    # Assuming hard constraint timeslot only has 1 activity
-    activity: Activity = list(timeslot1.activities.values())[0]
+        # Check wether another timeslot for activity is available
+        if len(activity.timeslots) == 1:
+            continue
 
-    # Check wether another timeslot for activity and a student for swap are available
-    if activity.timeslots.values() == 1 or timeslot1.enrolled_students == 0:
-        return draw_valid_student_swap(result, timeslots, tried_swaps, ceiling)
+        # Pick a second timeslot to swap students with
+        timeslot2 = rng.choice(list(activity.timeslots.values()))
+        if timeslot2 is timeslot1:
+            continue
 
-    # Pick a second timeslot to swap students with
-    timeslot2 = random.choice(list(activity.timeslots.values()))
-    if timeslot2 is timeslot1:
-        return draw_valid_student_swap(result, timeslots, tried_swaps, ceiling)
+        # Find students available for swap
+        draw = Randomizer.draw_uniform(
+            list(timeslot1.students.values()),
+            list(timeslot2.students.values()),
+            lambda s1, s2: allow_swap_student(result, s1, s2, timeslot1, timeslot2, ceiling),  # type: ignore
+            return_value=True,
+            _combination_set=tried_swaps,
+            rng=rng,
+        )
+
+        # Retry
+        if not draw:
+            continue
 
-    # Find students available for swap
-    draw = Randomizer.draw_uniform(
-        list(timeslot1.students.values()),
-        list(timeslot2.students.values()),
-        lambda s1, s2: allow_swap_student(result, s1, s2, timeslot1, timeslot2, ceiling),  # type: ignore
-        return_value=True,
-        _combination_set=tried_swaps,
-    )
+        # Succesful
+        student1, student2, score = draw  # type: ignore
+        return (student1, student2, timeslot1, timeslot2), score
+    return None
+
+
+def ruin_cluster(result: Result, timeslot: Timeslot, kind: str, scope: set[int] | None = None):
+    """Return timeslots with an activity in cluster of `timeslot`: its day, its room, or the course of its activity.
+    With `scope`, only timeslots with an id in `scope`."""
+    match kind:
+        case "day":
+            cluster = [t for t in result.schedule.timeslots.values() if t.day == timeslot.day]
+        case "room":
+            cluster = list(timeslot.room.timeslots.values())
+        case "course":
+            course = list(timeslot.activities.values())[0].course
+            cluster = [t for activity in course.activities.values() for t in activity.timeslots.values()]
+        case _:
+            raise ValueError(f"Unknown cluster {kind}")
+    return [t for t in cluster if len(t.activities) > 0 and (scope is None or t.id in scope)]
 
-    # Retry
-    if not draw:
-        return draw_valid_student_swap(result, timeslots, tried_swaps, ceiling)
 
-    # Succesful
-    student1, student2, score = draw  # type: ignore
-    return (student1, student2, timeslot1, timeslot2), score
+def cluster_sub_score(result: Result, students: list[Student], timeslots: list[Timeslot]):
+    """Score of soft constraints of `students` and evening bookings of `timeslots`."""
+    evening_bookings = sum(timeslot.period == 4 and timeslot.enrolled_students > 0 for timeslot in timeslots)
+    return sum(result.sub_score(student) for student in students) + result.score_matrix[0] * evening_bookings
+
+
+def recreate_activity(result: Result, activity: Activity, size: int, timeslots: list[Timeslot], rng=random):
+    """Place group of `size` students of `activity` in the free timeslot of `timeslots` least of its students booked."""
+    candidates = [
+        timeslot
+        for timeslot in timeslots
+        if result.can_assign_timeslot_activity(timeslot, activity)
+        and (not activity.max_timeslots or course_moment_free(activity, timeslot))
+    ]
+    if len(candidates) == 0:
+        return False
+
+    def cost(timeslot: Timeslot):
+        # Students of activity already booked at moment, evening penalty, and rooms that are too small
+        busy = sum(student.occupancy.has(timeslot.moment_index) for student in activity.students.values())
+        return (timeslot.room.capacity < size, busy + result.score_matrix[0] * (timeslot.period == 4), rng.random())
+
+    result.schedule.connect_nodes(activity, min(candidates, key=cost))
+    return True
+
+
+def ruin_recreate(result: Result, cluster: list[Timeslot], rng=random, scope: set[int] | None = None):
+    """Remove activities and students from `cluster` and rebuild them with the constructive policies.
+    With `scope`, activities are only placed in timeslots with an id in `scope`.
+    Returns whether all students could be assigned again."""
+    schedule = result.schedule
+
+    # Ruin: remember groups of activities, then detach everything
+    groups = [(list(t.activities.values())[0], t.enrolled_students) for t in cluster]
+    for timeslot in cluster:
+        for student in list(timeslot.students.values()):
+            schedule.disconnect_nodes(student, timeslot)
+        for activity in list(timeslot.activities.values()):
+            schedule.disconnect_nodes(activity, timeslot)
+
+    # Recreate: lectures first since they need the largest rooms, then largest groups
+    groups.sort(key=lambda group: (not group[0].max_timeslots, -group[1], rng.random()))
+    free_timeslots = [
+        t for t in schedule.timeslots.values() if len(t.activities) == 0 and (scope is None or t.id in scope)
+    ]
+    for activity, size in groups:
+        if not recreate_activity(result, activity, size, free_timeslots, rng):
+            return False
+
+    # Assign students that lost their timeslot
+    activities = list({activity.id: activity for activity, size in groups}.values())
+    engine = ConstructionEngine(schedule, activities, policy_tiers(result, "min_gaps_overlap"), rng)
+    engine.run()
+    return engine.finished
+
+
+def draw_ruin_recreate(
+    result: Result,
+    timeslots: list[Timeslot],
+    tried_mutations: set | None = None,
+    ceiling: int | float | None = None,
+    rng=random,
+    _attempts: int = 10,
+):
+    """Draw a ruin and recreate of a cluster around a random timeslot of `timeslots`, within `timeslots`.
+
+    The cluster is rebuilt on trial to calculate the score difference, which only considers affected students.
+    Returns the recorded edge changes, so the mutation applies exactly the scored rebuild."""
+    # Mutations restricted to part of the schedule must not move activities out of it
+    scope = None if len(timeslots) == len(result.schedule.timeslots) else {t.id for t in timeslots}
+    for attempt in range(_attempts):
+        timeslot = rng.choice(timeslots)
+        if len(timeslot.activities) == 0:
+            continue
+        cluster = ruin_cluster(result, timeslot, rng.choice(["day", "room", "course"]), scope)
+
+        # Affected students, and evening timeslots that may be taken or freed
+        students = list({student.id: student for t in cluster for student in t.students.values()}.values())
+        evenings = [t for t in result.schedule.timeslots.values() if t.period == 4]
+        current_sub_score = cluster_sub_score(result, students, evenings)
+
+        with result.schedule.trial() as changes:
+            valid = ruin_recreate(result, cluster, rng, scope)
+            projected_sub_score = cluster_sub_score(result, students, evenings)
+
+        if valid:
+            return (changes,), projected_sub_score - current_sub_score
+
+    # No cluster could be rebuilt validly: mutation without changes that is never worth applying
+    return ([],), float("inf")
+
@@ -7,16 +7,19 @@ Course: Algoritmen en Heuristieken 2023
 """
 
 
+import random
 from typing import Callable
 
 from program_code.algorithms.mutation_operations import (
     draw_valid_student_move,
     draw_valid_student_swap,
     draw_valid_timeslot_swap,
+    draw_ruin_recreate,
     move_node,
     swap_neighbors,
     swap_students_timeslots,
 )
+from ..classes import Schedule
 from ..classes.result import Result
 
 
@@ -33,6 +36,7 @@ class Mutation:
         tried_mutations: set | None = None,
         arguments: dict | None = None,
         inverse: Callable | None = None,
+        rng=random,
     ):
         self.type = action.__name__
         # Mutation to apply
@@ -42,26 +46,37 @@ class Mutation:
         self.result = result
         # Arguments for mutation
         self.arguments = arguments
+        # Position in journal of schedule transaction before applying mutation, used for reverting
+        self.journal_position: int | None = None
 
         # Draw available mutation
-        draw = drawer(result, targets, tried_mutations, ceiling)
+        draw = drawer(result, targets, tried_mutations, ceiling, rng)
         if draw:
             self.subjects, self.score = draw
+        else:
+            # No valid mutation among targets, never worth applying
+            self.subjects, self.score = (), float("inf")
 
     def apply(self):
         """Apply mutation to schedule."""
+        # If a transaction is active, remember where this mutation starts so it can be reverted exactly
+        self.journal_position = self.result.schedule.journal_position
+
         if self.arguments:
             return self.action(self.result.schedule, *self.subjects, **self.arguments)
         return self.action(self.result.schedule, *self.subjects)
 
     def revert(self):
-        """Revert mutation."""
+        """Revert mutation. Uses `inverse` if given, else rolls back the changes recorded in the schedule transaction."""
         if self.inverse:
             if self.arguments:
                 return self.inverse(self.result.schedule, *self.subjects, **self.arguments)
             return self.inverse(self.result.schedule, *self.subjects)
 
-        raise NotImplementedError
+        if self.journal_position is not None:
+            return self.result.schedule.rollback(self.journal_position)
+
+        raise NotImplementedError("Can only revert mutations applied during a schedule transaction.")
 
 
 class MoveStudent(Mutation):
@@ -73,8 +88,9 @@ class MoveStudent(Mutation):
         targets: list,
         ceiling: int | None = None,
         tried_mutations: set | None = None,
+        rng=random,
     ):
-        super().__init__(move_node, draw_valid_student_move, result, targets, ceiling, tried_mutations)
+        super().__init__(move_node, draw_valid_student_move, result, targets, ceiling, tried_mutations, rng=rng)
 
 
 class SwapStudents(Mutation):
@@ -88,6 +104,7 @@ class SwapStudents(Mutation):
         tried_mutations: set | None = None,
         arguments: dict | None = None,
         inverse: Callable | None = None,
+        rng=random,
     ):
         super().__init__(
             swap_students_timeslots,
@@ -98,6 +115,7 @@ class SwapStudents(Mutation):
             tried_mutations,
             arguments,
             inverse,
+            rng,
         )
 
 
@@ -110,7 +128,30 @@ class SwapTimeslots(Mutation):
         targets: list,
         ceiling: int | None = None,
         tried_mutations: set | None = None,
+        rng=random,
     ):
         super().__init__(
-            swap_neighbors, draw_valid_timeslot_swap, result, targets, ceiling, tried_mutations, {"skip": "Room"}
+            swap_neighbors,
+            draw_valid_timeslot_swap,
+            result,
+            targets,
+            ceiling,
+            tried_mutations,
+            {"skip": "Room"},
+            rng=rng,
         )
+
+
+class RuinRecreate(Mutation):
+    """Large neighbourhood mutation: removes all assignments in a day, room or course cluster and rebuilds them."""
+
+    def __init__(
+        self,
+        result: Result,
+        targets: list,
+        ceiling: int | None = None,
+        tried_mutations: set | None = None,
+        rng=random,
+    ):
+        super().__init__(Schedule.replay, draw_ruin_recreate, result, targets, ceiling, tried_mutations, rng=rng)
+
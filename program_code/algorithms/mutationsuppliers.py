@@ -13,7 +13,8 @@ import random
 import numpy as np
 from .randomizer import Randomizer
 from .statistics import Statistics
-from .mutations import MoveStudent, Mutation, SwapStudents, SwapTimeslots
+from .mutations import MoveStudent, Mutation, RuinRecreate, SwapStudents, SwapTimeslots
+from .cooling import TemperatureSchedule
 from ..classes import Timeslot
 from ..classes.result import Result
 
@@ -22,7 +23,8 @@ class MutationSupplier(Statistics):
     """Mutation supplier parent class. Suggests mutations.
 
     Increasing `score_scope` increases the amount of mutations to try out.
-    `ceiling` defines the maximum score difference a mutation is allowed to bring."""
+    `ceiling` defines the maximum score difference a mutation is allowed to bring.
+    `ruin_rate` is the chance a ruin and recreate of a cluster is offered alongside the small mutations."""
 
     def __init__(
         self,
@@ -30,23 +32,31 @@ class MutationSupplier(Statistics):
         ceiling=0,
         tried_timeslot_swaps: set[tuple[int, int]] = set(),
         swap_scores_memory: dict[tuple[Timeslot, Timeslot], int | float] = {},
+        ruin_rate: float = 0,
     ):
         # Score scope is how many timeslots to look at when scoring a swap
         self.score_scope = score_scope
         self.ceiling = ceiling
         self.tried_timeslot_swaps = tried_timeslot_swaps
         self.swap_scores_memory = swap_scores_memory
+        self.ruin_rate = ruin_rate
+        # Random generator of current run, set by `reset`
+        self.rng = random.Random()
 
     def find_mutations(self, result: Result, timeslots: list[Timeslot]) -> list[Mutation]:
         """Find available mutations for each type of mutation"""
-        return [
+        mutations = [
             # Move single student
-            MoveStudent(result, timeslots, self.ceiling, self.tried_timeslot_swaps),
+            MoveStudent(result, timeslots, self.ceiling, self.tried_timeslot_swaps, rng=self.rng),
             # Swap two students within 2 timeslots
-            SwapStudents(result, timeslots, self.ceiling, self.tried_timeslot_swaps),
+            SwapStudents(result, timeslots, self.ceiling, self.tried_timeslot_swaps, rng=self.rng),
             # Swap two timeslots
-            SwapTimeslots(result, timeslots, self.ceiling, self.tried_timeslot_swaps),
+            SwapTimeslots(result, timeslots, self.ceiling, self.tried_timeslot_swaps, rng=self.rng),
         ]
+        # Occasionally rebuild a whole day, room or course, to escape local minima of the small mutations
+        if self.ruin_rate and self.rng.random() < self.ruin_rate:
+            mutations.append(RuinRecreate(result, timeslots, self.ceiling, self.tried_timeslot_swaps, rng=self.rng))
+        return mutations
 
     def suggest_mutation(self, result: Result, ceiling=0, iterations=0, i_max=1) -> Mutation:
         """Return best possible mutation according to chosen strategy."""
@@ -56,6 +66,12 @@ class MutationSupplier(Statistics):
         """Clear memory of tried swaps."""
         self.tried_timeslot_swaps.clear()
 
+    def reset(self, rng=None):
+        """Forget state of previous solving run. Mutations of the next run are drawn with random generator `rng`."""
+        self.reset_mutations()
+        if rng is not None:
+            self.rng = rng
+
 
 class HillClimber(MutationSupplier):
     """Supplies mutations with hillclimber strategy. Increasing `score_scope` > 1 results in steepest descent hillclimber."""
@@ -66,8 +82,9 @@ class HillClimber(MutationSupplier):
         ceiling=0,
         tried_timeslot_swaps: set[tuple[int, int]] = set(),
         swap_scores_memory: dict[tuple[Timeslot, Timeslot], int | float] = {},
+        ruin_rate: float = 0,
     ):
-        super().__init__(score_scope, ceiling, tried_timeslot_swaps, swap_scores_memory)
+        super().__init__(score_scope, ceiling, tried_timeslot_swaps, swap_scores_memory, ruin_rate)
 
     def suggest_mutation(
         self, result: Result, timeslots=None, _recursion_depth=1000, iterations=0, i_max=1
@@ -86,7 +103,7 @@ class HillClimber(MutationSupplier):
             possible_mutations.extend(self.find_mutations(result, timeslots))
 
         # See which swaps are best
-        random.shuffle(possible_mutations)
+        self.rng.shuffle(possible_mutations)
         best_mutation = min(possible_mutations, key=lambda m: m.score)
 
         # If best mutation isn't an improvement, try again.
@@ -98,7 +115,11 @@ class HillClimber(MutationSupplier):
 
 
 class SimulatedAnnealing(MutationSupplier):
-    """Supplies mutations with simulated annealing algorithm."""
+    """Supplies mutations with simulated annealing algorithm.
+
+    `temperature_schedule` replaces the temperature by iteration, eg. by `AdaptiveCooling`.
+    `score_0` is the score range the score based schedules `temperature_lin`, `temperature_swq` and `temperature_exp`
+    scale by."""
 
     def __init__(
         self,
@@ -107,9 +128,19 @@ class SimulatedAnnealing(MutationSupplier):
         swap_scores_memory: dict[tuple[Timeslot, Timeslot], int | float] = {},
         T_0: float = 1 / 5,
         ceiling=10,
+        ruin_rate: float = 0,
+        score_0: float = 600,
+        temperature_schedule: TemperatureSchedule | None = None,
     ):
         self.T_0 = T_0
-        super().__init__(score_scope, ceiling, tried_timeslot_swaps, swap_scores_memory)
+        self.score_0 = score_0
+        self.temperature_schedule = temperature_schedule
+        super().__init__(score_scope, ceiling, tried_timeslot_swaps, swap_scores_memory, ruin_rate)
+
+    def reset(self, rng=None):
+        super().reset(rng)
+        if self.temperature_schedule is not None:
+            self.temperature_schedule.reset()
 
     def temperature(self, score: int | float, iterations, i_max) -> float:
         T = self.T_0 * (i_max - iterations) / ((iterations + 1) * i_max)
@@ -118,7 +149,7 @@ class SimulatedAnnealing(MutationSupplier):
     def temperature_lin(self, score: int | float, iterations, i_max) -> float:
         """Linear temperature schedule."""
         floor = 2
-        score_0 = 600 + floor
+        score_0 = self.score_0 + floor
         T = self.T_0 * (score + floor) / score_0
         return T
 
@@ -126,14 +157,14 @@ class SimulatedAnnealing(MutationSupplier):
 
         """Quadratic temperature schedule."""
         floor = 5
-        score_0 = 600 + floor
+        score_0 = self.score_0 + floor
         return self.T_0 * ((score + floor) / score_0) ** 2
 
     def temperature_exp(self, score: int | float, iterations, i_max) -> float:
 
         """Exponential temperature schedule."""
         floor = 5
-        score_0 = 600 + floor
+        score_0 = self.score_0 + floor
         ex = np.exp(-3 * score_0 / (score + floor) + 1)
         return self.T_0 * ex
 
@@ -164,18 +195,26 @@ class SimulatedAnnealing(MutationSupplier):
             possible_mutations.extend(self.find_mutations(result, timeslots))
 
         # Shuffle mutations so that we don't always pick first listed mutation if scores are equal
-        random.shuffle(possible_mutations)
+        self.rng.shuffle(possible_mutations)
 
         # Go through mutations and return mutation if acceptance critaria are fulfilled
         for mutation in Statistics.sort_objects(possible_mutations, "score"):
-            P = self.probability(mutation.score, self.temperature(mutation.score, iterations, i_max))
-            do_mutation = Randomizer.biased_boolean(P)
+            if self.temperature_schedule is None:
+                T = self.temperature(mutation.score, iterations, i_max)
+            else:
+                T = self.temperature_schedule.temperature(mutation.score, iterations, i_max)
+            P = self.probability(mutation.score, T)
+            do_mutation = Randomizer.biased_boolean(P, self.rng)
+            if self.temperature_schedule is not None:
+                self.temperature_schedule.update(mutation.score, do_mutation)
 
             if do_mutation:
                 return mutation
 
         # Return accepted mutation
-        return self.suggest_mutation(result, _recursion_depth=_recursion_depth - 1)
+        return self.suggest_mutation(
+            result, timeslots, _recursion_depth=_recursion_depth - 1, iterations=iterations, i_max=i_max
+        )
 
 
 class DirectedSA(SimulatedAnnealing):
@@ -188,7 +227,7 @@ class DirectedSA(SimulatedAnnealing):
 
         selection_size = int(len(timeslots) // (1 / fraction))
         probabilities = selection_size * scores / total_score
-        select = [Randomizer.biased_boolean(p) for p in probabilities]
+        select = [Randomizer.biased_boolean(p, self.rng) for p in probabilities]
 
         selection = [subject for subject, select in zip(timeslots, select) if select]
 
@@ -1,9 +1,10 @@
 import random
-from tqdm import tqdm
 from typing import Callable
 import warnings
 from .solver import Solver
-from .generate import make_prototype
+from .generate import make_prototype, make_rng
+from .construction import ConstructionEngine, policy_tiers
+from .sectioning import section_students
 from ..classes import *
 from ..classes.result import Result
 
@@ -24,6 +25,7 @@ class Randomizer(Solver):
         symmetric_condition=True,
         _combination_set: set | None = None,
         _limit=10000,
+        rng=random,
     ):
         """Try to pick two random nodes to satisfy `condition(node1, node2) == True`."""
 
@@ -38,8 +40,8 @@ class Randomizer(Solver):
 
         for i in range(max_combinations**2):
             # Pick two random nodes
-            node1 = random.choice(nodes1)
-            node2 = random.choice(nodes2)
+            node1 = rng.choice(nodes1)
+            node2 = rng.choice(nodes2)
 
             # Some conditions are the same for `combination` and the swap of `combination`
             combination = (node1.id, node2.id)
@@ -78,23 +80,23 @@ class Randomizer(Solver):
         return None
 
     @staticmethod
-    def biased_boolean(probability: float = 0.5) -> bool:
+    def biased_boolean(probability: float = 0.5, rng=random) -> bool:
         """Returns `True` with probability `probability`. Otherwise returns False."""
         assert probability >= 0, "Probability cannot be less than zero"
-        if random.random() < probability:
+        if rng.random() < probability:
             return True
         return False
 
     def bias_activity(self, activity: Activity, normalizer) -> float:
         """Returns a bias for `activity` based on the number of students enrolled."""
-        return Randomizer.biased_boolean(normalizer * activity.enrolled_students)
+        return Randomizer.biased_boolean(normalizer * activity.enrolled_students, self.rng)
 
     def connect_random(self, schedule: Schedule, i_max: int = 5):
         """Make random connections between levels of partite graph. Ignores any constraints."""
         for _ in range(i_max):
-            student: Student = random.choice(list(schedule.students.values()))
-            activity: Activity = random.choice(list(student.activities.values()))
-            timeslot: Timeslot = random.choice(list(schedule.timeslots.values()))
+            student: Student = self.rng.choice(list(schedule.students.values()))
+            activity: Activity = self.rng.choice(list(student.activities.values()))
+            timeslot: Timeslot = self.rng.choice(list(schedule.timeslots.values()))
             schedule.connect_nodes(student, timeslot)
             schedule.connect_nodes(activity, timeslot)
 
@@ -104,8 +106,8 @@ class Randomizer(Solver):
         activities = list(schedule.activities.values())
         timeslots = list(schedule.timeslots.values())
 
-        random.shuffle(activities)
-        random.shuffle(timeslots)
+        self.rng.shuffle(activities)
+        self.rng.shuffle(timeslots)
 
         self.assign_activities_timeslots_prioritized(schedule, activities, timeslots)
 
@@ -114,7 +116,7 @@ class Randomizer(Solver):
         # Make shuffled list of timeslots so they will be picked randomly
         available_timeslots = [timeslot for timeslot in schedule.timeslots.values() if len(timeslot.activities) == 0]
         timeslots_shuffled = list(available_timeslots)
-        random.shuffle(timeslots_shuffled)
+        self.rng.shuffle(timeslots_shuffled)
 
         activities = list(schedule.activities.values())
 
@@ -125,7 +127,7 @@ class Randomizer(Solver):
                 continue
 
             # Draw an activity that doesnt already have its max timeslots
-            draw = self.draw_uniform([timeslot], activities, lambda t, a: self.can_assign_timeslot_activity(t, a) and a.course.enrolled_students != 0)  # type: ignore
+            draw = self.draw_uniform([timeslot], activities, lambda t, a: self.can_assign_timeslot_activity(t, a) and a.course.enrolled_students != 0, rng=self.rng)  # type: ignore
 
             if not draw:
                 continue
@@ -139,7 +141,7 @@ class Randomizer(Solver):
         # Make shuffled list of timeslots so they will be picked randomly
         available_timeslots = [timeslot for timeslot in schedule.timeslots.values() if len(timeslot.activities) == 0]
         timeslots_shuffled = list(available_timeslots)
-        random.shuffle(timeslots_shuffled)
+        self.rng.shuffle(timeslots_shuffled)
 
         activities = list(schedule.activities.values())
 
@@ -153,7 +155,7 @@ class Randomizer(Solver):
                 continue
 
             # Draw an activity that doesnt already have its max timeslots
-            draw = self.draw_uniform([timeslot], activities, lambda t, a: self.can_assign_timeslot_activity(t, a) and self.bias_activity(a, normalizer))  # type: ignore
+            draw = self.draw_uniform([timeslot], activities, lambda t, a: self.can_assign_timeslot_activity(t, a) and self.bias_activity(a, normalizer), rng=self.rng)  # type: ignore
 
             if not draw:
                 continue
@@ -162,157 +164,41 @@ class Randomizer(Solver):
             activity: Activity = draw[1]  # type: ignore
             schedule.connect_nodes(activity, timeslot)
 
-    def assign_students_timeslots(self, schedule: Schedule, i_max=10000, method="uniform"):
-        """Assign students to timeslots for their appropriate activities."""
-
-        # Index which activities still have to get students assigned
-        available_activities = list(schedule.activities.values())
-
-        # Remember which connections have been made
-        edges = set()
-
-        # Try making connections for i_max iterations
-        for i in tqdm(range(i_max), disable=not self.verbose, desc="Trying connections:"):
-            if len(available_activities) == 0:
-                # Solver has come to completion: all activities have its students assigned to timeslots
-                return Result(schedule=schedule, iterations=i, solved=True)
-
-            # Take random unfinished activity
-            activity = random.choice(available_activities)
-
-            # Build index on students that don't yet have a timeslot assigned for this activity
-            if not hasattr(activity, "_unassigned_students"):
-                setattr(activity, "_unassigned_students", set(activity.students.values()))
-            available_students_linked = list(getattr(activity, "_unassigned_students"))
-
-            # No available students means this activity has been assigned to all its students, it's finished.
-            if len(available_students_linked) == 0:
-                # Remove activity from available activities
-                for index, test_activity in enumerate(available_activities):
-                    if activity == test_activity:
-                        available_activities.pop(index)
-                # Remove local index
-                delattr(activity, "_unassigned_students")
-                continue
-
-            # Pick student that does not have a timeslot for this activity
-            student = random.choice(available_students_linked)
-
-            timeslots_linked = list(activity.timeslots.values())
-
-            draw_timeslot = None
-            match method:
-                case "min_overlap":
-                    draw_timeslot = self.draw_uniform(
-                        [student],
-                        timeslots_linked,
-                        lambda s, t: self.can_assign_student_timeslot(s, t) and not self.node_has_period(s, t),
-                    )
-                case "min_gaps":
-                    for limit in range(1, 4):
-                        draw_timeslot = self.draw_uniform(
-                            [student],
-                            timeslots_linked,
-                            lambda s, t: self.can_assign_student_timeslot(s, t)
-                            and not self.timeslot_gives_gaps(s, t, limit=limit),
-                        )
-                        if draw_timeslot:
-                            break
-                case "min_gaps_overlap":
-                    # Give priority to absence of gaps, then to overlap
-
-                    # Try meeting requirements: no overlap AND no gap of size `limit` for increasing limit
-                    for limit in range(1, 4):
-                        draw_timeslot = self.draw_uniform(
-                            [student],
-                            timeslots_linked,
-                            lambda s, t: self.can_assign_student_timeslot(s, t)
-                            and not self.node_has_period(s, t)
-                            and not self.timeslot_gives_gaps(s, t, limit=limit),
-                        )
-                        if draw_timeslot:
-                            break
-
-                    # If failed, try meeting requirements: no gaps of size `limit` for increasing limit
-                    if not draw_timeslot:
-                        for limit in range(1, 4):
-                            draw_timeslot = self.draw_uniform(
-                                [student],
-                                timeslots_linked,
-                                lambda s, t: self.can_assign_student_timeslot(s, t)
-                                and not self.timeslot_gives_gaps(s, t, limit=limit),
-                            )
-                            if draw_timeslot:
-                                break
-
-                    # If still failed, try meeting requirement: no overlap
-                    if not draw_timeslot:
-                        draw_timeslot = self.draw_uniform(
-                            [student],
-                            timeslots_linked,
-                            lambda s, t: self.can_assign_student_timeslot(s, t) and not self.node_has_period(s, t),
-                        )
-
-                # If still failed, just draw a random available timeslot
-                case _:
-                    draw_timeslot = None
-
-            # Draw a random timeslot if method="uniform" or if method's restrictions did not result in a succesful draw.
-            if not draw_timeslot:
-                draw_timeslot = self.draw_uniform([student], timeslots_linked, self.can_assign_student_timeslot)
-
-            if not draw_timeslot:
-                if self.verbose:
-                    warnings.warn(
-                        f"ERROR: Could no longer find available timeslots for {activity} after {i} iterations."
-                    )
-                continue
-            timeslot = draw_timeslot[1]
-
-            # Skip if timeslot is already linked to student
-            edge = (student.id, timeslot.id)
-            if edge in edges:
-                if self.verbose:
-                    warnings.warn("ERROR: attempted adding same edge twice.")
-                continue
+    def assign_students_timeslots(self, schedule: Schedule, i_max: int | None = None, method="uniform"):
+        """Assign students to timeslots for their appropriate activities. At most `i_max` students are assigned."""
+        # Each enrolment of a student in an activity is handled once
+        engine = ConstructionEngine(
+            schedule, list(schedule.activities.values()), policy_tiers(self, method), rng=self.rng
+        )
+        iterations = engine.run(i_max)
 
-            # Success: found a pair of student, timeslot that meet all requirements and can be booked
-            schedule.connect_nodes(student, timeslot)
-            # Remove student from index of unassigned students for this activity
-            getattr(activity, "_unassigned_students").remove(student)
-
-        # If activities are finished, schedule is solved
+        # If all students are assigned, schedule is solved
         # Disregards hard constraint ">2 gaps on a day not allowed", because this constructive algorithm is unable to predict gaps completely.
         # Iterative algorithms can improve on this constraint entirely.
-        activities_finished = len(available_activities) == 0
+        activities_finished = engine.finished
 
         # Activities not finished, schedule not solved
         if not activities_finished:
             if self.verbose:
+                unfinished = {activity for activity, student in engine.unplaced} | {item[1] for item in engine.work}
                 warnings.warn(
-                    f"ERROR: could not finish schedule within {i_max} iterations. Unfinished activities: {available_activities}"
+                    f"ERROR: could not finish schedule within {iterations} iterations. Unfinished activities: {unfinished}"
                 )
 
         # Return Result
-        return Result(schedule=schedule, iterations=i_max, solved=activities_finished)
+        return Result(schedule=schedule, iterations=iterations, solved=activities_finished)
 
-    def solve(self, schedule: Schedule | None = None, i_max: int | None = None, method=None, strict=True):
+    def solve(
+        self, schedule: Schedule | None = None, i_max: int | None = None, method=None, strict=True, seed=None
+    ):
         """Construct schedule solution with randomized strategy."""
+        seed, self.rng = make_rng(seed)
         if schedule is None:
             schedule = make_prototype(self.students_input, self.courses_input, self.rooms_input)
 
         if method is None:
             method = self.method
 
-        # If no i_max is given, guess the required amount of iterations
-        if i_max is None:
-            # Program on average has to iterate over each activity once, which with a random distribution it takes more iterations
-            i_min = 1000 * len(schedule.activities)
-            guess_required_edges = 0
-            for activity in schedule.activities.values():
-                guess_required_edges += activity.enrolled_students
-            i_max = max(guess_required_edges, i_min)
-
         # First make sure each activity has a timeslot
         self.assign_activities_timeslots_once(schedule)
         # Divide leftover timeslots over activities
@@ -324,4 +210,8 @@ class Randomizer(Solver):
             self.assign_activities_timeslots_uniform(schedule)
 
         # Assign students to timeslots with `method`
-        return self.assign_students_timeslots(schedule, i_max, method=method)
+        result = self.assign_students_timeslots(schedule, i_max, method=method)
+        if self.section:
+            section_students(result)
+        result.seed = seed
+        return result
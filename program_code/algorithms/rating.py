@@ -0,0 +1,31 @@
+import numpy as np
+from ..classes import Schedule, Activity, Timeslot
+
+
+class RatingMatrix:
+    """Rates moments for activities by the amount of enrolled students that are still free at that moment.
+
+    Built from an enrolment matrix (students x activities) and an occupancy matrix (students x moments),
+    the ratings of all moments for all activities are calculated in one matrix product."""
+
+    def __init__(self, schedule: Schedule, activities: list[Activity]):
+        # Map node ids to matrix rows and columns
+        self.student_index = {uid: row for row, uid in enumerate(schedule.students)}
+        self.activity_index = {activity.id: column for column, activity in enumerate(activities)}
+
+        # Enrolment matrix: E[s, a] = 1 if student s follows activity a
+        self.enrolment = np.zeros((len(self.student_index), len(activities)), dtype=np.int32)
+        for activity in activities:
+            rows = [self.student_index[uid] for uid in activity.students]
+            self.enrolment[rows, self.activity_index[activity.id]] = 1
+
+        # Occupancy matrix: O[s, m] = amount of timeslots booked by student s at moment m
+        self.occupancy = np.array([student.occupancy.counts for student in schedule.students.values()], dtype=np.int32)
+
+        # Ratings R[a, m] = sum_s E[s, a] * (O[s, m] == 0): students of activity a free at moment m
+        self.ratings = self.enrolment.T @ (self.occupancy == 0).astype(np.int32)
+
+    def rate(self, activity: Activity, timeslots: list[Timeslot]):
+        """Return ratings of `timeslots` for `activity`."""
+        moments = [timeslot.moment_index for timeslot in timeslots]
+        return self.ratings[self.activity_index[activity.id], moments]
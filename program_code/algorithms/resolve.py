@@ -0,0 +1,232 @@
+"""
+Warm-start re-solve of a schedule after its input changed, eg. a student adding a course or a room dropping out.
+
+Node ids depend on the order of the input, so assignments of the previous solution are carried over by natural keys:
+student number, course name with activity type, and room with moment. Assignments that are still valid are kept,
+the affected activities and students are repaired, and a short anneal improves only the timeslots of affected activities.
+"""
+
+import warnings
+from .statistics import Statistics
+from .generate import make_prototype
+from .crossover import course_moment_free, find_free_timeslot, repair
+from .evolutionsolver import EvolutionSolver
+from .mutationsuppliers import MutationSupplier, SimulatedAnnealing
+from ..classes import Schedule, Student, Activity, Timeslot
+from ..classes.result import Result
+from ..helpers import load_pickle
+
+
+def student_key(student: Student):
+    return student.std_id
+
+
+def activity_key(activity: Activity):
+    return activity.course.name, activity.act_type
+
+
+def timeslot_key(timeslot: Timeslot):
+    return timeslot.room.name, timeslot.day, timeslot.period
+
+
+def assignment_keys(schedule: Schedule):
+    """Return activity-timeslot and student-timeslot assignments of `schedule` by natural keys."""
+    activity_assignments: list[tuple[tuple, tuple]] = []
+    student_assignments: list[tuple[int, tuple, tuple]] = []
+    for timeslot in schedule.timeslots.values():
+        for activity in timeslot.activities.values():
+            activity_assignments.append((activity_key(activity), timeslot_key(timeslot)))
+            for student in timeslot.students.values():
+                student_assignments.append((student_key(student), activity_key(activity), timeslot_key(timeslot)))
+    return activity_assignments, student_assignments
+
+
+def carry_over(schedule: Schedule, previous: Schedule):
+    """Copy assignments of `previous` that are still valid in `schedule`. Returns ids of activities that lost assignments."""
+    statistics = Statistics()
+    activities = {activity_key(activity): activity for activity in schedule.activities.values()}
+    timeslots = {timeslot_key(timeslot): timeslot for timeslot in schedule.timeslots.values()}
+    students = {student_key(student): student for student in schedule.students.values()}
+    activity_assignments, student_assignments = assignment_keys(previous)
+
+    # Activities that lost an assignment, either of a timeslot or of a student
+    affected: set[int] = set()
+
+    # Lectures first, so the moments of a course's lectures are known when placing its other activities
+    bound = {key for key, activity in activities.items() if activity.max_timeslots}
+    activity_assignments.sort(key=lambda assignment: assignment[0] not in bound)
+    for key, key_timeslot in activity_assignments:
+        activity = activities.get(key)
+        timeslot = timeslots.get(key_timeslot)
+        if activity is None:
+            continue
+
+        if (
+            timeslot is None
+            or activity.enrolled_students == 0
+            or not statistics.can_assign_timeslot_activity(timeslot, activity)
+            or (activity.max_timeslots and not course_moment_free(activity, timeslot))
+        ):
+            affected.add(activity.id)
+            continue
+        schedule.connect_nodes(activity, timeslot)
+
+    for key_student, key, key_timeslot in student_assignments:
+        student = students.get(key_student)
+        activity = activities.get(key)
+        timeslot = timeslots.get(key_timeslot)
+        if student is None or activity is None:
+            continue
+
+        # Student must still follow activity, which must still take place in timeslot
+        if (
+            timeslot is None
+            or activity.id not in student.activities
+            or activity.id not in timeslot.activities
+            or statistics.student_has_activity_assigned(student, activity)
+        ):
+            affected.add(activity.id)
+            continue
+        schedule.connect_nodes(student, timeslot)
+
+    return affected
+
+
+def place_lectures(result: Result):
+    """Give lectures without timeslot, or with too many students for their room, a free timeslot that fits."""
+    schedule = result.schedule
+    for activity in schedule.activities.values():
+        if not activity.max_timeslots or activity.enrolled_students == 0:
+            continue
+
+        current = list(activity.timeslots.values())
+        if len(current) > 0 and sum(timeslot.capacity for timeslot in current) >= activity.enrolled_students:
+            continue
+
+        # Move lecture with its students, preferably at the same moment
+        moment = current[0].moment if current else None
+        timeslot = find_free_timeslot(schedule, activity, moment, activity.enrolled_students, result)
+        if timeslot is None or timeslot.room.capacity < activity.enrolled_students:
+            return False
+        for old_timeslot in current:
+            for student in list(old_timeslot.students.values()):
+                schedule.disconnect_nodes(student, old_timeslot)
+            schedule.disconnect_nodes(activity, old_timeslot)
+        schedule.connect_nodes(activity, timeslot)
+    return True
+
+
+def merge_group(result: Result):
+    """Free a timeslot by moving the students of the smallest tutorial or practical group into the other groups.
+    Returns whether a timeslot was freed."""
+    schedule = result.schedule
+    candidates = []
+    for activity in schedule.activities.values():
+        if activity.max_timeslots:
+            continue
+        for timeslot in activity.timeslots.values():
+            others = [t for t in activity.timeslots.values() if t is not timeslot]
+            if sum(t.capacity - t.enrolled_students for t in others) >= timeslot.enrolled_students:
+                candidates.append((timeslot.enrolled_students, timeslot, activity, others))
+    if len(candidates) == 0:
+        return False
+
+    size, timeslot, activity, others = min(candidates, key=lambda candidate: candidate[0])
+    for student in list(timeslot.students.values()):
+        schedule.disconnect_nodes(student, timeslot)
+        available = [t for t in others if t.enrolled_students < t.capacity]
+        # Prefer groups that don't overlap with other bookings of student
+        schedule.connect_nodes(student, min(available, key=lambda t: result.node_has_period(student, t)))
+    schedule.disconnect_nodes(activity, timeslot)
+    return True
+
+
+def warm_start(
+    previous: Result,
+    students_input: list[dict],
+    courses_input: list[dict],
+    rooms_input: list[dict],
+    max_merges: int = 10,
+):
+    """Build schedule of new input from assignments of `previous` and repair it.
+    If repairs need more timeslots than are free, up to `max_merges` groups are merged to free timeslots.
+
+    Returns result, which is unsolved if the hard constraints could not be restored, and ids of affected activities."""
+    schedule = make_prototype(students_input, courses_input, rooms_input)
+    affected = carry_over(schedule, previous.schedule)
+
+    # Remember edges, the activities changed by repairs are affected as well
+    result = Result(schedule)
+    edges = set(schedule.edges)
+
+    # Undo a failed repair, free a timeslot and try again
+    schedule.begin()
+    for merges in range(max_merges + 1):
+        position = schedule.journal_position
+        solved = place_lectures(result) and repair(result)
+        if solved:
+            break
+        schedule.rollback(position)
+        if not merge_group(result):
+            break
+    schedule.commit()
+
+    for edge in edges ^ schedule.edges:
+        for node in (schedule.nodes[uid] for uid in edge):
+            if node.neighbor_index == "timeslots":
+                affected.update(node.activities)
+            elif node.neighbor_index == "activities":
+                affected.add(node.id)
+
+    result.solved_input = None
+    result.update_score()
+    if not solved:
+        result.solved_input = False
+    return result, affected
+
+
+def resolve(
+    previous: Result,
+    students_input: list[dict],
+    courses_input: list[dict],
+    rooms_input: list[dict],
+    i_max: int = 2000,
+    mutation_supplier: MutationSupplier | None = None,
+    show_progress=False,
+    seed: int | None = None,
+    **kwargs,
+):
+    """Re-solve after input changed, starting from `previous`. Anneals only the timeslots of affected activities.
+
+    Falls back to solving from scratch if the previous assignments can't be repaired. `kwargs` go to `EvolutionSolver`."""
+    result, affected = warm_start(previous, students_input, courses_input, rooms_input)
+
+    if mutation_supplier is None:
+        mutation_supplier = SimulatedAnnealing(tried_timeslot_swaps=set(), swap_scores_memory={})
+    # Population would only hold copies of the same warm start
+    kwargs.setdefault("population_size", 1)
+    solver = EvolutionSolver(
+        students_input, courses_input, rooms_input, mutation_supplier=mutation_supplier, focus=affected, **kwargs
+    )
+
+    if not result.is_solved:
+        warnings.warn("Previous solution could not be repaired for new input, solving from scratch.")
+        solver.focus = None
+        return solver.solve(i_max=i_max, self_repair=True, show_progress=show_progress, save_result=False, seed=seed)
+
+    # Nothing changed, previous solution still holds
+    if len(affected) == 0:
+        return result
+
+    return solver.solve(
+        result.schedule, i_max=i_max, self_repair=True, show_progress=show_progress, save_result=False, seed=seed
+    )
+
+
+def load_previous(path: str, students_input: list[dict], courses_input: list[dict], rooms_input: list[dict]):
+    """Load result dumped at `path`, solved with the given input. Of a dumped list of results, the best is taken."""
+    previous = load_pickle(path)
+    if isinstance(previous, list):
+        previous = min(previous, key=lambda result: result.score)
+    return previous.decompress(students_input, courses_input, rooms_input)
+
@@ -0,0 +1,107 @@
+"""
+Student sectioning: optimal assignment of students to the timeslots (groups) of tutorials and practicals.
+
+For each unbound activity, the assignment of its students to its timeslots is solved as a min-cost flow:
+source -> student (capacity 1) -> timeslot (capacity 1, cost of booking) -> sink (capacity of timeslot).
+The cost of a booking is the score difference it makes for the student: a double booking or the change in gap penalties
+against the student's other bookings. Activities are sectioned one at a time, with bookings of other activities fixed.
+"""
+
+from .statistics import GAPS_PER_DAY_MASK
+from ..classes import Student, Activity, Timeslot
+from ..classes.occupancy import Occupancy
+from ..classes.result import Result
+
+
+def gap_penalties(score_matrix) -> list[int]:
+    """Penalty of a day per mask of booked periods, from weights of 1, 2 and >2 gaps in `score_matrix`."""
+    weights = [0, int(score_matrix[2]), int(score_matrix[3]), int(score_matrix[4])]
+    return [weights[min(gaps, 3)] for gaps in GAPS_PER_DAY_MASK]
+
+
+def booking_costs(student: Student, activity: Activity, timeslots: list[Timeslot], score_matrix, penalties: list[int]):
+    """Score difference of booking each of `timeslots` for `student`, against bookings of other activities."""
+    # Leave out current bookings for `activity`
+    counts = list(student.occupancy.counts)
+    for timeslot in timeslots:
+        if student.id in timeslot.students:
+            counts[timeslot.moment_index] -= 1
+
+    periods = Occupancy.periods_per_day
+    costs = []
+    for timeslot in timeslots:
+        day_start = timeslot.day * periods
+        day_mask = sum(1 << period for period in range(periods) if counts[day_start + period])
+
+        cost = int(score_matrix[1]) * int(counts[timeslot.moment_index] > 0)
+        cost += penalties[day_mask | 1 << timeslot.period] - penalties[day_mask]
+        costs.append(cost)
+    return costs
+
+
+def section_activity(result: Result, activity: Activity):
+    """Reassign students of `activity` to its timeslots with minimal cost. Returns amount of moved students.
+
+    The activity is left as is if its timeslots can't hold all of its students."""
+    # Only import graph library when required
+    import networkx as nx
+
+    timeslots = list(activity.timeslots.values())
+    students = list(activity.students.values())
+    if len(timeslots) < 2 or len(students) == 0:
+        return 0
+
+    penalties = gap_penalties(result.score_matrix)
+    # Scale costs, so staying in the current timeslot breaks ties without overruling an improvement
+    scale = len(students) + 1
+
+    graph = nx.DiGraph()
+    for student in students:
+        graph.add_edge("source", ("student", student.id), capacity=1, weight=0)
+        costs = booking_costs(student, activity, timeslots, result.score_matrix, penalties)
+        for timeslot, cost in zip(timeslots, costs):
+            stay = int(student.id not in timeslot.students)
+            graph.add_edge(("student", student.id), ("timeslot", timeslot.id), capacity=1, weight=cost * scale + stay)
+    for timeslot in timeslots:
+        graph.add_edge(("timeslot", timeslot.id), "sink", capacity=timeslot.capacity, weight=0)
+
+    flow = nx.max_flow_min_cost(graph, "source", "sink")
+    if sum(flow["source"].values()) < len(students):
+        return 0
+
+    # Apply assignment: move students whose timeslot changed
+    moved = 0
+    for student in students:
+        target_id = next(node[1] for node, amount in flow[("student", student.id)].items() if amount > 0)
+        current = [timeslot for timeslot in timeslots if student.id in timeslot.students]
+        if [timeslot.id for timeslot in current] == [target_id]:
+            continue
+
+        for timeslot in current:
+            result.schedule.disconnect_nodes(student, timeslot)
+        result.schedule.connect_nodes(student, result.schedule.timeslots[target_id])
+        moved += 1
+
+    return moved
+
+
+def section_students(result: Result, activities: list[Activity] | None = None, sweeps: int = 1):
+    """Section students of all unbound `activities`, `sweeps` times. Returns amount of moved students."""
+    if activities is None:
+        activities = [activity for activity in result.schedule.activities.values() if not activity.max_timeslots]
+
+    moved = 0
+    for sweep in range(sweeps):
+        moved_sweep = 0
+        for activity in activities:
+            moved_sweep += section_activity(result, activity)
+        moved += moved_sweep
+
+        # No student changed group, next sweep would give the same result
+        if moved_sweep == 0:
+            break
+
+    # Constructive solvers may have left constraints unmet, which sectioning can resolve
+    result.solved_input = None
+    result.update_score()
+    return moved
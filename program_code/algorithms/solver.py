@@ -1,6 +1,7 @@
+import random
 import warnings
 from typing import TypeVar
-from .generate import make_prototype
+from .generate import make_prototype, make_rng
 from .statistics import Statistics
 from ..classes import Schedule, Activity, Timeslot
 from ..classes.result import Result
@@ -16,6 +17,7 @@ class Solver(Statistics):
         rooms_input: dict,
         method: str | None = "uniform",
         verbose=False,
+        section=False,
     ):
         # Take input data to build initial graph state from
         self.students_input = students_input
@@ -23,10 +25,15 @@ class Solver(Statistics):
         self.rooms_input = rooms_input
 
         self.verbose = verbose
+        # Optimally reassign students to tutorial and practical groups after construction
+        self.section = section
         if method is None:
             method = "baseline"
         self.method = method
 
+        # Random generator of current run, replaced by a seeded one in `solve`
+        self.rng = random.Random()
+
     def assign_activities_timeslots_greedy(
         self, schedule: Schedule, activities: list[Activity], timeslots: list[Timeslot], reverse=True
     ):
@@ -85,11 +92,13 @@ class Solver(Statistics):
         i_max: int | None = None,
         method: str | None = None,
         strict=True,
+        seed: int | None = None,
     ):
         """Construct schedule solution. Mockup function only for type hinting"""
+        seed, self.rng = make_rng(seed)
         if schedule is None:
             schedule = make_prototype(self.students_input, self.courses_input, self.rooms_input)
-        return Result(schedule)
+        return Result(schedule, seed=seed)
 
 
 # class Node or subclass of Node
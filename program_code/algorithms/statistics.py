@@ -2,6 +2,18 @@ from typing import Callable
 import operator
 import numpy as np
 from ..classes import *
+from ..classes.occupancy import Occupancy
+
+
+def gaps_in_mask(day_mask: int):
+    """Count free periods between the first and last booked period in bitset of periods `day_mask`."""
+    if day_mask == 0:
+        return 0
+    return day_mask.bit_length() - (day_mask & -day_mask).bit_length() + 1 - day_mask.bit_count()
+
+
+# Gaps on a day for every mask of booked periods on that day
+GAPS_PER_DAY_MASK = tuple(gaps_in_mask(day_mask) for day_mask in range(1 << Occupancy.periods_per_day))
 
 
 class Statistics:
@@ -49,6 +61,10 @@ class Statistics:
     @staticmethod
     def node_has_period(node, timeslot: Timeslot):
         """Verify if `node` already has period of `timeslot` booked"""
+        # Students keep a bitset of booked moments
+        if node.neighbor_index == "students":
+            return node.occupancy.has(timeslot.moment_index)
+
         new_moment = timeslot.moment
         for booked_timeslot in node.timeslots.values():
             if booked_timeslot.moment == new_moment:
@@ -69,21 +85,11 @@ class Statistics:
 
     def student_has_activity_assigned(self, student: Student, activity: Activity):
         """Verify whether `student` already has a timeslot for `activity`."""
-        for assigned_timeslot in student.timeslots.values():
-            for activity_timeslot in activity.timeslots.values():
-                if assigned_timeslot.id == activity_timeslot.id:
-                    # Student already has assigned timeslot for activity
-                    return True
-        return False
+        return activity.id in student.activity_slots
 
     def student_timeslots_for_activity(self, student: Student, activity: Activity):
         """Count `student`'s assigned `timeslot`s for `activity`."""
-        timeslots_assigned = 0
-        for assigned_timeslot in student.timeslots.values():
-            for assigned_activity in assigned_timeslot.activities.values():
-                if assigned_activity == activity:
-                    timeslots_assigned += 1
-        return timeslots_assigned
+        return student.activity_slots.get(activity.id, 0)
 
     def timeslot_student_overbooked(self, timeslot: Timeslot):
         """Count surplus of students booked for timeslot."""
@@ -96,9 +102,8 @@ class Statistics:
             return False
 
         # Check whether timeslot is already taken by a lecture of the same course
-        for bound_activity in activity.course.bound_activities.values():
-            if self.node_has_period(bound_activity, timeslot):
-                return False
+        if activity.course.bound_occupancy.has(timeslot.moment_index):
+            return False
 
         # Can always assign timeslots to tutorials/practicals
         if activity.max_timeslots is None:
@@ -146,15 +151,7 @@ class Statistics:
 
     def student_overbooked(self, student: Student):
         """Count overbooked periods for `student`."""
-        bookings = set()
-        double_bookings: int = 0
-        for timeslot in student.timeslots.values():
-            # See if moment had already been booked once
-            if timeslot.moment in bookings:
-                double_bookings += 1
-            else:
-                bookings.add(timeslot.moment)
-        return double_bookings
+        return student.occupancy.double_bookings()
 
     def sort_to_day(self, timeslots) -> dict[int, list[Timeslot]]:
         """Sorts `timeslots` per day to dict[day, timeslots]."""
@@ -204,25 +201,13 @@ class Statistics:
         if limit == 0:
             return True
 
-        # Pretend timeslot is assigned to student
-        if len(student.timeslots.values()) == 0:
-            return False
-
-        # Only consider timeslots on same day as `timeslot`
-        day: list[Timeslot] = []
-        day_index = timeslot.day
-        for booked_timeslot in student.timeslots.values():
-            if booked_timeslot.day == day_index:
-                day.append(booked_timeslot)
-        if len(day) == 0:
+        # Only consider bookings on same day as `timeslot`
+        day_mask = student.occupancy.day(timeslot.day)
+        if day_mask == 0:
             return False
 
         # Count gaps on day of new timeslot if timeslot was added
-        day.append(timeslot)
-        gaps_on_day = self.gaps_on_day(day)
-        if gaps_on_day >= limit:
-            return True
-        return False
+        return GAPS_PER_DAY_MASK[day_mask | 1 << timeslot.period] >= limit
 
     def student_day_gaps_frequency(self, student: Student, day_index: int):
         """DEPRECATED: Count frequency of 1-gap, 2-gap and >2-gaps on day."""
@@ -249,11 +234,13 @@ class Statistics:
 
     def gap_periods_student(self, student: Student):
         """Count free periods per day in between the first and last active period of `student`. Sort to buckets of gaps per day."""
-        timeslot_day = self.sort_to_day(student.timeslots.values())
         # Index is the gaps on a day, value is the number of occurences
         gap_frequency = np.zeros((4,), dtype=int)
-        for day in timeslot_day.values():
-            gaps_today = self.gaps_on_day(day)
+        for day_index in range(Occupancy.days):
+            day_mask = student.occupancy.day(day_index)
+            if day_mask == 0:
+                continue
+            gaps_today = GAPS_PER_DAY_MASK[day_mask]
             if gaps_today >= 3:
                 gap_frequency[3] += 1
             else:
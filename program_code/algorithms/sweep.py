@@ -0,0 +1,228 @@
+"""
+Parameter sweep for iterative solvers, raced with successive halving.
+
+A grid maps each method to the parameters of its mutation supplier and of `EvolutionSolver`. A parameter is either a list
+of values, of which all combinations are tried, or a distribution to sample `samples` configurations from:
+`{"uniform": [low, high]}`, `{"loguniform": [low, high]}` or `{"randint": [low, high]}`.
+
+Configurations are raced: all run with a small budget of generations, the best `1 / eta` of each method go on with `eta`
+times the budget, until one configuration remains or the maximum budget is reached. Every run is appended to a JSON lines
+store, runs already in the store are skipped, so an interrupted sweep resumes where it stopped.
+"""
+
+import hashlib
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import random
+import statistics
+import time
+from tqdm import tqdm
+from .evolutionsolver import EvolutionSolver
+from .mutationsuppliers import HillClimber, SimulatedAnnealing
+from ..helpers import prepare_path
+
+# Mutation supplier of each method that can be swept
+SUPPLIERS = {"hillclimber": HillClimber, "simulated_annealing": SimulatedAnnealing}
+
+# Distributions to sample parameters from, by name
+DISTRIBUTIONS = {
+    "uniform": lambda rng, low, high: rng.uniform(low, high),
+    "loguniform": lambda rng, low, high: math.exp(rng.uniform(math.log(low), math.log(high))),
+    "randint": lambda rng, low, high: rng.randint(low, high),
+}
+
+
+def is_distribution(value) -> bool:
+    """Verify whether grid `value` is a distribution instead of a list of values."""
+    return isinstance(value, dict) and len(value) == 1 and next(iter(value)) in DISTRIBUTIONS
+
+
+def sample_value(value, rng: random.Random):
+    """Draw value from distribution or list `value`."""
+    if is_distribution(value):
+        name, (low, high) = next(iter(value.items()))
+        return DISTRIBUTIONS[name](rng, low, high)
+    return rng.choice(value)
+
+
+def expand_grid(grid: dict, samples: int = 10, seed: int = 0) -> list[tuple[str, dict]]:
+    """Return configurations `(method, {"supplier": {...}, "solver": {...}})` described by `grid`.
+
+    Methods with only lists of values give all combinations, methods with a distribution give `samples` drawn configurations.
+    Drawing is seeded, so a resumed sweep draws the same configurations."""
+    rng = random.Random(seed)
+    configurations: list[tuple[str, dict]] = []
+    for method, parameters in grid.items():
+        if method not in SUPPLIERS:
+            raise ValueError(f"Can't sweep method {method}, choose from {list(SUPPLIERS)}.")
+
+        # Flatten parameters to (part, name) keys
+        keys = [(part, name) for part in ("supplier", "solver") for name in parameters.get(part, {})]
+        values = [parameters[part][name] for part, name in keys]
+
+        if any(is_distribution(value) for value in values):
+            drawn = [[sample_value(value, rng) for value in values] for i in range(samples)]
+        else:
+            drawn = list(itertools.product(*values))
+
+        for combination in drawn:
+            config: dict[str, dict] = {"supplier": {}, "solver": {}}
+            for (part, name), value in zip(keys, combination):
+                config[part][name] = value
+            configurations.append((method, config))
+    return configurations
+
+
+def config_id(method: str, config: dict) -> str:
+    """Stable identifier of a configuration, to recognise its runs in the store."""
+    text = json.dumps({"method": method, "config": config}, sort_keys=True)
+    return hashlib.sha1(text.encode()).hexdigest()[:12]
+
+
+class SweepStore:
+    """Append-only JSON lines store of sweep runs, keyed by configuration, budget and seed."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.records: dict[tuple[str, int, int], dict] = {}
+
+        if os.path.exists(path):
+            with open(path) as file:
+                for line in file:
+                    # Skip line that was cut off by an interruption
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    self.records[self.key(record)] = record
+
+    @staticmethod
+    def key(record: dict):
+        return record["id"], record["budget"], record["seed"]
+
+    def __contains__(self, key: tuple[str, int, int]):
+        return key in self.records
+
+    def append(self, record: dict):
+        """Store `record`, written to disk immediately so it survives interruption."""
+        self.records[self.key(record)] = record
+        prepare_path(self.path)
+        with open(self.path, "a") as file:
+            file.write(json.dumps(record) + "\n")
+
+    def scores(self, uid: str, budget: int, seeds: list[int]) -> list[float]:
+        """Scores of runs of configuration `uid` with `budget`, invalid solutions score infinitely bad."""
+        records = [self.records[(uid, budget, seed)] for seed in seeds if (uid, budget, seed) in self.records]
+        return [record["score"] if record["solved"] else math.inf for record in records]
+
+
+# Input data of worker process, shared by all runs in it
+_sweep_input: dict = {}
+
+
+def init_sweeper(students_input, courses_input, rooms_input):
+    """Initialize worker process with input data."""
+    _sweep_input.update(students_input=students_input, courses_input=courses_input, rooms_input=rooms_input)
+
+
+def run_configuration(task: tuple[str, dict, int, int]) -> dict:
+    """Solve with configuration for `budget` generations. Returns record of run."""
+    method, config, budget, seed = task
+
+    # Fresh memories, the supplier defaults are shared between instances
+    supplier = SUPPLIERS[method](tried_timeslot_swaps=set(), swap_scores_memory={}, **config["supplier"])
+    solver = EvolutionSolver(**_sweep_input, mutation_supplier=supplier, **config["solver"])
+
+    start_time = time.time()
+    result = solver.solve(i_max=budget, self_repair=True, show_progress=False, save_result=False, seed=seed)
+    return {
+        "id": config_id(method, config),
+        "method": method,
+        "config": config,
+        "budget": budget,
+        "seed": seed,
+        "score": float(result.score),
+        "solved": result.check_solved(),
+        "time": time.time() - start_time,
+    }
+
+
+def successive_halving(
+    configurations: list[tuple[str, dict]],
+    store: SweepStore,
+    input_data: dict,
+    min_budget: int = 250,
+    max_budget: int = 4000,
+    eta: int = 2,
+    repeats: int = 1,
+    processes: int | None = None,
+    show_progress=True,
+):
+    """Race `configurations` per method, survivors of each rung get `eta` times the budget. Returns survivors."""
+    seeds = list(range(repeats))
+    survivors = list(configurations)
+    budget = min_budget
+
+    pool = multiprocessing.Pool(
+        processes=processes or multiprocessing.cpu_count(),
+        initializer=init_sweeper,
+        initargs=(input_data["students_input"], input_data["courses_input"], input_data["rooms_input"]),
+    )
+    with pool:
+        while True:
+            # Only run what is not in the store yet
+            tasks = [
+                (method, config, budget, seed)
+                for method, config in survivors
+                for seed in seeds
+                if (config_id(method, config), budget, seed) not in store
+            ]
+            for record in tqdm(
+                pool.imap_unordered(run_configuration, tasks),
+                total=len(tasks),
+                desc=f"Budget {budget}",
+                disable=not show_progress or len(tasks) == 0,
+            ):
+                store.append(record)
+
+            if budget >= max_budget:
+                break
+
+            # Keep best `1 / eta` of each method by mean score
+            promoted: list[tuple[str, dict]] = []
+            for method in dict.fromkeys(method for method, config in survivors):
+                entrants = [(m, config) for m, config in survivors if m == method]
+                entrants.sort(key=lambda entrant: statistics.mean(store.scores(config_id(*entrant), budget, seeds)))
+                promoted.extend(entrants[: math.ceil(len(entrants) / eta)])
+
+            if len(promoted) == len(survivors):
+                break
+            survivors = promoted
+            budget = min(budget * eta, max_budget)
+
+    return survivors
+
+
+def best_configurations(store: SweepStore) -> dict[str, dict]:
+    """Best configuration of each method: best mean score at the largest budget the method was run with."""
+    # Group scores by method, budget and configuration
+    runs: dict[tuple[str, int, str], list[dict]] = {}
+    for record in store.records.values():
+        runs.setdefault((record["method"], record["budget"], record["id"]), []).append(record)
+
+    best: dict[str, dict] = {}
+    for (method, budget, uid), records in runs.items():
+        score = statistics.mean(record["score"] if record["solved"] else math.inf for record in records)
+        current = best.get(method)
+        if current is None or (budget, -score) > (current["budget"], -current["score"]):
+            best[method] = {
+                "config": records[0]["config"],
+                "budget": budget,
+                "score": score,
+                "runs": len(records),
+                "time": statistics.mean(record["time"] for record in records),
+            }
+    return best
@@ -0,0 +1,44 @@
+"""
+Transposition table: scores of schedules already seen, by their `state_hash`.
+
+Solvers revisit schedules, eg. when a mutation is undone by a later one or independent runs converge to the same
+solution. Looking up the hash of a schedule saves rescoring it. The table is bounded, the least recently used entries
+are forgotten first.
+"""
+
+from collections import OrderedDict
+
+
+class TranspositionTable:
+    """Bounded mapping of schedule hash to score vector, forgets least recently used hashes when full."""
+
+    def __init__(self, size: int = 100000) -> None:
+        self.size = size
+        self.entries: OrderedDict[int, object] = OrderedDict()
+
+        # Lookup statistics
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, state_hash: int):
+        """Return score vector of `state_hash`, or `None` if unknown."""
+        score_vector = self.entries.get(state_hash)
+        if score_vector is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(state_hash)
+        return score_vector
+
+    def put(self, state_hash: int, score_vector):
+        """Remember score vector of `state_hash`."""
+        self.entries[state_hash] = score_vector
+        self.entries.move_to_end(state_hash)
+        if len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+    def __contains__(self, state_hash: int):
+        return state_hash in self.entries
+
+    def __len__(self):
+        return len(self.entries)
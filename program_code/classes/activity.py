@@ -1,4 +1,3 @@
-from functools import cached_property
 from .node import Node
 from .course import Course
 from .timeslot import Timeslot
@@ -14,6 +13,12 @@ class Activity(Node):
     - students
     """
 
+    __slots__ = ("act_type", "capacity_input", "max_timeslots", "course")
+
+    neighbor_index = "activities"
+    metadata_fields = ("id", "act_type", "capacity_input", "max_timeslots")
+    link_fields = ("neighbors", "course", "timeslots", "students")
+
     def __init__(self, uid: int, act_type: str, capacity_input: int | None, max_timeslots: int | None = None) -> None:
         self.id = uid
 
@@ -23,26 +28,30 @@ class Activity(Node):
         self.max_timeslots = max_timeslots
 
         # Neighbors
+        self.reset_neighbors()
+
+    def reset_neighbors(self):
+        """Initialize empty neighbor indices."""
         self.neighbors: dict[int, Node] = {}
         self.course: Course
         self.timeslots: dict[int, Timeslot] = {}
         self.students: dict[int, Student] = {}
 
     def add_neighbor(self, node):
-        if type(node).__name__ == "Course":
+        if node.neighbor_index == "courses":
             self.course = node
             self.neighbors[node.id] = node
             return
         return super().add_neighbor(node)
 
     def remove_neighbor(self, node):
-        if type(node).__name__ == "Course":
+        if node.neighbor_index == "courses":
             self.course = None  # type: ignore
             del self.neighbors[node.id]
             return
         return super().remove_neighbor(node)
 
-    @cached_property
+    @property
     def capacity(self):
         if self.capacity_input:
             return self.capacity_input
@@ -1,4 +1,5 @@
 from .node import Node
+from .occupancy import Occupancy
 
 
 class Course(Node):
@@ -10,6 +11,23 @@ class Course(Node):
     - timeslots
     """
 
+    __slots__ = (
+        "name",
+        "num_lec",
+        "num_tut",
+        "max_stud_tut",
+        "num_prac",
+        "max_stud_prac",
+        "expected_stud",
+        "bound_activities",
+        "unbound_activities",
+        "bound_occupancy",
+    )
+
+    neighbor_index = "courses"
+    metadata_fields = ("id", "name", "num_lec", "num_tut", "max_stud_tut", "num_prac", "max_stud_prac", "expected_stud")
+    link_fields = ("neighbors", "activities", "bound_activities", "unbound_activities", "students", "timeslots")
+
     def __init__(
         self,
         uid: int,
@@ -33,6 +51,10 @@ class Course(Node):
         self.expected_stud = expected_stud
 
         # Neighbors
+        self.reset_neighbors()
+
+    def reset_neighbors(self):
+        """Initialize empty neighbor indices."""
         self.neighbors = {}
         self.activities = {}
         self.bound_activities = {}
@@ -40,17 +62,24 @@ class Course(Node):
         self.students = {}
         self.timeslots = {}
 
+        # Moments booked by bound activities (lectures), maintained by `Schedule`
+        self.bound_occupancy = Occupancy()
+
     def add_neighbor(self, node):
         """Does the same as regular `add_neighbor` function except it also sorts activity into bound and unbound."""
-        if type(node).__name__ == "Activity":
+        if node.neighbor_index == "activities":
             if node.max_timeslots:
                 self.bound_activities[node.id] = node
             else:
                 self.unbound_activities[node.id] = node
         return super().add_neighbor(node)
 
+    def copy_links(self, original, nodes: dict):
+        super().copy_links(original, nodes)
+        self.bound_occupancy = original.bound_occupancy.copy()
+
     def remove_neighbor(self, node):
-        if type(node).__name__ == "Activity":
+        if node.neighbor_index == "activities":
             if node.max_timeslots:
                 del self.bound_activities[node.id]
             else:
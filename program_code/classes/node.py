@@ -1,14 +1,30 @@
-from functools import cached_property
 from typing import TypeVar
 
 
 class Node:
-    """Base class of node."""
+    """Base class of node.
+
+    Nodes use `__slots__` to keep schedules compact. Each node type defines a class-level tag `neighbor_index`:
+    the name of the typed neighbor index that nodes of this type are stored in, which is used for dispatch when connecting nodes.
+    """
+
+    __slots__ = ("id", "neighbors", "students", "courses", "activities", "timeslots")
+
+    # Type tag: name of typed neighbor index under which neighbors store a node of this type
+    neighbor_index: str = "neighbors"
+    # Names of attributes that hold metadata instead of neighbors
+    metadata_fields: tuple[str, ...] = ("id",)
+    # Names of attributes that hold neighbors: a dict of nodes by id, or a single node
+    link_fields: tuple[str, ...] = ("neighbors", "students", "courses", "activities", "timeslots")
 
     def __init__(self, uid: int):
         self.id = uid
 
         # Neighbors
+        self.reset_neighbors()
+
+    def reset_neighbors(self):
+        """Initialize empty neighbor indices."""
         self.neighbors = {}
         self.students = {}
         self.courses = {}
@@ -18,44 +34,53 @@ class Node:
     def add_neighbor(self, node):
         assert type(node) is not type(self), "Not allowed to connect nodes of same level."
 
-        match type(node).__name__:
-            case "Course":
-                self.courses[node.id] = node
-            case "Activity":
-                self.activities[node.id] = node
-            case "Student":
-                self.students[node.id] = node
-            case "Timeslot":
-                self.timeslots[node.id] = node
-            case "Room":
-                self.room = node
-            case _:
-                raise ValueError(f"Error: in adding node of type {type(node).__name__}: {node} to {self}")
+        try:
+            getattr(self, node.neighbor_index)[node.id] = node
+        except AttributeError:
+            raise ValueError(f"Error: in adding node of type {type(node).__name__}: {node} to {self}")
 
         self.neighbors[node.id] = node
 
     def remove_neighbor(self, node):
-        match type(node).__name__:
-            case "Course":
-                del self.courses[node.id]
-            case "Activity":
-                del self.activities[node.id]
-            case "Student":
-                del self.students[node.id]
-            case "Timeslot":
-                del self.timeslots[node.id]
-            case "Room":
-                self.room = None
-            case _:
-                raise ValueError(f"Error: in removing node of type {type(node).__name__}: {node} to {self}")
+        try:
+            del getattr(self, node.neighbor_index)[node.id]
+        except AttributeError:
+            raise ValueError(f"Error: in removing node of type {type(node).__name__}: {node} to {self}")
 
         del self.neighbors[node.id]
 
-    # Immutable after import for all nodes except Timeslot
-    @cached_property
+    @property
     def enrolled_students(self):
         return len(self.students)
 
+    def metadata(self) -> dict:
+        """Return metadata attributes of node. Replaces `__dict__`, which slotted nodes do not have."""
+        return {field: getattr(self, field, None) for field in self.metadata_fields}
+
+    def copy(self):
+        """Return new node with the same metadata, but without neighbors."""
+        node = object.__new__(type(self))
+        node.__setstate__(self.metadata())
+        return node
+
+    def copy_links(self, original, nodes: dict):
+        """Link this copy of `original` to the copies in `nodes` of the neighbors of `original`."""
+        for field in self.link_fields:
+            value = getattr(original, field, None)
+            if isinstance(value, dict):
+                setattr(self, field, {uid: nodes[uid] for uid in value})
+            elif value is not None:
+                setattr(self, field, nodes[value.id])
+
+    def __getstate__(self):
+        """Only pickle metadata. Neighbors are restored by `Schedule` from its edges, which keeps pickling shallow."""
+        return self.metadata()
+
+    def __setstate__(self, state: dict):
+        for field, value in state.items():
+            setattr(self, field, value)
+        self.reset_neighbors()
+
     def __repr__(self) -> str:
         return f"{type(self).__name__} {self.id} at {hex(id(self))}"
 
@@ -0,0 +1,45 @@
+class Occupancy:
+    """Booked moments of a node: amount of bookings per moment and a bitset of moments booked at least once.
+
+    Moment `day * periods_per_day + period` is bit of the bitset, so the periods of a day form a 5 bit mask."""
+
+    __slots__ = ("counts", "mask")
+
+    # Amount of periods per day and days per week
+    periods_per_day = 5
+    days = 5
+
+    def __init__(self) -> None:
+        self.counts = [0] * (self.days * self.periods_per_day)
+        self.mask = 0
+
+    def update(self, moment_index: int, delta: int):
+        """Add (`delta` = 1) or remove (`delta` = -1) a booking at `moment_index`."""
+        count = self.counts[moment_index] + delta
+        self.counts[moment_index] = count
+        if count:
+            self.mask |= 1 << moment_index
+        else:
+            self.mask &= ~(1 << moment_index)
+
+    def copy(self):
+        """Return independent copy of booked moments."""
+        occupancy = Occupancy()
+        occupancy.counts = list(self.counts)
+        occupancy.mask = self.mask
+        return occupancy
+
+    def has(self, moment_index: int) -> bool:
+        """Verify whether moment is booked."""
+        return bool(self.mask >> moment_index & 1)
+
+    def day(self, day: int) -> int:
+        """Return mask of booked periods on `day`."""
+        return self.mask >> (day * self.periods_per_day) & ((1 << self.periods_per_day) - 1)
+
+    def double_bookings(self) -> int:
+        """Count bookings at moments that were already booked."""
+        return sum(self.counts) - self.mask.bit_count()
+
+    def __repr__(self) -> str:
+        return f"Occupancy {self.mask:025b}"
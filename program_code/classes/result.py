@@ -1,28 +1,29 @@
 from functools import cached_property
 import numpy as np
 from ..algorithms.statistics import Statistics
+from ..algorithms.bounds import bound_vector, optimality_gap, describe_gap
 from .schedule import Schedule
 import copy
 
+# Names of soft constraint components of the score vector, and their default weights in the score
+SCORE_NAMES = ("evening timeslots", "overbooked students", "single gaps", "double gaps", "triple gaps")
+SCORE_MATRIX = np.array([5, 1, 1, 2, 10])
+
 
 class Result(Statistics):
     """Encapsulating class for schedule and applying operations on it such as calculating score, verifying validity and compression."""
 
+    # Results dumped before seeds were recorded have none
+    seed: int | None = None
+
     def __init__(
         self,
         schedule: Schedule,
         solved: bool | None = None,
         iterations: int | None = None,
-        score_matrix=np.array(
-            [
-                5,
-                1,
-                1,
-                2,
-                10,  # TODO
-            ]
-        ),
+        score_matrix=SCORE_MATRIX,
         score_vector=None,
+        seed: int | None = None,
     ):
         self.schedule = schedule
 
@@ -30,6 +31,8 @@ class Result(Statistics):
         self.solved_input = solved
         # Iterations taken for solution
         self.iterations = iterations
+        # Seed of random generator of the run that made the solution, it is reproduced by solving with this seed
+        self.seed = seed
 
         # Define weights to statistics for score calculation
         self.score_matrix = score_matrix
@@ -153,8 +156,33 @@ class Result(Statistics):
         """Calculate score of `self.schedule`."""
         return self.score_matrix.dot(self.score_vector)
 
-    def update_score(self):
-        """Forget score. Forces recalculation upon next retrieval of `self.score`."""
+    @cached_property
+    def lower_bound_vector(self):
+        """Lower bound on each soft constraint score of any valid schedule of the same input."""
+        return bound_vector(self.schedule, self.score_matrix)
+
+    @cached_property
+    def lower_bound(self) -> float:
+        """Lower bound on score of any valid schedule of the same input."""
+        return self.score_matrix.dot(self.lower_bound_vector)
+
+    @property
+    def optimality_gap(self) -> float:
+        """Relative distance of score to lower bound, 0 if the score is provably optimal."""
+        return optimality_gap(self.score, self.lower_bound)
+
+    def describe_gap(self) -> str:
+        """Optimality gap as percentage, or "n/a" when the lower bound is 0."""
+        return describe_gap(self.score, self.lower_bound)
+
+    @property
+    def state_hash(self) -> int:
+        """Hash of assignments of `self.schedule`, equal for schedules that only differ by swapping equivalent rooms."""
+        return self.schedule.state_hash
+
+    def update_score(self, score_vector=None):
+        """Forget score. Forces recalculation upon next retrieval of `self.score`.
+        A known `score_vector` of the current schedule, eg. from a transposition table, is used instead of recalculating."""
         assert not self._compressed, "Cannot recalculate values in compressed state."
         if "is_solved" in self.__dict__.keys():
             del self.__dict__["is_solved"]
@@ -162,14 +190,26 @@ class Result(Statistics):
             del self.__dict__["score_vector"]
         if "score" in self.__dict__.keys():
             del self.__dict__["score"]
+        if score_vector is not None:
+            self.__dict__["score_vector"] = score_vector
+
+    def reweight(self, score_matrix):
+        """Score by weights `score_matrix` from now on. Only the score vector is needed, so compressed results can be
+        reweighted too. The lower bound depends on the weights, it is forgotten and can only be recalculated uncompressed."""
+        self.score_matrix = np.asarray(score_matrix)
+        for name in ("score", "lower_bound_vector", "lower_bound"):
+            if name in self.__dict__.keys():
+                del self.__dict__[name]
+        return self
 
     def compress(self):
         """Compress `self.schedule`. Keep only solver generated information, throw away data that can be build from prototype."""
         if self._compressed:
             return self
 
-        # Initialize scorevector
+        # Initialize scorevector and lower bound, which can't be calculated without nodes
         self.score_vector
+        self.lower_bound
 
         # Delete all protype data except genereted edges, since entire graph can be rebuild from prototype and edges
         del self.schedule.nodes
@@ -190,8 +230,10 @@ class Result(Statistics):
         courses_input: list[dict],
         rooms_input: list[dict],
         edges_input: set[tuple[int, int]] | None = None,
+        prototype: Schedule | None = None,
     ):
-        """Decompress `self.schedule`. Rebuilds schedule using input data and edges generated by solver."""
+        """Decompress `self.schedule`. Rebuilds schedule using input data and edges generated by solver.
+        If an unsolved `prototype` of the input data is given, it is forked instead of rebuilding from input data."""
         if not self._compressed:
             return self
 
@@ -199,14 +241,31 @@ class Result(Statistics):
         if edges_input is None:
             edges_input = self.schedule.edges
 
-        # Initialize schedule with required data
-        self.schedule.__init__(students_input, courses_input, rooms_input, edges_input)
+        if prototype is not None:
+            # Copy prototype and only add edges generated by solver
+            self.schedule = prototype.fork()
+            self.schedule.restore(set(edges_input))
+        else:
+            # Initialize schedule with required data
+            self.schedule.__init__(students_input, courses_input, rooms_input, edges_input)
         self._compressed = False
         return self
 
     def __str__(self):
         return str(self.__dict__)
 
+    def fork(self):
+        """Copy result. Shares data built from input with original schedule, only copies nodes and edges."""
+        assert not self._compressed, "Can only fork uncompressed results."
+        return Result(
+            self.schedule.fork(),
+            self.solved_input,
+            self.iterations,
+            self.score_matrix,
+            self.score_vector_input,
+            self.seed,
+        )
+
     def deepcopy(
         self,
         students_input: list[dict],
@@ -214,10 +273,14 @@ class Result(Statistics):
         rooms_input: list[dict],
     ):
         """Faster deepcopying method than `copy.deepcopy()`."""
+        if not self._compressed:
+            return self.fork()
+
         return Result(
             Schedule(students_input, courses_input, rooms_input, copy.deepcopy(self.schedule.edges)),
             self.solved_input,
             self.iterations,
             self.score_matrix,
             self.score_vector_input,
+            self.seed,
         )
@@ -8,6 +8,12 @@ class Room(Node):
     - timeslots
     """
 
+    __slots__ = ("name", "capacity")
+
+    neighbor_index = "room"
+    metadata_fields = ("id", "name", "capacity")
+    link_fields = ("neighbors",)
+
     def __init__(self, uid: int, name: str, capacity: int) -> None:
         self.id = uid
 
@@ -16,12 +22,20 @@ class Room(Node):
         self.capacity = capacity
 
         # Neighbors
+        self.reset_neighbors()
+
+    def reset_neighbors(self):
+        """Initialize empty neighbor indices. Room only has timeslots as neighbors."""
         self.neighbors = {}
         self.timeslots = self.neighbors
 
     def remove_neighbor(self, node):
         del self.neighbors[node.id]
 
+    def copy_links(self, original, nodes: dict):
+        super().copy_links(original, nodes)
+        self.timeslots = self.neighbors
+
     def __repr__(self) -> str:
         return f"{self.name}"
 
@@ -1,9 +1,11 @@
+from contextlib import contextmanager
 from .node import NodeSC
 from .student import Student
 from .course import Course
 from .activity import Activity
 from .room import Room
 from .timeslot import Timeslot
+from .zobrist import MASK, assignment_key
 
 
 class Schedule:
@@ -23,6 +25,9 @@ class Schedule:
         self._student_index: dict[int, int] = {}
         self._course_index: dict[str, int] = {}
 
+        # Undo journal of edge changes: tuples of (connected, node1, node2, edge_changed). Only recorded during a transaction.
+        self._journal: list[tuple[bool, NodeSC, NodeSC, bool]] | None = None
+
         # Initialize edges if this is the first initialization
         if not hasattr(self, "edges"):
             # Contains all edges as tuple[id1, id2]
@@ -42,6 +47,88 @@ class Schedule:
         # Add new edges
         self.edges = self.edges.union(self.get_edges(edges_input, students_input))
 
+        # Hash of assignments, kept up to date when edges are added or removed
+        self.state_hash = self.compute_state_hash()
+
+    def __getstate__(self):
+        """Pickle nodes without their neighbors, they are restored from `self.edges`."""
+        state = self.__dict__.copy()
+        # Open transactions are not pickled
+        state["_journal"] = None
+        return state
+
+    def __setstate__(self, state: dict):
+        self._journal = None
+        self.__dict__.update(state)
+
+        # Compressed schedules only hold edges
+        if "nodes" not in state:
+            return
+
+        # Relink nodes, edges are already known
+        for id1, id2 in self.edges:
+            self.connect_nodes(self.nodes[id1], self.nodes[id2], add_edge=False)
+
+        # Schedules pickled before hashing was introduced
+        if "state_hash" not in state:
+            self.state_hash = self.compute_state_hash()
+
+    def fork(self):
+        """Copy schedule without rebuilding it from input data.
+
+        Indices built from input data are shared between copies. Nodes are copied and linked to each other as in
+        this schedule, the indices they keep of booked moments are copied along, so no edge has to be reconnected.
+        Each copy has its own nodes: assignments are kept in the neighbors of nodes, which can't be shared."""
+        clone = Schedule.__new__(Schedule)
+        clone._journal = None
+        clone._id_count = self._id_count
+        clone._student_index = self._student_index
+        clone._course_index = self._course_index
+
+        clone.students = {uid: node.copy() for uid, node in self.students.items()}
+        clone.courses = {uid: node.copy() for uid, node in self.courses.items()}
+        clone.activities = {uid: node.copy() for uid, node in self.activities.items()}
+        clone.rooms = {uid: node.copy() for uid, node in self.rooms.items()}
+        clone.timeslots = {uid: node.copy() for uid, node in self.timeslots.items()}
+        clone.nodes = clone.students | clone.courses | clone.activities | clone.rooms | clone.timeslots
+
+        # Link copied nodes
+        for uid, node in clone.nodes.items():
+            node.copy_links(self.nodes[uid], clone.nodes)
+        clone.edges = set(self.edges)
+        clone.state_hash = self.state_hash
+        return clone
+
+    def compute_state_hash(self) -> int:
+        """Hash of assignments of activities and students to timeslots, see `zobrist`."""
+        state_hash = 0
+        for timeslot in self.timeslots.values():
+            for node in (timeslot.activities | timeslot.students).values():
+                state_hash += assignment_key(node, timeslot)
+        return state_hash & MASK
+
+    def is_assignment_edge(self, edge: tuple[int, int]):
+        """Verify whether `edge` was made by a solver: links a timeslot with an activity or student."""
+        id1, id2 = edge
+        tags = (self.nodes[id1].neighbor_index, self.nodes[id2].neighbor_index)
+        return "timeslots" in tags and ("activities" in tags or "students" in tags)
+
+    def snapshot(self) -> frozenset[tuple[int, int]]:
+        """Return assignment layer of schedule: activity-timeslot and student-timeslot edges."""
+        return frozenset(edge for edge in self.edges if self.is_assignment_edge(edge))
+
+    def restore(self, edges: set[tuple[int, int]] | frozenset[tuple[int, int]]):
+        """Set assignment layer of schedule to that of `edges`. Only changes edges that differ."""
+        # Remove assignments that are not in `edges`
+        for edge in self.edges - edges:
+            if self.is_assignment_edge(edge):
+                id1, id2 = edge
+                self.disconnect_nodes(self.nodes[id1], self.nodes[id2])
+
+        # Add missing edges
+        for id1, id2 in edges - self.edges:
+            self.connect_nodes(self.nodes[id1], self.nodes[id2])
+
     def get_student_nodes(self, students_input: list[dict]):
         """Generate student nodes from `students_input`."""
         students = {}
@@ -168,8 +255,14 @@ class Schedule:
 
         node1.add_neighbor(node2)
         node2.add_neighbor(node1)
+        assignment = self.index_assignment(node1, node2, 1)
         if add_edge:
             self.edges.add(edge)
+            if assignment is not None:
+                self.state_hash = (self.state_hash + assignment_key(*assignment)) & MASK
+
+        if self._journal is not None:
+            self._journal.append((True, node1, node2, add_edge))
         return edge
 
     def disconnect_nodes(self, node1: NodeSC, node2: NodeSC, remove_edge=True, check=False):
@@ -180,10 +273,142 @@ class Schedule:
         node1.remove_neighbor(node2)
         node2.remove_neighbor(node1)
 
+        assignment = self.index_assignment(node1, node2, -1)
         if remove_edge:
             self.edges.remove(edge)
+            if assignment is not None:
+                self.state_hash = (self.state_hash - assignment_key(*assignment)) & MASK
+
+        if self._journal is not None:
+            self._journal.append((False, node1, node2, remove_edge))
         return edge
 
+    @staticmethod
+    def index_assignment(node1: NodeSC, node2: NodeSC, delta: int):
+        """Update indices of assignments after (dis)connecting `node1` and `node2`:
+        - booked moments of students and of bound activities per course
+        - booked timeslots per (student, activity)
+
+        A student has a timeslot for an activity when both are linked to the same timeslot,
+        which is counted when the second of both edges is added and uncounted when the first is removed.
+
+        Returns assigned student or activity and timeslot, or `None` if the nodes are no assignment."""
+        if node1.neighbor_index == "timeslots":
+            timeslot, node = node1, node2
+        elif node2.neighbor_index == "timeslots":
+            timeslot, node = node2, node1
+        else:
+            # Course may be linked after its activity got timeslots, eg. when relinking
+            tags = (node1.neighbor_index, node2.neighbor_index)
+            if tags == ("courses", "activities"):
+                Schedule.index_course_activity(node1, node2, delta)  # type: ignore
+            elif tags == ("activities", "courses"):
+                Schedule.index_course_activity(node2, node1, delta)  # type: ignore
+            return None
+
+        if node.neighbor_index == "students":
+            node.occupancy.update(timeslot.moment_index, delta)
+            pairs = [(node, activity) for activity in timeslot.activities.values()]
+        elif node.neighbor_index == "activities":
+            course = getattr(node, "course", None)
+            if node.max_timeslots and course is not None:
+                course.bound_occupancy.update(timeslot.moment_index, delta)
+            pairs = [(student, node) for student in timeslot.students.values()]
+        else:
+            return None
+
+        for student, activity in pairs:
+            count = student.activity_slots.get(activity.id, 0) + delta
+            if count:
+                student.activity_slots[activity.id] = count
+            else:
+                del student.activity_slots[activity.id]
+        return node, timeslot
+
+    @staticmethod
+    def index_course_activity(course: Course, activity: Activity, delta: int):
+        """Update booked moments of `course` after (dis)connecting it with `activity`."""
+        if not activity.max_timeslots:
+            return
+        for timeslot in activity.timeslots.values():
+            course.bound_occupancy.update(timeslot.moment_index, delta)
+
+    @staticmethod
+    def index_timeslot_moment(timeslot: Timeslot, delta: int):
+        """Add or remove the moment of `timeslot` from the booked moments of its neighbors.
+        Required when the moment of a timeslot changes without (dis)connecting nodes."""
+        for student in timeslot.students.values():
+            student.occupancy.update(timeslot.moment_index, delta)
+        for activity in timeslot.activities.values():
+            if activity.max_timeslots:
+                activity.course.bound_occupancy.update(timeslot.moment_index, delta)
+
+    @property
+    def journal_position(self) -> int | None:
+        """Position in journal of current transaction. `None` if no transaction is active."""
+        if self._journal is None:
+            return None
+        return len(self._journal)
+
+    def begin(self) -> int:
+        """Start recording edge changes in journal, if not already recording. Returns current journal position."""
+        if self._journal is None:
+            self._journal = []
+        return len(self._journal)
+
+    def commit(self):
+        """Accept all recorded changes and stop recording."""
+        self._journal = None
+
+    def rollback(self, position: int = 0):
+        """Undo all changes recorded after journal `position`, in O(changes). Transaction stays active."""
+        journal = self._journal
+        assert journal is not None, "No active transaction to roll back."
+
+        # Do not record the undo operations themselves
+        self._journal = None
+        try:
+            while len(journal) > position:
+                connected, node1, node2, edge_changed = journal.pop()
+                if connected:
+                    self.disconnect_nodes(node1, node2, remove_edge=edge_changed)
+                else:
+                    self.connect_nodes(node1, node2, add_edge=edge_changed)
+        finally:
+            self._journal = journal
+
+    @contextmanager
+    def trial(self):
+        """Context in which edge changes are undone on exit, for scoring changes before applying them.
+        Yields list that holds the changes made when the context is left, which can be applied with `replay`."""
+        journal = self._journal
+        self._journal = []
+        changes: list[tuple[bool, NodeSC, NodeSC, bool]] = []
+        try:
+            yield changes
+        finally:
+            changes.extend(self._journal)
+            self.rollback()
+            self._journal = journal
+
+    def replay(self, changes: list[tuple[bool, NodeSC, NodeSC, bool]]):
+        """Apply edge `changes` recorded in a journal, eg. by `trial`."""
+        for connected, node1, node2, edge_changed in changes:
+            if connected:
+                self.connect_nodes(node1, node2, add_edge=edge_changed)
+            else:
+                self.disconnect_nodes(node1, node2, remove_edge=edge_changed)
+
+    @contextmanager
+    def untracked(self):
+        """Context in which edge changes are not recorded in journal. For temporary changes that are reverted manually."""
+        journal = self._journal
+        self._journal = None
+        try:
+            yield self
+        finally:
+            self._journal = journal
+
     def get_edges(self, edges: set[tuple[int, int]] | None = None, students_input: list[dict] | None = None):
         """Build edges between nodes from optional `edges` data and student enrolments `students_input`."""
         new_edges: set[tuple[int, int]] = set()
@@ -194,6 +419,9 @@ class Schedule:
                 id1, id2 = edge
                 node1 = self.nodes[id1]
                 node2 = self.nodes[id2]
+                # Courses are already linked with their activities, relinking would book their moments twice
+                if id2 in node1.neighbors:
+                    continue
                 new_edge = self.connect_nodes(node1, node2, add_edge=False)
                 if new_edge:
                     new_edges.add(new_edge)
@@ -1,4 +1,5 @@
 from .node import Node
+from .occupancy import Occupancy
 
 
 class Student(Node):
@@ -10,6 +11,12 @@ class Student(Node):
     - timeslots
     """
 
+    __slots__ = ("name", "surname", "std_id", "activity_slots", "occupancy")
+
+    neighbor_index = "students"
+    metadata_fields = ("id", "name", "surname", "std_id")
+    link_fields = ("neighbors", "courses", "activities", "timeslots")
+
     def __init__(
         self,
         uid: int,
@@ -25,11 +32,25 @@ class Student(Node):
         self.std_id = std_id
 
         # Neighbors
+        self.reset_neighbors()
+
+    def reset_neighbors(self):
+        """Initialize empty neighbor indices."""
         self.neighbors = {}
         self.courses = {}
         self.activities = {}
         self.timeslots = {}
 
+        # Index of amount of booked timeslots per activity id, maintained by `Schedule`
+        self.activity_slots: dict[int, int] = {}
+        # Booked moments, maintained by `Schedule`
+        self.occupancy = Occupancy()
+
+    def copy_links(self, original, nodes: dict):
+        super().copy_links(original, nodes)
+        self.activity_slots = dict(original.activity_slots)
+        self.occupancy = original.occupancy.copy()
+
     def __repr__(self) -> str:
         """Output representation of information."""
         # return f"{self.surname}, {self.name} ({self.std_id}): {self.courses}"
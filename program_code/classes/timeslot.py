@@ -1,4 +1,3 @@
-from functools import cached_property
 from .node import Node
 from .room import Room
 
@@ -12,6 +11,16 @@ class Timeslot(Node):
     - activities
     """
 
+    __slots__ = ("day", "period", "moment", "moment_index", "room", "_capacity")
+
+    neighbor_index = "timeslots"
+    metadata_fields = ("id", "day", "period", "moment")
+    link_fields = ("neighbors", "room", "students", "activities", "courses")
+
+    # Shared constant tables: starting hour of periods and names of days
+    period_names = (9, 11, 13, 15, 17)
+    day_names = ("ma", "di", "wo", "do", "vr")
+
     def __init__(self, uid: int, day: int, period: int) -> None:
         self.id = uid
 
@@ -19,16 +28,26 @@ class Timeslot(Node):
         self.day = day
         self.period = period
         self.moment = (day, period)
+        # Index of moment in week, bit of moment in `Occupancy` bitsets
+        self.moment_index = day * len(self.period_names) + period
 
         # Neighbors
+        self.reset_neighbors()
+
+    def __setstate__(self, state: dict):
+        super().__setstate__(state)
+        self.moment_index = self.day * len(self.period_names) + self.period
+
+    def reset_neighbors(self):
+        """Initialize empty neighbor indices."""
         self.neighbors = {}
         self.room: Room
         self.students = {}
         self.activities = {}
         self.courses = {}
 
-        self.period_names = [i for i in range(9, 19, 2)]
-        self.day_names = ["ma", "di", "wo", "do", "vr"]
+        # Capacity depends on linked activities, it is calculated upon first retrieval
+        self._capacity: int | None = None
 
     # Mutable, do not cache
     @property
@@ -44,19 +63,36 @@ class Timeslot(Node):
                     min_capacity = activity.capacity
         return min_capacity
 
-    @cached_property
+    @property
     def capacity(self) -> int:
-        return self.calculate_capacity()
+        if self._capacity is None:
+            self._capacity = self.calculate_capacity()
+        return self._capacity
+
+    def invalidate_capacity(self):
+        """Forget calculated capacity. Required whenever the activities linked to this timeslot change."""
+        self._capacity = None
 
     def add_neighbor(self, node):
-        if type(node).__name__ == "Activity" and "capacity" in self.__dict__.keys():
-            del self.__dict__["capacity"]
+        if node.neighbor_index == "room":
+            self.room = node
+            self.neighbors[node.id] = node
+            return
+        if node.neighbor_index == "activities":
+            self.invalidate_capacity()
         return super().add_neighbor(node)
 
-    def remove_neighbor(self, node):
-        if "capacity" in self.__dict__.keys() and node.__class__.__name__ == "Activity":
-            del self.__dict__["capacity"]
+    def copy_links(self, original, nodes: dict):
+        super().copy_links(original, nodes)
+        self._capacity = original._capacity
 
+    def remove_neighbor(self, node):
+        if node.neighbor_index == "room":
+            self.room = None  # type: ignore
+            del self.neighbors[node.id]
+            return
+        if node.neighbor_index == "activities":
+            self.invalidate_capacity()
         return super().remove_neighbor(node)
 
     def __repr__(self) -> str:
@@ -0,0 +1,25 @@
+"""
+Zobrist hashing of the assignment state of a schedule.
+
+Each assignment of an activity or student to a timeslot gets a pseudo random 64 bit key, the hash of a schedule is the
+sum of the keys of its assignments. A (dis)connection adds or subtracts one key, so the hash is kept up to date
+incrementally. Keys depend on the capacity of the room instead of the room itself: timeslots at the same moment in rooms
+of equal capacity are interchangeable, so schedules that only differ by swapping those get the same hash.
+Sums are used instead of the usual exclusive or: a student booked twice at the same moment in equivalent rooms would
+otherwise cancel out to not being booked at all.
+"""
+
+MASK = (1 << 64) - 1
+
+
+def splitmix64(x: int) -> int:
+    """Mix bits of `x` into a pseudo random 64 bit integer."""
+    x = (x + 0x9E3779B97F4A7C15) & MASK
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK
+    return x ^ (x >> 31)
+
+
+def assignment_key(node, timeslot) -> int:
+    """Key of assigning activity or student `node` to `timeslot`: of its id, capacity of room and moment."""
+    return splitmix64((node.id << 24) | (timeslot.room.capacity << 6) | timeslot.moment_index)
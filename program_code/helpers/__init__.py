@@ -1 +1,3 @@
-from .data import InputData, load_pickle, pickle_cache, dump_result, prepare_path, schedule_to_csv
+from .data import InputData, load_pickle, pickle_cache, dump_result, prepare_path, schedule_to_csv, timetable_index
+from .writer import OutputWriter, get_writer, close_writer, render_headless
+from .ranking import load_scores, rank, pareto_front
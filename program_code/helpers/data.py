@@ -33,9 +33,15 @@ def dump_pickle(data, output: str):
 
 
 def dump_result(data, directory: str):
+    """Dump `data` to a timestamped file in `directory`. Score vectors of results are also saved in a sidecar,
+    so they can be ranked without loading the results, see `ranking`."""
+    # Ranking imports this module
+    from .ranking import dump_scores
+
     time_string = time.strftime("%Y%m%d-%H%M%S")
     path = directory + time_string + ".pyc"
     dump_pickle(data, path)
+    dump_scores(data, path)
     return path
 
 
@@ -66,6 +72,9 @@ def pickle_cache(func: Callable, verbose: bool = False):
                 print("Found cached data. Loading from cache instead.")
         except FileNotFoundError:
             data = dump_pickle(func(*args, **kwds), output)
+        except (AttributeError, TypeError, EOFError, pickle.UnpicklingError):
+            # Cached data was written by an incompatible version of the classes, rebuild it
+            data = dump_pickle(func(*args, **kwds), output)
         return data
 
     return wrapper
@@ -76,6 +85,22 @@ def csv_to_dicts(input_file: str):
         return [row for row in csv.DictReader(file)]
 
 
+def timetable_index(schedule):
+    """Return timetable entries of all students, courses and rooms, without changing `schedule`.
+
+    Entries are tuples of (kind, entity id, moment index, timeslot, activity), sorted by kind, entity and moment,
+    so the timetable of each entity is a consecutive run of entries."""
+    entries = []
+    for timeslot in schedule.timeslots.values():
+        for activity in timeslot.activities.values():
+            entries.append(("room", timeslot.room.id, timeslot.moment_index, timeslot, activity))
+            entries.append(("course", activity.course.id, timeslot.moment_index, timeslot, activity))
+            for student in timeslot.students.values():
+                entries.append(("student", student.id, timeslot.moment_index, timeslot, activity))
+    entries.sort(key=lambda entry: entry[:3])
+    return entries
+
+
 def schedule_to_csv(schedule, output_path: str = "output/Schedule_output.csv", verbose=False):
     """Program to convert a schedule object into a csv file."""
     # columns
@@ -89,19 +114,19 @@ def schedule_to_csv(schedule, output_path: str = "output/Schedule_output.csv", v
         # write the header
         writer.writerow(field_names)
 
-        # write the data
-        for student in schedule.students.values():
-            for timeslot in student.timeslots.values():
-                for activity in timeslot.activities.values():
-                    data = [
-                        student.name,
-                        activity.course.name,
-                        activity.act_type,
-                        timeslot.room.name,
-                        timeslot.day_names[timeslot.day],
-                        timeslot.period_names[timeslot.period],
-                    ]
-                    writer.writerow(data)
+        # write the data, timetables of students one after the other
+        writer.writerows(
+            [
+                schedule.students[uid].name,
+                activity.course.name,
+                activity.act_type,
+                timeslot.room.name,
+                timeslot.day_names[timeslot.day],
+                timeslot.period_names[timeslot.period],
+            ]
+            for kind, uid, moment_index, timeslot, activity in timetable_index(schedule)
+            if kind == "student"
+        )
 
         if verbose:
             print(f"output saved to {output_path}")
@@ -0,0 +1,85 @@
+"""
+Ranking of stored results by their score vectors, without loading or decompressing schedules.
+
+`dump_result` saves the score vectors of dumped results next to the pickle, in a `.scores.npz` sidecar. The score
+is a weighted sum of the score vector, so results can be re-ranked under any weights by a single matrix product.
+The Pareto front holds the results that are not beaten on every soft constraint by another result: the best result
+under any choice of (non-negative) weights is on the front.
+"""
+
+import os
+import numpy as np
+from .data import load_pickle
+
+SIDECAR_SUFFIX = ".scores.npz"
+
+
+def scores_path(path: str):
+    """Path of sidecar with score vectors of results dumped at `path`."""
+    return os.path.splitext(path)[0] + SIDECAR_SUFFIX
+
+
+def is_result(data):
+    """Whether `data` is a result, checked by its attributes since results can't be imported here."""
+    return hasattr(data, "score_matrix") and hasattr(data, "schedule")
+
+
+def dump_scores(data, path: str):
+    """Save score vectors and hashes of result or list of results `data` dumped at `path`.
+    Returns path of sidecar, or `None` if `data` holds no results."""
+    results = data if isinstance(data, list) else [data]
+    if len(results) == 0 or not all(is_result(result) for result in results):
+        return None
+
+    output = scores_path(path)
+    np.savez(
+        output,
+        score_vectors=np.array([result.score_vector for result in results]),
+        state_hashes=np.array([getattr(result.schedule, "state_hash", 0) for result in results], dtype=np.uint64),
+        score_matrix=np.asarray(results[0].score_matrix),
+    )
+    return output
+
+
+def load_scores(paths: list[str]):
+    """Load score vectors of results dumped at `paths`.
+
+    Returns array of score vectors and list of (path, index in dump) of each vector. Reads the sidecar of a dump if
+    there is one, else the score vectors cached in the dumped results."""
+    vectors = []
+    sources: list[tuple[str, int]] = []
+    for path in paths:
+        sidecar = path if path.endswith(SIDECAR_SUFFIX) else scores_path(path)
+        if os.path.exists(sidecar):
+            path_vectors = list(np.load(sidecar)["score_vectors"])
+        else:
+            data = load_pickle(path)
+            results = data if isinstance(data, list) else [data]
+            path_vectors = [result.score_vector for result in results if is_result(result)]
+
+        vectors.extend(path_vectors)
+        sources.extend((path, index) for index in range(len(path_vectors)))
+    return np.array(vectors).reshape(len(vectors), -1), sources
+
+
+def rank(score_vectors: np.ndarray, score_matrix):
+    """Return scores of `score_vectors` under weights `score_matrix`, and indices of vectors from best to worst."""
+    scores = score_vectors @ np.asarray(score_matrix)
+    return scores, np.argsort(scores, kind="stable")
+
+
+def pareto_front(score_vectors: np.ndarray):
+    """Indices of score vectors not dominated by another: no other vector is as low on each component and lower on one.
+
+    Vectors are visited by ascending sum. A dominating vector has a lower sum, so it is on the front before any vector
+    it dominates is visited."""
+    front: list[int] = []
+    for index in np.argsort(score_vectors.sum(axis=1), kind="stable"):
+        vector = score_vectors[index]
+        if front:
+            others = score_vectors[front]
+            dominated = np.any(np.all(others <= vector, axis=1) & np.any(others < vector, axis=1))
+            if dominated:
+                continue
+        front.append(int(index))
+    return np.array(front, dtype=int)
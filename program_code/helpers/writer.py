@@ -0,0 +1,68 @@
+"""Background writer for output: dumps, exports and plots run in a thread, so solving doesn't wait for them."""
+
+import os
+import warnings
+import multiprocessing.util
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+
+
+class OutputWriter:
+    """Runs output tasks in a background thread, one at a time in order of submission.
+    `flush` waits for all submitted tasks, `close` also stops the thread."""
+
+    def __init__(self) -> None:
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="output-writer")
+        self.futures: list[Future] = []
+
+    def submit(self, function, *args, **kwargs) -> Future:
+        """Run `function(*args, **kwargs)` in background. Arguments may not be changed until it has run."""
+        future = self.executor.submit(function, *args, **kwargs)
+        self.futures.append(future)
+        return future
+
+    def flush(self):
+        """Wait for submitted tasks. Raises the first error of a failed task."""
+        futures, self.futures = self.futures, []
+        wait(futures)
+        for future in futures:
+            if future.exception() is not None:
+                raise future.exception()  # type: ignore
+
+    def close(self):
+        """Finish submitted tasks and stop thread. Errors are only warned about, as this runs on exit."""
+        try:
+            self.flush()
+        except Exception as error:
+            warnings.warn(f"Output task failed: {type(error).__name__}: {error}")
+        self.executor.shutdown(wait=True)
+
+
+# Writer of this process, and id of the process it belongs to: forked processes don't inherit its thread
+_writer: OutputWriter | None = None
+_writer_pid: int | None = None
+
+
+def get_writer() -> OutputWriter:
+    """Return output writer of this process, it is flushed and closed when the process exits."""
+    global _writer, _writer_pid
+    if _writer is None or _writer_pid != os.getpid():
+        _writer = OutputWriter()
+        _writer_pid = os.getpid()
+        # Finalizers also run when pool workers exit, unlike `atexit` handlers
+        multiprocessing.util.Finalize(None, close_writer, exitpriority=100)
+    return _writer
+
+
+def close_writer():
+    """Flush and close output writer of this process, if there is one."""
+    global _writer
+    if _writer is not None and _writer_pid == os.getpid():
+        _writer.close()
+        _writer = None
+
+
+def render_headless():
+    """Render figures to files only. Interactive backends can't draw from the writer thread."""
+    import matplotlib
+
+    matplotlib.use("Agg")
@@ -1,5 +1,29 @@
-"""Visualization functions and classes."""
-from .visualize_graph import visualize_graph
-from .histogram import plot_histogram
-from .heatmap import Heatmap
-from .timetable import plot_timetable
+"""Visualization functions and classes.
+
+Submodules depend on heavy libraries (matplotlib), so they are only imported on first use.
+"""
+import importlib
+
+# Public name -> submodule that defines it
+_LAZY_ATTRIBUTES = {
+    "visualize_graph": ".visualize_graph",
+    "plot_histogram": ".histogram",
+    "Heatmap": ".heatmap",
+    "ConflictScorer": ".conflicts",
+    "plot_timetable": ".timetable",
+    "export_timetables": ".export",
+}
+
+__all__ = list(_LAZY_ATTRIBUTES.keys())
+
+
+def __getattr__(name: str):
+    """Import submodule defining `name` upon first access."""
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    module = importlib.import_module(_LAZY_ATTRIBUTES[name], __name__)
+    value = getattr(module, name)
+    # Cache in module namespace, this also overrides the submodule attribute set by the import system
+    globals()[name] = value
+    return value
@@ -0,0 +1,104 @@
+"""
+Conflict scores per (room, day, period) of schedules, computed with numpy instead of per timeslot.
+
+The score of a timeslot is that of `Result.sub_score`: its evening penalty plus the overbooking and gap scores
+of all its students. Only edges of a schedule are needed, so compressed results loaded from disk are scored
+without rebuilding their schedules. Computing is kept apart from rendering, so heatmaps can be made headless.
+"""
+
+import numpy as np
+from ..algorithms.statistics import GAPS_PER_DAY_MASK
+from ..classes import Schedule
+from ..classes.occupancy import Occupancy
+from ..classes.result import Result, SCORE_MATRIX
+
+
+class ConflictScorer:
+    """Scores timeslots of schedules of one input. Takes an (unsolved) schedule of that input, eg. its prototype."""
+
+    def __init__(self, schedule: Schedule, score_matrix: np.ndarray = SCORE_MATRIX):
+        self.score_matrix = np.asarray(score_matrix)
+
+        # Rooms in order of name, any set of rooms can be scored
+        self.rooms = sorted(room.name for room in schedule.rooms.values())
+        self.shape = (len(self.rooms), Occupancy.days, Occupancy.periods_per_day)
+        self.moments = Occupancy.days * Occupancy.periods_per_day
+
+        # Lookup tables by node id: row of student, row of timeslot, -1 for other nodes
+        size = max(schedule.nodes) + 1
+        self.student_row = np.full(size, -1)
+        self.student_row[list(schedule.students)] = np.arange(len(schedule.students))
+        self.timeslot_row = np.full(size, -1)
+        self.timeslot_row[list(schedule.timeslots)] = np.arange(len(schedule.timeslots))
+
+        # Position of each timeslot in heatmap, and its moment
+        timeslots = list(schedule.timeslots.values())
+        room_index = {name: index for index, name in enumerate(self.rooms)}
+        self.timeslot_room = np.array([room_index[timeslot.room.name] for timeslot in timeslots])
+        self.timeslot_day = np.array([timeslot.day for timeslot in timeslots])
+        self.timeslot_period = np.array([timeslot.period for timeslot in timeslots])
+        self.timeslot_moment = np.array([timeslot.moment_index for timeslot in timeslots])
+
+        self.n_students = len(schedule.students)
+        self.n_timeslots = len(timeslots)
+        self.gaps_per_day_mask = np.array(GAPS_PER_DAY_MASK)
+
+    def bookings(self, edges):
+        """Return rows of student and timeslot of each student-timeslot edge in `edges`."""
+        pairs = np.array(list(edges)).reshape(-1, 2)
+        # Edges are not ordered by node type, take each pair both ways
+        pairs = np.concatenate((pairs, pairs[:, ::-1]))
+        students = self.student_row[pairs[:, 0]]
+        timeslots = self.timeslot_row[pairs[:, 1]]
+        booking = (students >= 0) & (timeslots >= 0)
+        return students[booking], timeslots[booking]
+
+    def student_scores(self, students: np.ndarray, timeslots: np.ndarray):
+        """Score of overbooked moments and gaps of every student."""
+        counts = np.bincount(
+            students * self.moments + self.timeslot_moment[timeslots], minlength=self.n_students * self.moments
+        ).reshape(self.n_students, self.moments)
+        booked = counts > 0
+        overbooked = counts.sum(axis=1) - booked.sum(axis=1)
+
+        # Mask of booked periods per day, gaps are looked up like `Statistics.gap_periods_student`
+        day_masks = (booked.reshape(self.n_students, Occupancy.days, -1) << np.arange(Occupancy.periods_per_day)).sum(
+            axis=2
+        )
+        gaps = np.minimum(self.gaps_per_day_mask[day_masks], 3)
+        gap_frequency = [(gaps == n).sum(axis=1) for n in (1, 2, 3)]
+
+        vectors = np.stack([np.zeros(self.n_students, dtype=int), overbooked, *gap_frequency], axis=1)
+        return vectors @ self.score_matrix
+
+    def score(self, edges) -> np.ndarray:
+        """Conflict score of each timeslot of schedule with `edges`, as array of shape (rooms, days, periods).
+        Moments without timeslot in a room score 0."""
+        students, timeslots = self.bookings(edges)
+        timeslot_scores = np.bincount(timeslots, weights=self.student_scores(students, timeslots)[students])
+        timeslot_scores = np.pad(timeslot_scores, (0, self.n_timeslots - len(timeslot_scores)))
+
+        # Evening penalty of timeslots with students
+        enrolled = np.bincount(timeslots, minlength=self.n_timeslots)
+        timeslot_scores += self.score_matrix[0] * ((self.timeslot_period == 4) & (enrolled > 0))
+
+        heat = np.zeros(self.shape)
+        heat[self.timeslot_room, self.timeslot_day, self.timeslot_period] = timeslot_scores
+        return heat
+
+    def score_population(self, results: list[Result]) -> np.ndarray:
+        """Conflict scores of all `results`, which may be compressed. Returns array of shape (results, rooms, days, periods)."""
+        return np.stack([self.score(result.schedule.edges) for result in results])
+
+
+def aggregate(heats: np.ndarray, quantiles=(0.5, 0.9)):
+    """Mean and quantiles per (room, day, period) over a population of conflict scores."""
+    summary = {"mean": heats.mean(axis=0)}
+    for q in quantiles:
+        summary[f"q{round(q * 100)}"] = np.quantile(heats, q, axis=0)
+    return summary
+
+
+def to_grid(heat: np.ndarray):
+    """Lay out scores of shape (rooms, days, periods) as rows of periods and columns of rooms per day."""
+    return heat.transpose(2, 1, 0).reshape(heat.shape[2], -1)
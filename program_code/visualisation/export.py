@@ -0,0 +1,88 @@
+"""
+Batch export of the timetables of all students, courses and rooms of a schedule.
+
+All timetables are read from one sorted index of the schedule, and written in a single pass over it.
+Plotting timetables is optional and spread over a process pool, as matplotlib renders slowly.
+"""
+
+import os
+import csv
+import json
+import itertools
+import multiprocessing
+from ..helpers import prepare_path, timetable_index
+from ..classes import Schedule
+
+FIELD_NAMES = ["dag", "tijdslot", "vak", "activiteit", "zaal", "studenten"]
+
+
+def entity_name(schedule: Schedule, kind: str, uid: int):
+    """File name of timetable of entity: student number, or name of course or room."""
+    match kind:
+        case "student":
+            return str(schedule.students[uid].std_id)
+        case "course":
+            return schedule.courses[uid].name.replace("/", "-")
+        case "room":
+            return schedule.rooms[uid].name.replace("/", "-")
+    raise ValueError(f"Invalid kind {kind}.")
+
+
+def render_worker(arguments):
+    """Render timetable in worker process, matplotlib is only imported there."""
+    from .timetable import render_timetable
+
+    render_timetable(*arguments)
+
+
+def export_timetables(
+    schedule: Schedule,
+    output_directory: str = "output/timetables",
+    formats=("csv", "json"),
+    png=False,
+    processes: int | None = None,
+):
+    """Write timetable of every student, course and room to `output_directory`/`kind`/`name`.`format`.
+    Rows hold the students of the timeslot for courses and rooms. Returns amount of timetables written."""
+    entries = timetable_index(schedule)
+    renders = []
+    count = 0
+
+    for (kind, uid), timetable in itertools.groupby(entries, key=lambda entry: entry[:2]):
+        timetable = [(timeslot, activity) for kind, uid, moment_index, timeslot, activity in timetable]
+        name = entity_name(schedule, kind, uid)
+        path = os.path.join(output_directory, kind, name)
+        rows = [
+            [
+                timeslot.day_names[timeslot.day],
+                timeslot.period_names[timeslot.period],
+                activity.course.name,
+                activity.act_type,
+                timeslot.room.name,
+                "" if kind == "student" else " ".join(str(student.std_id) for student in timeslot.students.values()),
+            ]
+            for timeslot, activity in timetable
+        ]
+        prepare_path(path)
+
+        if "csv" in formats:
+            with open(path + ".csv", "w") as csvfile:
+                writer = csv.writer(csvfile)
+                writer.writerow(FIELD_NAMES)
+                writer.writerows(rows)
+        if "json" in formats:
+            with open(path + ".json", "w") as jsonfile:
+                json.dump([dict(zip(FIELD_NAMES, row)) for row in rows], jsonfile)
+        if png:
+            # Plain data of blocks, so only little has to be sent to the workers
+            blocks = [
+                (timeslot.day, timeslot.period, timeslot.room.name, activity.course.name + "\n" + activity.act_type)
+                for timeslot, activity in timetable
+            ]
+            renders.append((f"{kind} {name}", blocks, path + ".png"))
+        count += 1
+
+    if len(renders) > 0:
+        with multiprocessing.Pool(processes) as pool:
+            pool.map(render_worker, renders, chunksize=8)
+    return count
@@ -18,38 +18,34 @@ import numpy as np
 from ..helpers.data import InputData, load_pickle
 from ..algorithms import generate_solutions, Randomizer
 from ..classes import Schedule
-from ..classes.result import Result
+from .conflicts import ConflictScorer, to_grid
 
 
 # DEFINE CONSTANTS
 WEEK_DAYS = ["MA", "DI", "WO", "DO", "VR"]
-ROOMS = ["A1.04", "A1.06", "A1.08", "A1.10", "B0.201", "C0.110", "C1.112"]  # col labels
 PERIODS = ["9-11", "11-13", "13-15", "15-17", "17-19"]  # row labels
 COLORS = ["pink", "lightgreen", "lightblue", "wheat", "salmon", "red", "yellow"]
 
 
 class Heatmap:
-    def __init__(self, schedule: Schedule, verbose=False) -> None:
+    """Conflict heatmap of a schedule. Scores are computed on initialization, plots are only made when asked for
+    with `timetable` and `plot_heatmap`.
+
+    Instead of scoring `schedule`, precomputed scores `heat` of shape (rooms, days, periods) can be plotted,
+    eg. the mean over a population made with `ConflictScorer`."""
+
+    def __init__(self, schedule: Schedule, verbose=False, heat: np.ndarray | None = None) -> None:
         self.verbose = verbose
         # timeslots in order of day - period - room
         self.timeslots = sorted(list(schedule.timeslots.values()), key=lambda x: x.moment)
-        self.data = self._create_array(schedule)
-        self.timetableplot = self.timetable()
-        self.heatmapview = self.plot_heatmap()
 
-    def _create_array(self, schedule: Schedule):
-        """Creates array of subscores from result.py of 35 (5 days * 7 rooms) by 5 (periods)"""
-        # Initialize empty array for heatmap
-        heat = Result(schedule)
-        shape = (5, 35)
-        mat = np.zeros(shape, dtype=int)
-
-        for timeslot in self.timeslots:
-            subheat = heat.sub_score(timeslot)
-            row = timeslot.period
-            column = ROOMS.index(timeslot.room.name) + (len(ROOMS) * timeslot.day)
-            mat[row][column] = subheat
-        return mat
+        scorer = ConflictScorer(schedule)
+        # Column labels, rooms in order of name
+        self.rooms = scorer.rooms
+        if heat is None:
+            heat = scorer.score(schedule.edges)
+        # Rows of periods, columns of rooms per day
+        self.data = to_grid(heat)
 
     def timetable(self):
         """Creates full timetable plot for all rooms in the week"""
@@ -68,12 +64,12 @@ class Heatmap:
         plt.ylim(19, 9)
         plt.yticks(range(9, 21, 2))
 
-        # Set x-axis for all 7 rooms for every day of the work week
+        # Set x-axis for all rooms for every day of the work week
         for day in WEEK_DAYS:
             weekday_plot = WEEK_DAYS.index(day)
-            ax[weekday_plot].set_xlim(-0.5, len(ROOMS) - 0.5)
-            ax[weekday_plot].set_xticks(range(0, len(ROOMS)), rotation=-30, ha="right", rotation_mode="anchor")
-            ax[weekday_plot].set_xticklabels(ROOMS, fontsize=5, rotation=-30, ha="right", rotation_mode="anchor")
+            ax[weekday_plot].set_xlim(-0.5, len(self.rooms) - 0.5)
+            ax[weekday_plot].set_xticks(range(0, len(self.rooms)))
+            ax[weekday_plot].set_xticklabels(self.rooms, fontsize=5, rotation=-30, ha="right", rotation_mode="anchor")
             # Let the horizontal axes labeling appear on top
             ax[weekday_plot].tick_params(top=True, bottom=False, labeltop=True, labelbottom=False)
 
@@ -84,14 +80,15 @@ class Heatmap:
                 continue
             activity = activities[0]
             event = activity.course.name + "\n" + activity.act_type
-            room = ROOMS.index(timeslot.room.name) - 0.48
+            room_index = self.rooms.index(timeslot.room.name)
+            room = room_index - 0.48
             period = timeslot.period_names[timeslot.period]
             end = period + 2
             ax[timeslot.day].fill_between(
                 [room, room + 0.96],
                 period,
                 end,
-                color=COLORS[ROOMS.index(timeslot.room.name)],
+                color=COLORS[room_index % len(COLORS)],
                 edgecolor="k",
                 linewidth=0.5,
             )
@@ -99,6 +96,8 @@ class Heatmap:
                 room + 0.48, (period + end) * 0.5, event, ha="center", va="center", fontsize=5, rotation=90
             )
 
+        plt.savefig(output_path, dpi=200)
+        plt.close(fig)
         if self.verbose:
             print(f"Timetable plot saved to {output_path}")
 
@@ -150,7 +149,7 @@ class Heatmap:
         kw.update(textkw)
 
         # Get the formatter in case a string is supplied
-        valfmt = matplotlib.ticker.StrMethodFormatter("{x}")  # type: ignore
+        valfmt = matplotlib.ticker.StrMethodFormatter("{x:.3g}")  # type: ignore
 
         # Loop over the data and create a `Text` for each "pixel".
         # Change the text's color depending on the data.
@@ -164,21 +163,23 @@ class Heatmap:
 
         return texts
 
-    def plot_heatmap(self, vmax=False):
+    def plot_heatmap(self, vmax=False, output_path="output/heatmap.png"):
         """Plots heatmap using correct dimensions"""
-        output_path = f"output/heatmap.png"
-        plt.rcParams["figure.figsize"] = [10, 3.50]
+        # Widen figure with amount of rooms
+        plt.rcParams["figure.figsize"] = [10 * max(len(self.rooms) / 7, 1), 3.50]
         plt.rcParams["figure.autolayout"] = True
         fig, ax = plt.subplots()
+        col_labels = self.rooms * len(WEEK_DAYS)
         if vmax:
             im, cbar = self.heatmap(
-                PERIODS, ROOMS * 5, ax, cmap="rainbow", vmin=0, vmax=20, cbarlabel="conflict [score/period]"
+                PERIODS, col_labels, ax, cmap="rainbow", vmin=0, vmax=20, cbarlabel="conflict [score/period]"
             )
         else:
-            im, cbar = self.heatmap(PERIODS, ROOMS * 5, ax, cmap="rainbow", vmin=0, cbarlabel="conflict [score/period]")
+            im, cbar = self.heatmap(PERIODS, col_labels, ax, cmap="rainbow", vmin=0, cbarlabel="conflict [score/period]")
         texts = self.annotate_heatmap(im, size=7)
 
         fig.tight_layout()
         if self.verbose:
             print(f"Heatmap saved to {output_path}")
         plt.savefig(output_path, dpi=200)
+        plt.close(fig)
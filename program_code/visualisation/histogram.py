@@ -3,8 +3,8 @@ import matplotlib.pyplot as plt
 from ..classes.result import Result
 
 
-def plot_histogram(results: list[Result]):
-    """Plot histogram of result scores. Seperate plots per score dimension."""
+def plot_histogram(results: list[Result], output_path="output/image.png", show=True):
+    """Plot histogram of result scores. Seperate plots per score dimension. Without `show`, only save it."""
     evening_timeslots = [result.score_vector[0] for result in results]
     student_overbookings = [result.score_vector[1] for result in results]
     gaps_1, gaps_2, gaps_3 = [[result.score_vector[i] for result in results] for i in range(2, 5)]
@@ -38,5 +38,8 @@ def plot_histogram(results: list[Result]):
     axg1.hist(gaps_3, 100)
     axg1.set_title(f">2 gaps \n mean: ${np.mean(gaps_3):.2f} ± {np.std(gaps_3):.2f}$")
 
-    plt.savefig("output/image.png")
-    plt.show()
+    plt.savefig(output_path)
+    if show:
+        plt.show()
+    else:
+        plt.close(fig)
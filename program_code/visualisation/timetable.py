@@ -14,6 +14,7 @@ import csv, argparse, random, warnings
 import matplotlib.pyplot as plt
 from ..helpers import InputData, prepare_path
 from ..algorithms import generate_solutions, Randomizer, Schedule
+from ..classes import Timeslot
 
 WEEK_DAYS = ["MA", "DI", "WO", "DO", "VR"]
 ROOMS = ["A1.04", "A1.06", "A1.08", "A1.10", "B0.201", "C0.110", "C1.112"]
@@ -36,11 +37,20 @@ def csv_timetable(schedule: Schedule, spec: str | None = None):
             room_sched_csv(schedule)
 
 
+def entity_timeslots(entity):
+    """Timeslots booked for student, course or room `entity`, in order of moment. Doesn't change the schedule."""
+    if entity.neighbor_index == "courses":
+        timeslots = [timeslot for activity in entity.activities.values() for timeslot in activity.timeslots.values()]
+    else:
+        timeslots = list(entity.timeslots.values())
+    return sorted(timeslots, key=lambda x: x.moment_index)
+
+
 def stud_sched_csv(schedule: Schedule):
     """ "Exports timetable for random student in csv format"""
     # generate student information from random student in schedule
-    student = random.choice(schedule.students)
-    timeslots = sorted(list(student.timeslots.values()), key=lambda x: x.moment)
+    student = random.choice(list(schedule.students.values()))
+    timeslots = entity_timeslots(student)
 
     # output path + file name
     output_path = f"output/{student.name}_schedule_output.csv"
@@ -55,16 +65,17 @@ def stud_sched_csv(schedule: Schedule):
         writer.writerow(field_names)
 
         # write the data
-        for timeslot in timeslots:
-            for activity in timeslot.activities.values():
-                data = [
-                    timeslot.day_names[timeslot.day],
-                    timeslot.period_names[timeslot.period],
-                    activity.course.name,
-                    activity.act_type,
-                    timeslot.room.name,
-                ]
-                writer.writerow(data)
+        writer.writerows(
+            [
+                timeslot.day_names[timeslot.day],
+                timeslot.period_names[timeslot.period],
+                activity.course.name,
+                activity.act_type,
+                timeslot.room.name,
+            ]
+            for timeslot in timeslots
+            for activity in timeslot.activities.values()
+        )
 
         print(f"output saved to {output_path}")
         return student
@@ -74,10 +85,7 @@ def course_sched_csv(schedule: Schedule):
     """ "Exports timetable for random course in csv format"""
     # generate course information from random course in schedule
     course = random.choice(list(schedule.courses.values()))
-    for activity in course.activities.values():
-        for timeslot in activity.timeslots.values():
-            schedule.connect_nodes(course, timeslot)
-    timeslots = sorted(list(course.timeslots.values()), key=lambda x: x.moment)
+    timeslots = entity_timeslots(course)
 
     # output path + file name
     output_path = f"output/{course.name}_schedule_output.csv"
@@ -93,16 +101,17 @@ def course_sched_csv(schedule: Schedule):
         writer.writerow(field_names)
 
         # write the data
-        for timeslot in timeslots:
-            for activity in timeslot.activities.values():
-                data = [
-                    timeslot.day_names[timeslot.day],
-                    timeslot.period_names[timeslot.period],
-                    activity.act_type,
-                    timeslot.room.name,
-                    list(timeslot.students.values()),
-                ]
-                writer.writerow(data)
+        writer.writerows(
+            [
+                timeslot.day_names[timeslot.day],
+                timeslot.period_names[timeslot.period],
+                activity.act_type,
+                timeslot.room.name,
+                list(timeslot.students.values()),
+            ]
+            for timeslot in timeslots
+            for activity in timeslot.activities.values()
+        )
 
         print(f"output saved to {output_path}")
     return course
@@ -110,9 +119,9 @@ def course_sched_csv(schedule: Schedule):
 
 def room_sched_csv(schedule: Schedule):
     """ "Exports timetable for random room in csv format"""
-    # generate course information from random course in schedule
+    # generate room information from random room in schedule
     room = random.choice(list(schedule.rooms.values()))
-    timeslots = sorted(list(room.timeslots.values()), key=lambda x: x.moment)
+    timeslots = entity_timeslots(room)
     # output path + file name
     output_path = f"output/room_schedule_output.csv"
 
@@ -127,9 +136,8 @@ def room_sched_csv(schedule: Schedule):
         writer.writerow(field_names)
 
         # write the data
-        for timeslot in timeslots:
-            activity = list(timeslot.activities.values())[0]
-            data = [
+        writer.writerows(
+            [
                 room.name,
                 timeslot.day_names[timeslot.day],
                 timeslot.period_names[timeslot.period],
@@ -137,43 +145,29 @@ def room_sched_csv(schedule: Schedule):
                 activity.act_type,
                 list(timeslot.students.values()),
             ]
-            writer.writerow(data)
+            for timeslot in timeslots
+            for activity in timeslot.activities.values()
+        )
 
         print(f"output saved to {output_path}")
     return room
 
 
-def plot_timetable(schedule: Schedule, spec):
-    """ "Exports timetable in png format"""
-    timeslots = []
-    # type of plot
-    if spec == "student":
-        student = stud_sched_csv(schedule)
-        timeslots = sorted(list(student.timeslots.values()), key=lambda x: x.moment)
-        spec = student
-    elif spec == "course":
-        course = course_sched_csv(schedule.courses)  # type: ignore
-        for activity in course.activities.values():
-            for timeslot in activity.timeslots.values():
-                schedule.connect_nodes(course, timeslot)
-        timeslots = sorted(list(course.timeslots.values()), key=lambda x: x.moment)
-        spec = course
-    elif spec == "room":
-        room = room_sched_csv(schedule)
-        timeslots = sorted(list(room.timeslots.values()), key=lambda x: x.moment)
-        spec = room
-    else:
-        raise NotImplementedError
+def timetable_blocks(timeslots):
+    """Return blocks to plot of `timeslots`: tuples of (day, period, room, event)."""
+    return [
+        (timeslot.day, timeslot.period, timeslot.room.name, activity.course.name + "\n" + activity.act_type)
+        for timeslot in timeslots
+        for activity in timeslot.activities.values()
+    ]
 
-    output_path = f"output/{spec}_timetable.png"
 
+def render_timetable(title: str, blocks: list[tuple[int, int, str, str]], output_path: str):
+    """Plot timetable of `blocks` and save it in png format. Blocks are plain data, so rendering can run in a worker."""
     fig = plt.figure(figsize=(10, 5.89))
-    for timeslot in timeslots:
-        activity = list(timeslot.activities.values())[0]
-        room = timeslot.room.name
-        event = activity.course.name + "\n" + activity.act_type
-        day = timeslot.day - 0.48
-        period = timeslot.period_names[timeslot.period]
+    for day, period, room, event in blocks:
+        day = day - 0.48
+        period = Timeslot.period_names[period]
         end = period + 2
         plt.fill_between([day, day + 0.96], period, end, color=COLORS[int(round(day))], edgecolor="k", linewidth=0.5)
         plt.text(day + 0.02, period + 0.05, room, va="top", fontsize=7)
@@ -190,6 +184,24 @@ def plot_timetable(schedule: Schedule, spec):
     ax.set_yticks(range(9, 21, 2))
     ax.set_ylabel("Time")
 
-    plt.title(str(spec), y=1.07)
-    print(f"Timetable plot saved to {output_path}")
+    plt.title(title, y=1.07)
+    prepare_path(output_path)
     plt.savefig(output_path, dpi=200)
+    plt.close(fig)
+
+
+def plot_timetable(schedule: Schedule, spec):
+    """ "Exports timetable in png format"""
+    # type of plot
+    if spec == "student":
+        entity = stud_sched_csv(schedule)
+    elif spec == "course":
+        entity = course_sched_csv(schedule)
+    elif spec == "room":
+        entity = room_sched_csv(schedule)
+    else:
+        raise NotImplementedError
+
+    output_path = f"output/{entity}_timetable.png"
+    render_timetable(str(entity), timetable_blocks(entity_timeslots(entity)), output_path)
+    print(f"Timetable plot saved to {output_path}")
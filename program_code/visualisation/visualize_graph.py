@@ -1,9 +1,24 @@
-import networkx as nx
-from pyvis.network import Network as PyvisNetwork
-from .fix_webpage import fix_webpage
+"""
+Export of a schedule as a graph: an interactive html page, node/edge json, or GraphML for offline tools.
+
+Node and edge data is built directly from the schedule and inserted in a fixed html template, which draws it with
+vis-network. Large schedules can be reduced by level of detail: `detail="activities"` aggregates students per timeslot,
+`course` and `room` only export the activities and timeslots of one course or room.
+"""
+
+import os
+import json
+from xml.sax.saxutils import escape
 from ..classes import Schedule
 from ..helpers import prepare_path
 
+TEMPLATE_PATH = os.path.join(os.path.dirname(__file__), "graph_template.html")
+
+# Levels of detail: show students as nodes, or only count them per timeslot
+DETAILS = ("students", "activities")
+COLORS = {"Activity": "blue", "Timeslot": "red", "Student": "orange"}
+LEVELS = {"Activity": 0, "Timeslot": 1, "Student": 2}
+
 
 def print_nodes(schedule: Schedule):
     """Print nodes with id's in rows to terminal"""
@@ -14,74 +29,109 @@ def print_nodes(schedule: Schedule):
     print("\n")
 
 
+def node_data(node, **fields):
+    """Node as plain data, as used by vis-network."""
+    node_type = type(node).__name__
+    data = {
+        "id": node.id,
+        "label": str(node),
+        "group": node_type,
+        "level": LEVELS[node_type],
+        "color": COLORS[node_type],
+        "title": f"ID: {node.id}\nType: {node_type}\nLabel: {node}",
+    }
+    data.update(fields)
+    return data
+
+
+def graph_data(schedule: Schedule, detail: str = "students", course: str | None = None, room: str | None = None):
+    """Return nodes and edges of schedule as plain data, optionally only of the course or room with name `course`
+    or `room`. With `detail="activities"` students are not exported, their amount is added to their timeslots."""
+    if detail not in DETAILS:
+        raise ValueError(f"Invalid detail {detail}, choose from {DETAILS}.")
+
+    # Select activities and their timeslots
+    timeslots = [
+        timeslot
+        for timeslot in schedule.timeslots.values()
+        if (room is None or timeslot.room.name == room)
+        and (course is None or any(activity.course.name == course for activity in timeslot.activities.values()))
+    ]
+    if course is None and room is None:
+        activities = list(schedule.activities.values())
+    else:
+        activities = list({uid: a for timeslot in timeslots for uid, a in timeslot.activities.items()}.values())
+
+    nodes = [node_data(activity, value=activity.enrolled_students) for activity in activities]
+    nodes.extend(
+        node_data(timeslot, label=f"{timeslot} ({timeslot.enrolled_students})", value=timeslot.enrolled_students)
+        for timeslot in timeslots
+    )
+    if detail == "students":
+        students = {uid: student for timeslot in timeslots for uid, student in timeslot.students.items()}
+        nodes.extend(node_data(student) for student in students.values())
+
+    # Edges between exported nodes
+    exported = {node["id"] for node in nodes}
+    edges = [{"from": id1, "to": id2} for id1, id2 in schedule.edges if id1 in exported and id2 in exported]
+    return {"nodes": nodes, "edges": edges}
+
+
+def write_graph_html(data: dict, path: str):
+    """Write interactive page of graph `data` to `path`."""
+    with open(TEMPLATE_PATH, "r") as file:
+        template = file.read()
+
+    # Data is inserted in a script, it may not close it
+    script_data = json.dumps(data).replace("</", "<\\/")
+    prepare_path(path)
+    with open(path, "w") as file:
+        file.write(template.replace("/*GRAPH_DATA*/", script_data))
+
+
+def write_graph_json(data: dict, path: str):
+    """Write graph `data` to `path` as compact json."""
+    prepare_path(path)
+    with open(path, "w") as file:
+        json.dump(data, file, separators=(",", ":"))
+
+
+def write_graphml(data: dict, path: str):
+    """Write graph `data` to `path` as GraphML."""
+    keys = {"label": "string", "group": "string", "level": "int", "value": "int"}
+
+    prepare_path(path)
+    with open(path, "w") as file:
+        file.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        file.write('<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n')
+        for key, key_type in keys.items():
+            file.write(f'  <key id="{key}" for="node" attr.name="{key}" attr.type="{key_type}"/>\n')
+        file.write('  <graph edgedefault="undirected">\n')
+        for node in data["nodes"]:
+            values = "".join(f'<data key="{key}">{escape(str(node[key]))}</data>' for key in keys if key in node)
+            file.write(f'    <node id="n{node["id"]}">{values}</node>\n')
+        file.writelines(f'    <edge source="n{edge["from"]}" target="n{edge["to"]}"/>\n' for edge in data["edges"])
+        file.write("  </graph>\n</graphml>\n")
+
+
 def visualize_graph(
-    schedule: Schedule, do_print_nodes: bool = False, output_folder: str = "output", plot: bool = False
+    schedule: Schedule,
+    do_print_nodes: bool = False,
+    output_folder: str = "output",
+    plot: bool = False,
+    detail: str = "students",
+    course: str | None = None,
+    room: str | None = None,
+    formats=("html",),
 ):
-    """Visualize schedule as a graph."""
-    # edges is a list which stores the set of edges that constitutes a graph
-    edges = schedule.edges
-
+    """Visualize schedule as a graph. Writes `graph.html`, and `graph.json` or `graph.graphml` if in `formats`."""
     if do_print_nodes:
         print_nodes(schedule)
 
-    # Initialize Networkx graph
-    G = nx.Graph()
+    data = graph_data(schedule, detail, course, room)
+    writers = {"html": write_graph_html, "json": write_graph_json, "graphml": write_graphml}
+    for output_format in formats:
+        writers[output_format](data, f"{output_folder}/graph.{output_format}")
 
-    # Define iterables for hierarchal structure
-    shown_nodes = [
-        schedule.activities.values(),
-        schedule.timeslots.values(),
-        schedule.students.values(),
-    ]
-    hidden_nodes = [
-        schedule.courses.values(),
-        schedule.rooms.values(),
-    ]
-    colors = ["blue", "red", "orange", "green", "purple"]
-    assert len(colors) >= len(shown_nodes), "Not enough colors available for levels."
-
-    # Add all nodes with relevant metadata to networkx graph
-    for (category, color, level) in zip(shown_nodes, colors, range(len(shown_nodes))):
-        for node in category:
-            title = f"""ID: {node.id}
-            Type: {type(node).__name__}
-            Level: {level}
-            Label: {str(node)}
-            """
-            for neighbor_tag in ["activities", "students", "timeslots"]:
-                if hasattr(node, neighbor_tag):
-                    title += f"{neighbor_tag}: [\n"
-                    for neighbor in getattr(node, neighbor_tag).values():
-                        title += f"    {neighbor.id}: {neighbor} \n"
-                    title += "]\n"
-            title += f"""
-            
-            Attributes: {node.__dict__}
-            """
-            G.add_node(node.id, title=title, label=str(node), color=color, level=level)
-
-    # Add hidden nodes
-    for category in hidden_nodes:
-        for node in category:
-            G.add_node(node.id, level=len(shown_nodes), hidden=True)
-
-    # Add all edges to networkx graph
-    G.add_edges_from(edges)
-
-    # Output interactive visualization to html file with pyvis
-    do_filter_menu = True
-    net = PyvisNetwork(layout=True, height="900px", filter_menu=do_filter_menu)
-    net.from_nx(G)
-    net.options.physics.enabled = True
-    net.repulsion()
-    net.options.edges.smooth.enabled = False
-    net.options.layout.set_separation(500)
-    net.options.layout.hierarchical.sortMethod = "directed"
-    prepare_path(output_folder)
-    net.show(f"{output_folder}/graph.html")
-
-    if do_filter_menu:
-        # Filter menu function is broken, this function repairs it.
-        fix_webpage(output_folder, net)
-
-    print(f"View a sample of graph results in your browser: {output_folder}/sample.html")
+    if "html" in formats:
+        print(f"View a sample of graph results in your browser: {output_folder}/graph.html")
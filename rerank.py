@@ -0,0 +1,58 @@
+"""
+Re-rank results dumped by main.py under new score weights, without rescoring or decompressing schedules.
+
+Execute: `python3 rerank.py output/results_*.pyc --weights 5 1 1 2 10` to list the best results under those weights.
+Add `--pareto` to list the results on the Pareto front of the soft constraints instead.
+"""
+
+import argparse
+import csv
+from program_code.helpers import load_scores, rank, pareto_front, prepare_path
+from program_code.classes.result import SCORE_NAMES, SCORE_MATRIX
+
+
+def print_table(rows: list[tuple[int, float]], score_vectors, sources):
+    """Print results `rows` of (index, score) with their score vectors and where they are stored."""
+    print("score\t" + "\t".join(SCORE_NAMES) + "\tresult")
+    for index, score in rows:
+        path, position = sources[index]
+        print(f"{score:g}\t" + "\t".join(str(value) for value in score_vectors[index]) + f"\t{path}[{position}]")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="rerank.py", description="Re-rank stored results under new score weights.")
+
+    parser.add_argument("paths", nargs="+", help="Paths to results dumped by main.py, or their .scores.npz sidecars.")
+    parser.add_argument(
+        "--weights",
+        type=float,
+        nargs=len(SCORE_NAMES),
+        default=SCORE_MATRIX.tolist(),
+        help=f"Weights of {', '.join(SCORE_NAMES)}.",
+    )
+    parser.add_argument("--top", type=int, default=10, help="Amount of best results to list.")
+    parser.add_argument("--pareto", action="store_true", help="List results on the Pareto front instead.")
+    parser.add_argument("--output", help="Path to save scores of all results to, as csv.")
+
+    args = parser.parse_args()
+    score_vectors, sources = load_scores(args.paths)
+    scores, order = rank(score_vectors, args.weights)
+    print(f"Ranked {len(scores)} results by weights {args.weights}")
+
+    if args.pareto:
+        front = pareto_front(score_vectors)
+        print(f"{len(front)} results on the Pareto front")
+        print_table(sorted(((index, scores[index]) for index in front), key=lambda row: row[1]), score_vectors, sources)
+    else:
+        print_table([(index, scores[index]) for index in order[: args.top]], score_vectors, sources)
+
+    if args.output:
+        prepare_path(args.output)
+        with open(args.output, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["rank", "score", *SCORE_NAMES, "path", "index"])
+            writer.writerows(
+                [rank_index + 1, scores[index], *score_vectors[index], *sources[index]]
+                for rank_index, index in enumerate(order)
+            )
+        print(f"Saved scores to {args.output}")
@@ -0,0 +1,245 @@
+"""
+Long-lived solve service: solves schedules on warm worker processes, which keep input data and prototypes in memory.
+
+Execute: `python3 serve.py` to start the service, `python3 serve.py --submit job.json` to submit a job and follow it.
+
+Jobs and answers are newline delimited JSON over TCP. A job holds `method` and optionally `i_max`, `seed` and `section`,
+with input as csv paths (`prefs`, `courses`, `rooms`) or as rows (`students_input`, `courses_input`, `rooms_input`).
+The service answers with events: `queued`, `progress` (generation and score of iterative methods) and `done` with
+the result, or `error`. Results are cached by input, method and seed: resubmitting a job returns its result immediately.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import itertools
+import json
+import multiprocessing
+import random
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.queues import Queue
+from program_code import InputData, EvolutionSolver, make_solver, METHODS
+from program_code.algorithms.generate import make_prototype
+from program_code.algorithms.bounds import reported_gap
+from program_code.helpers.data import hashargs
+
+# Queue to report progress from worker process to service
+_progress_queue: Queue | None = None
+
+
+def init_worker(progress_queue: Queue):
+    """Initialize worker process with queue to report progress on."""
+    global _progress_queue
+    _progress_queue = progress_queue
+
+
+def solve_job(job_id: int, job: dict, data_arguments: dict) -> dict:
+    """Solve `job` in worker process. Returns summary of result, with the edges to rebuild its schedule from."""
+    # Keep prototype of input in memory of this worker
+    make_prototype(**data_arguments)
+
+    solver, do_multithreading, do_compression = make_solver(job["method"], data_arguments, section=job["section"])
+    if isinstance(solver, EvolutionSolver):
+        queue = _progress_queue
+        solver.progress = lambda generation, score: queue.put((job_id, generation, float(score)))  # type: ignore
+        result = solver.solve(
+            i_max=job["i_max"], self_repair=True, show_progress=False, save_result=False, seed=job["seed"]
+        )
+    else:
+        result = solver.solve(i_max=job["i_max"], seed=job["seed"])
+
+    return {
+        "score": float(result.score),
+        "score_vector": [int(value) for value in result.score_vector],
+        "solved": result.check_solved(),
+        "iterations": result.iterations,
+        "lower_bound": float(result.lower_bound),
+        "optimality_gap": reported_gap(result.score, result.lower_bound),
+        "edges": sorted(result.schedule.edges),
+    }
+
+
+class SolveService:
+    """Accepts jobs from clients, solves them on a process pool and streams events back."""
+
+    def __init__(self, processes: int | None = None):
+        # Spawn workers instead of forking, forked workers would inherit and keep open the connections to clients
+        context = multiprocessing.get_context("spawn")
+        self.progress_queue: Queue = context.Queue()
+        self.executor = ProcessPoolExecutor(
+            processes, mp_context=context, initializer=init_worker, initargs=(self.progress_queue,)
+        )
+
+        # Finished results and running jobs by cache key, so identical jobs are solved once
+        self.results: dict[str, dict] = {}
+        self.running: dict[str, tuple[int, asyncio.Future]] = {}
+        # Event queues of clients following each running job
+        self.followers: dict[int, list[asyncio.Queue]] = {}
+        self.job_ids = itertools.count()
+
+        # Input data read from csv, by paths
+        self.inputs: dict[tuple[str, str, str], dict] = {}
+
+    def data_arguments(self, job: dict) -> dict:
+        """Return input data of `job`, read from csv paths or taken from rows in job."""
+        if "students_input" in job:
+            return {name: job[name] for name in ("students_input", "courses_input", "rooms_input")}
+
+        paths = (
+            job.get("prefs", "data/studenten_en_vakken.csv"),
+            job.get("courses", "data/vakken.csv"),
+            job.get("rooms", "data/zalen.csv"),
+        )
+        if paths not in self.inputs:
+            self.inputs[paths] = InputData(*paths).__dict__
+        return self.inputs[paths]
+
+    @staticmethod
+    def normalize(job: dict) -> dict:
+        """Fill in job settings with defaults. Without seed, a seed is drawn so the result can be reproduced."""
+        if job.get("method") not in METHODS:
+            raise ValueError(f"Invalid method {job.get('method')}, choose from {METHODS}.")
+        seed = job.get("seed")
+        return {
+            "method": job["method"],
+            "i_max": job.get("i_max"),
+            "seed": random.getrandbits(32) if seed is None else int(seed),
+            "section": bool(job.get("section", False)),
+        }
+
+    @staticmethod
+    def cache_key(settings: dict, data_arguments: dict) -> str:
+        """Key of result of job: hash of input data and settings."""
+        text = json.dumps({"input": hashargs(**data_arguments), **settings}, sort_keys=True)
+        return hashlib.sha1(text.encode()).hexdigest()
+
+    def dispatch_progress(self):
+        """Forward progress reported by workers to the clients following the job. Runs in a thread."""
+        loop = self.loop
+        while True:
+            message = self.progress_queue.get()
+            if message is None:
+                return
+            job_id, generation, score = message
+            event = {"event": "progress", "job": job_id, "generation": generation, "score": score}
+            loop.call_soon_threadsafe(self.publish, job_id, event)
+
+    def publish(self, job_id: int, event: dict):
+        for queue in self.followers.get(job_id, []):
+            queue.put_nowait(event)
+
+    async def solve(self, job_id: int, settings: dict, data_arguments: dict, key: str):
+        """Solve job on process pool and cache its result."""
+        try:
+            result = await self.loop.run_in_executor(self.executor, solve_job, job_id, settings, data_arguments)
+            self.results[key] = {**result, "seed": settings["seed"]}
+            return self.results[key]
+        finally:
+            del self.running[key]
+
+    async def follow(self, job: dict, events: asyncio.Queue):
+        """Handle `job`, putting its events on `events`."""
+        try:
+            settings = self.normalize(job)
+            data_arguments = self.data_arguments(job)
+            key = self.cache_key(settings, data_arguments)
+
+            if key in self.results:
+                await events.put({"event": "done", "cached": True, **self.results[key]})
+                return
+
+            # Follow identical job if it is already running, else start it
+            if key not in self.running:
+                job_id = next(self.job_ids)
+                self.followers[job_id] = []
+                self.running[key] = job_id, asyncio.ensure_future(self.solve(job_id, settings, data_arguments, key))
+            job_id, future = self.running[key]
+
+            self.followers[job_id].append(events)
+            await events.put({"event": "queued", "job": job_id, "seed": settings["seed"]})
+            try:
+                result = await asyncio.shield(future)
+            finally:
+                self.followers[job_id].remove(events)
+                if not self.followers[job_id] and future.done():
+                    del self.followers[job_id]
+            await events.put({"event": "done", "cached": False, **result})
+        except Exception as error:
+            await events.put({"event": "error", "message": f"{type(error).__name__}: {error}"})
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve client: each line is a job, events of all its jobs are written back as lines."""
+        events: asyncio.Queue = asyncio.Queue()
+        jobs: list[asyncio.Task] = []
+
+        async def write_events():
+            # Write events until closing event `None`
+            while (event := await events.get()) is not None:
+                writer.write((json.dumps(event) + "\n").encode())
+                await writer.drain()
+
+        writing = asyncio.ensure_future(write_events())
+        try:
+            while line := await reader.readline():
+                try:
+                    job = json.loads(line)
+                except json.JSONDecodeError as error:
+                    await events.put({"event": "error", "message": f"Invalid job: {error}"})
+                    continue
+                jobs.append(asyncio.ensure_future(self.follow(job, events)))
+
+            # Client is done sending, finish its jobs and write remaining events
+            await asyncio.gather(*jobs)
+            await events.put(None)
+            await writing
+        finally:
+            writing.cancel()
+            writer.close()
+
+    async def serve(self, host: str, port: int):
+        self.loop = asyncio.get_running_loop()
+        threading.Thread(target=self.dispatch_progress, daemon=True).start()
+
+        server = await asyncio.start_server(self.handle, host, port, limit=2**26)
+        print(f"Solve service listening on {host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.progress_queue.put(None)
+            self.executor.shutdown(cancel_futures=True)
+
+
+async def submit(job: dict, host: str, port: int):
+    """Submit `job` to service and print its events. Returns result."""
+    reader, writer = await asyncio.open_connection(host, port, limit=2**26)
+    writer.write((json.dumps(job) + "\n").encode())
+    writer.write_eof()
+
+    result = None
+    while line := await reader.readline():
+        event = json.loads(line)
+        if event["event"] == "done":
+            result = event
+            print(f"Done: score {event['score']} (solved: {event['solved']}, cached: {event['cached']})")
+        else:
+            print(event)
+    writer.close()
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="serve.py", description="Solve schedules as a service.")
+
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on.")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on.")
+    parser.add_argument("--processes", type=int, help="Amount of worker processes, defaults to amount of cores.")
+    parser.add_argument("--submit", dest="job_path", help="Submit job from json file to running service instead.")
+
+    args = parser.parse_args()
+    if args.job_path:
+        with open(args.job_path) as file:
+            asyncio.run(submit(json.load(file), args.host, args.port))
+    else:
+        asyncio.run(SolveService(args.processes).serve(args.host, args.port))
@@ -0,0 +1,80 @@
+"""
+Tune parameters of the iterative solvers with a sweep raced by successive halving.
+
+Execute: `python3 sweep.py grid.json` with a grid as in `DEFAULT_GRID`, or without grid to sweep the default.
+Runs are stored in `--store`, rerunning the same command skips runs already stored.
+"""
+
+import argparse
+import json
+from program_code import InputData
+from program_code.algorithms.sweep import SweepStore, expand_grid, successive_halving, best_configurations
+
+# Parameters of mutation supplier and `EvolutionSolver` per method
+DEFAULT_GRID = {
+    "simulated_annealing": {
+        "supplier": {"T_0": [0.05, 0.2, 1], "ceiling": [5, 10, 20], "score_scope": [1, 2]},
+        "solver": {"population_size": [1, 5]},
+    },
+    "hillclimber": {
+        "supplier": {"score_scope": [1, 2, 4]},
+        "solver": {"population_size": [1, 5]},
+    },
+}
+
+
+def main(
+    grid_path: str | None,
+    store_path: str,
+    stud_prefs_path: str,
+    courses_path: str,
+    rooms_path: str,
+    min_budget: int,
+    max_budget: int,
+    eta: int,
+    repeats: int,
+    samples: int,
+    seed: int,
+    processes: int | None,
+):
+    """Run sweep and report best configuration per method."""
+    grid = DEFAULT_GRID
+    if grid_path is not None:
+        with open(grid_path) as file:
+            grid = json.load(file)
+
+    input_data = InputData(stud_prefs_path, courses_path, rooms_path).__dict__
+    configurations = expand_grid(grid, samples, seed)
+    store = SweepStore(store_path)
+    print(f"Sweeping {len(configurations)} configurations, {len(store.records)} runs already stored in {store_path}")
+
+    successive_halving(configurations, store, input_data, min_budget, max_budget, eta, repeats, processes)
+
+    for method, best in best_configurations(store).items():
+        print(f"{method}: score {best['score']:.1f} after {best['budget']} generations ({best['runs']} runs)")
+        print(f"\tsupplier: {best['config']['supplier']}, solver: {best['config']['solver']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="sweep.py", description="Tune solver parameters.")
+
+    parser.add_argument("grid_path", nargs="?", help="Path to json parameter grid, defaults to built in grid.")
+    parser.add_argument("--store", dest="store_path", default="output/sweep.jsonl", help="Path to store runs in.")
+    parser.add_argument("--min_budget", type=int, default=250, help="Generations of first round.")
+    parser.add_argument("--max_budget", type=int, default=4000, help="Maximum generations of a round.")
+    parser.add_argument("--eta", type=int, default=2, help="Keep 1/eta of configurations each round.")
+    parser.add_argument("--repeats", type=int, default=1, help="Runs per configuration per round.")
+    parser.add_argument("--samples", type=int, default=10, help="Configurations to draw for grids with distributions.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for drawing configurations.")
+    parser.add_argument("--processes", type=int, help="Amount of worker processes, defaults to amount of cores.")
+    parser.add_argument(
+        "--prefs",
+        dest="stud_prefs_path",
+        default="data/studenten_en_vakken.csv",
+        help="Path to student enrolments csv.",
+    )
+    parser.add_argument("--courses", dest="courses_path", default="data/vakken.csv", help="Path to courses csv.")
+    parser.add_argument("--rooms", dest="rooms_path", default="data/zalen.csv", help="Path to rooms csv.")
+
+    # Run sweep with provided arguments
+    main(**vars(parser.parse_args()))